@@ -0,0 +1,51 @@
+# Contraction hierarchy benchmark on a grid city
+# We time the preprocessing, then the same random queries with TrafficNetwork.dijkstra (one full
+# search per query), a point-to-point route on the snapshot and the hierarchy, and check that
+# all of them give the same distances.
+# Run it from anywhere with: python benchmarks/hierarchy.py [rows] [cols] [queries]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from traffic import ContractionHierarchy, gridNetwork
+
+
+def main(rows=30, cols=30, queries=50, seed=0):
+    network = gridNetwork(rows, cols, seed)
+    snapshot = network.snapshot()
+    generator = random.Random(seed)
+    pairs = [(generator.randrange(len(snapshot)), generator.randrange(len(snapshot))) for i in range(queries)]
+    pairs = [(snapshot.getIntersection(a), snapshot.getIntersection(b)) for a, b in pairs]
+
+    start = time.perf_counter()
+    hierarchy = ContractionHierarchy.build(snapshot)
+    preprocessing = time.perf_counter() - start
+
+    # One full dijkstra per query
+    start = time.perf_counter()
+    expected = [network.dijkstra(a)[0][b.getID()] for a, b in pairs]
+    dijkstraTime = (time.perf_counter() - start) / queries
+
+    # Point-to-point Dijkstra with early exit on the snapshot
+    start = time.perf_counter()
+    for a, b in pairs:
+        snapshot.route(a, b)
+    routeTime = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    found = [hierarchy.distance(a, b) for a, b in pairs]
+    hierarchyTime = (time.perf_counter() - start) / queries
+
+    print(f"Grid {rows}x{cols}: {len(snapshot)} intersections, {len(hierarchy.getTargets())} upward edges")
+    print(f"Preprocessing: {preprocessing:.2f} s")
+    print(f"dijkstra: {dijkstraTime * 1000:.3f} ms per query")
+    print(f"Snapshot route: {routeTime * 1000:.3f} ms per query")
+    print(f"Contraction hierarchy: {hierarchyTime * 1000:.3f} ms per query "
+          f"({dijkstraTime / hierarchyTime:.0f}x faster than dijkstra)")
+    print(f"Same distances: {found == expected}")
+
+
+if __name__ == "__main__":
+    main(*(int(argument) for argument in sys.argv[1:4]))
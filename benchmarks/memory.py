@@ -0,0 +1,102 @@
+# Memory benchmark for the intersection, road and house objects
+# We build the same grid city twice and measure the memory with tracemalloc:
+# - with the package classes (__slots__, tuples of roads, one shared empty set of houses)
+# - with the layout the classes had before: an instance dictionary on every object, a list of
+#   4 road slots and a set of houses on every intersection, and a list of 2 ends on every road
+# Run it from anywhere with: python benchmarks/memory.py [rows] [cols]
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from traffic import House, Intersection, Road
+
+
+# The old layout, only what is needed to hold the same data
+class LegacyIntersection:
+    def __init__(self, ID, roadOne, roadTwo):
+        self.ID = ID
+        roadOne.addIntersection(self)
+        roadTwo.addIntersection(self)
+        self.roads = [roadOne, roadTwo, None, None]
+        self.houses = set()
+
+    def addRoad(self, road):
+        road.addIntersection(self)
+        self.roads[self.roads.index(None)] = road
+
+    def addHouse(self, house):
+        self.houses.add(house)
+
+
+class LegacyRoad:
+    def __init__(self, ID, name, length, traffic_status):
+        self.ID = ID
+        self.name = name
+        self.length = length
+        self.traffic = traffic_status
+        self.intersections = [None, None]
+
+    def addIntersection(self, intersection):
+        self.intersections[self.intersections.index(None)] = intersection
+        return True
+
+
+class LegacyHouse:
+    def __init__(self, ID, intersection):
+        self.ID = ID
+        self.location = intersection
+        intersection.addHouse(self)
+
+
+# The same grid city as gridNetwork, without the network around it
+def buildGrid(rows, cols, intersectionClass, roadClass, houseClass, seed=0, houseChance=0.1):
+    generator = random.Random(seed)
+    roads = [[] for node in range(rows * cols)]
+    for row in range(rows):
+        for col in range(cols):
+            node = row * cols + col
+            if col + 1 < cols:
+                road = roadClass(f"{node}-{node + 1}", f"Street {row}", generator.randint(100, 1000), "Normal")
+                roads[node].append(road)
+                roads[node + 1].append(road)
+            if row + 1 < rows:
+                road = roadClass(f"{node}-{node + cols}", f"Avenue {col}", generator.randint(100, 1000), "Normal")
+                roads[node].append(road)
+                roads[node + cols].append(road)
+    intersections = []
+    houses = []
+    for node in range(rows * cols):
+        intersection = intersectionClass(str(node), roads[node][0], roads[node][1])
+        for road in roads[node][2:]:
+            intersection.addRoad(road)
+        if generator.random() < houseChance:
+            houses.append(houseClass(f"H{node}", intersection))
+        intersections.append(intersection)
+    return intersections, roads, houses
+
+
+def measure(rows, cols, classes):
+    tracemalloc.start()
+    city = buildGrid(rows, cols, *classes)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The per-intersection lists of roads belong to the builder, not to the objects
+    builderLists = sum(sys.getsizeof(roads) for roads in city[1])
+    del city
+    return size - builderLists
+
+
+def main(rows=200, cols=200):
+    count = rows * cols
+    print(f"Grid {rows}x{cols}: {count} intersections, {rows * (cols - 1) + cols * (rows - 1)} roads\n")
+    legacy = measure(rows, cols, (LegacyIntersection, LegacyRoad, LegacyHouse))
+    slotted = measure(rows, cols, (Intersection, Road, House))
+    print(f"Before (instance dictionaries): {legacy / 1e6:.1f} MB, {legacy / count:.0f} bytes per intersection")
+    print(f"Now (__slots__):                {slotted / 1e6:.1f} MB, {slotted / count:.0f} bytes per intersection")
+    print(f"Saved: {(1 - slotted / legacy) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main(*(int(argument) for argument in sys.argv[1:3]))
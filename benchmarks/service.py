@@ -0,0 +1,140 @@
+# Load test for the routing service (see traffic/service.py)
+# This saves a synthetic city (or uses a saved network), starts the service on it in another
+# process and sends it route requests from many keep-alive connections at once. The sources
+# come from a few depots so requests can share searches, the targets are random.
+# We report the latency percentiles, the throughput and what the service did with the requests.
+# Run it from anywhere with: python benchmarks/service.py [--city grid 100000] [--connections 64]
+# or against a service that is already running: --url 127.0.0.1:8080 --load the.trnw
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# One request on an open connection, this gives the status and the body
+async def request(reader, writer, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b""):
+            break
+        name, unused, value = header.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+# One client connection sending its share of the requests one after the other
+async def client(host, port, paths, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for path in paths:
+            start = time.perf_counter()
+            status, body = await request(reader, writer, path)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def loadTest(host, port, paths, connections):
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, paths[number::connections], latencies, statuses)
+                           for number in range(connections)))
+    seconds = time.perf_counter() - start
+    reader, writer = await asyncio.open_connection(host, port)
+    status, body = await request(reader, writer, "/stats")
+    writer.close()
+    return latencies, statuses, seconds, json.loads(body)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# To wait until the service accepts connections
+def waitForPort(host, port, process, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process != None and process.poll() != None:
+            raise RuntimeError("the service stopped before it was ready")
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("the service didn't start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the routing service")
+    parser.add_argument("--city", nargs=2, metavar=("KIND", "INTERSECTIONS"), default=["grid", "10000"])
+    parser.add_argument("--load", help="a saved network to serve instead of a synthetic city")
+    parser.add_argument("--url", help="host:port of a service that is already running")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--depots", type=int, default=8, help="how many different sources the requests use")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import traffic
+    with tempfile.TemporaryDirectory() as folder:
+        path = arguments.load
+        if path == None:
+            path = os.path.join(folder, "city.trnw")
+            traffic.syntheticCity(arguments.city[0], int(arguments.city[1]), arguments.seed).save(path)
+        ids = list(traffic.TrafficNetwork.load(path).snapshot().getIDs())
+
+        generator = random.Random(arguments.seed)
+        depots = generator.sample(ids, min(arguments.depots, len(ids)))
+        paths = [f"/route?source={generator.choice(depots)}&target={generator.choice(ids)}"
+                 for number in range(arguments.requests)]
+
+        process = None
+        if arguments.url:
+            host, port = arguments.url.rsplit(":", 1)
+            port = int(port)
+        else:
+            host, port = "127.0.0.1", arguments.port
+            command = [sys.executable, "-m", "traffic.service", "--load", path, "--port", str(port)]
+            if arguments.processes:
+                command += ["--processes", str(arguments.processes)]
+            process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL)
+        try:
+            waitForPort(host, port, process)
+            latencies, statuses, seconds, stats = asyncio.run(loadTest(host, port, paths, arguments.connections))
+        finally:
+            if process != None:
+                process.terminate()
+                process.wait()
+
+    print(f"{len(ids)} intersections, {arguments.requests} route requests from {len(depots)} depots "
+          f"over {arguments.connections} connections\n")
+    print(f"Throughput: {len(latencies) / seconds:.0f} requests/s ({seconds:.2f} s)")
+    print(f"Latency: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms, "
+          f"mean {statistics.mean(latencies) * 1000:.1f} ms")
+    print(f"Statuses: {', '.join(f'{status}: {count}' for status, count in sorted(statuses.items()))}")
+    print(f"Service: {stats['searches']} searches, {stats['coalesced']} requests joined a running search, "
+          f"{stats['rejected']} turned away")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Startup time benchmark for the traffic package
+# Every case runs in a fresh Python process (so nothing is cached between them) and we report
+# the median wall time. Run it from anywhere with: python benchmarks/startup.py
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The code every case runs, the time is measured inside the new process
+CASES = [
+    ("import traffic", "import traffic"),
+    ("import networkx + matplotlib (what the old script loaded first)",
+     "import networkx, matplotlib.pyplot"),
+    ("open saved network + first route",
+     "import traffic\n"
+     "network = traffic.TrafficNetwork.load(PATH)\n"
+     "network.route('0000', '{last}')"),
+    ("open saved network + toNetwork",
+     "import traffic\n"
+     "traffic.TrafficNetwork.load(PATH).toNetwork()"),
+]
+
+
+def measure(code, path, repeats):
+    script = (f"import time\nstart = time.perf_counter()\nPATH = {path!r}\n{code}\n"
+              f"print(time.perf_counter() - start)")
+    times = []
+    for repeat in range(repeats):
+        output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        times.append(float(output.split()[-1]))
+    return statistics.median(times)
+
+
+def main(rows=60, cols=60, repeats=5):
+    sys.path.insert(0, ROOT)
+    import traffic
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "grid.trnw")
+        start = time.perf_counter()
+        network = traffic.gridNetwork(rows, cols)
+        network.save(path)
+        print(f"Grid {rows}x{cols} built and saved in {time.perf_counter() - start:.2f} s\n")
+        last = str(rows * cols - 1).zfill(len(str(rows * cols)))
+
+        for name, code in CASES:
+            try:
+                seconds = measure(code.format(last=last), path, repeats)
+            except subprocess.CalledProcessError as error:
+                print(f"{name}: failed\n{error.stderr}")
+                continue
+            print(f"{name}: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# Benchmark suite for the traffic engine on synthetic cities (see traffic/generators.py)
+# For every kind of city and size we time building the network (TrafficNetwork.__init__),
+# dijkstra, packageDistribution, initializeNetwork, the snapshot and the methods that change
+# the network, and we record the peak memory of the process.
+# Every case runs in a fresh Python process, so the peak memory belongs to that case alone.
+# The results are written to a JSON file, and a second run can be compared with the first:
+#   python benchmarks/suite.py --sizes 1000 10000 100000 --output before.json
+#   python benchmarks/suite.py --sizes 1000 10000 100000 --output after.json --compare before.json
+# A million intersections works too (--sizes 1000000), it takes a few minutes and a few GB.
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The timings where a higher number is worse (all of them), in the order they are printed
+METRICS = ("generate", "__init__", "dijkstra", "packageDistribution", "snapshot", "initializeNetwork",
+           "setLength", "setTraffic", "addHouse", "removeHouse", "addRoad", "removeRoad",
+           "addIntersection", "removeIntersection")
+
+
+# The peak memory of this process in MB, None where the resource module doesn't exist (Windows)
+def peakMemory():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux gives KB, macOS gives bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+# To time a function over a list of arguments, this gives the mean time per call in seconds
+def timeEach(function, arguments):
+    start = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return (time.perf_counter() - start) / max(1, len(arguments))
+
+
+# One case, run in its own process: one city of one size
+def runCase(kind, size, seed, queries, mutations):
+    sys.path.insert(0, ROOT)
+    from traffic import House, Intersection, Road, TrafficNetwork
+    from traffic.generators import cityParts
+
+    baseline = peakMemory()
+    timings = {}
+    start = time.perf_counter()
+    name, intersections = cityParts(kind, size, seed)
+    timings["generate"] = time.perf_counter() - start
+    start = time.perf_counter()
+    network = TrafficNetwork(name, intersections[0])
+    timings["__init__"] = time.perf_counter() - start
+    counts = {"intersections": len(network.getIntersections()), "roads": len(network.getRoads()),
+              "houses": len(network.getHouses())}
+
+    generator = random.Random(seed)
+    mutations = min(mutations, len(intersections))
+    sources = generator.sample(intersections, min(queries, len(intersections)))
+    results = []
+    timings["dijkstra"] = timeEach(lambda source: results.append(network.dijkstra(source)), sources)
+    timings["packageDistribution"] = timeEach(lambda result: network.packageDistribution(result[0], result[2]),
+                                              results)
+    del results
+    start = time.perf_counter()
+    network.snapshot()
+    timings["snapshot"] = time.perf_counter() - start
+    try:
+        start = time.perf_counter()
+        network.initializeNetwork()
+        timings["initializeNetwork"] = time.perf_counter() - start
+    except ImportError:
+        # networkx isn't installed
+        timings["initializeNetwork"] = None
+
+    # The changes, every one goes through the network's listeners like a real edit would
+    roads = generator.sample(sorted(network.getRoads(), key=Road.getID), mutations)
+    timings["setLength"] = timeEach(lambda road: road.setLength(road.getLength() + 1), roads)
+    timings["setTraffic"] = timeEach(lambda road: road.setTraffic("Heavy"), roads)
+    places = generator.sample(intersections, mutations)
+    houses = []
+    timings["addHouse"] = timeEach(lambda place: houses.append(House(f"B{len(houses)}", place)), places)
+    timings["removeHouse"] = timeEach(lambda house: house.getLocation().removeHouse(house), houses)
+    newRoads = [Road(f"N{number}", "New road", 100, "Normal") for number in range(2 * mutations)]
+    timings["addRoad"] = timeEach(network.addRoad, newRoads)
+    timings["removeRoad"] = timeEach(network.removeRoad, newRoads)
+    newIntersections = [Intersection(f"N{number}", newRoads[2 * number], newRoads[2 * number + 1])
+                        for number in range(mutations)]
+    timings["addIntersection"] = timeEach(network.addIntersection, newIntersections)
+    timings["removeIntersection"] = timeEach(network.removeIntersection,
+                                             generator.sample(intersections, mutations))
+
+    peak = peakMemory()
+    return {"kind": kind, "size": size, "name": name, **counts, "timings": timings,
+            "peakMemoryMB": peak,
+            "networkMemoryMB": None if peak == None else peak - baseline}
+
+
+def runInProcess(kind, size, arguments):
+    command = [sys.executable, os.path.abspath(__file__), "--case", kind, str(size),
+               "--seed", str(arguments.seed), "--queries", str(arguments.queries),
+               "--mutations", str(arguments.mutations)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def formatTime(seconds):
+    if seconds == None:
+        return "-"
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds * 1e6:.0f} us"
+
+
+def report(results, previous=None):
+    # Earlier results by kind and size, to compare with
+    before = {(result["kind"], result["size"]): result for result in (previous or {}).get("results", [])}
+    for result in results:
+        print(f"\n{result['name']}: {result['intersections']} intersections, {result['roads']} roads, "
+              f"{result['houses']} houses, peak memory {result['peakMemoryMB'] or 0:.0f} MB")
+        old = before.get((result["kind"], result["size"]))
+        for metric in METRICS:
+            seconds = result["timings"].get(metric)
+            line = f"  {metric:<20}{formatTime(seconds):>12}"
+            oldSeconds = old["timings"].get(metric) if old != None else None
+            if seconds != None and oldSeconds:
+                line += f"   x{seconds / oldSeconds:.2f} ({formatTime(oldSeconds)} before)"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the traffic engine on synthetic cities")
+    parser.add_argument("--kinds", nargs="+", default=["grid", "radial", "geometric"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=5, help="dijkstra runs per city")
+    parser.add_argument("--mutations", type=int, default=100, help="calls of every method that changes the network")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="an earlier output file to compare with")
+    parser.add_argument("--case", nargs=2, metavar=("KIND", "SIZE"), help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.case:
+        kind, size = arguments.case
+        print(json.dumps(runCase(kind, int(size), arguments.seed, arguments.queries, arguments.mutations)))
+        return
+
+    previous = None
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            previous = json.load(file)
+    results = []
+    for size in arguments.sizes:
+        for kind in arguments.kinds:
+            print(f"Running {kind} {size}...", file=sys.stderr)
+            try:
+                results.append(runInProcess(kind, size, arguments))
+            except subprocess.CalledProcessError as error:
+                print(f"{kind} {size} failed\n{error.stderr}", file=sys.stderr)
+    with open(arguments.output, "w") as file:
+        json.dump({"python": platform.python_version(), "platform": platform.platform(),
+                   "seed": arguments.seed, "queries": arguments.queries, "mutations": arguments.mutations,
+                   "results": results}, file, indent=2)
+    report(results, previous)
+    print(f"\nResults written to {arguments.output}")
+
+
+if __name__ == "__main__":
+    main()
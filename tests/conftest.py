@@ -0,0 +1,6 @@
+# The tests import the traffic package from the checkout, like the benchmarks do
+# Run them from anywhere with: python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
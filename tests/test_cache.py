@@ -0,0 +1,45 @@
+# The route cache: repeated queries are answered from it until the network changes
+from traffic import House, RouteCache, syntheticCity
+
+
+def test_repeated_queries_hit_the_cache():
+    network = syntheticCity("grid", 36, seed=1)
+    cache = network.enableCache()
+    depot = network.getIntersectionByID("00")
+    first = network.dijkstra(depot)
+    assert network.dijkstra(depot) is first
+    assert (cache.getHits(), cache.getMisses()) == (1, 1)
+    order = network.packageDistribution(first[0], first[2])
+    assert network.packageDistribution(first[0], first[2]) is order
+    # Dictionaries that aren't the cached ones are sorted again
+    assert network.packageDistribution(dict(first[0]), first[2]) == order
+
+
+def test_changes_make_the_cache_stale():
+    network = syntheticCity("grid", 36, seed=1)
+    network.enableCache()
+    depot = network.getIntersectionByID("00")
+    road = depot.getRoads()[0]
+    before = network.dijkstra(depot)
+    road.setLength(road.getLength() + 1000)
+    after = network.dijkstra(depot)
+    network.disableCache()
+    assert after is not before and after == network.dijkstra(depot)
+
+    network.enableCache()
+    before = network.dijkstra(depot)
+    network.addHouse(House("new house", network.getIntersectionByID("07")))
+    after = network.dijkstra(depot)
+    assert after[2]["07"] == before[2].get("07", 0) + 1
+
+
+def test_old_results_are_evicted_past_the_budget():
+    network = syntheticCity("grid", 100, seed=1)
+    size = RouteCache.estimateSize(network.dijkstra(network.getIntersectionByID("000")))
+    cache = network.enableCache(int(size * 2.5))
+    for ID in ("000", "001", "002", "003"):
+        network.dijkstra(network.getIntersectionByID(ID))
+    assert len(cache) == 2 and cache.getEvictions() == 2
+    assert cache.getSize() <= cache.getMaxBytes()
+    network.dijkstra(network.getIntersectionByID("003"))
+    assert cache.getHits() == 1
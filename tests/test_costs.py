@@ -0,0 +1,49 @@
+# Travel times from the cost model follow the network when it changes
+import pytest
+
+from traffic import House, TrafficCostModel, syntheticCity
+
+
+@pytest.fixture
+def network():
+    return syntheticCity("grid", 49, seed=6)
+
+
+def checkTimes(costs, network, source):
+    times, previous, houses = costs.dijkstra(source)
+    distances, expectedPrevious, expectedHouses = network.dijkstra(network.getIntersectionByID(source))
+    assert sorted(times) == sorted(distances)
+    assert houses == expectedHouses
+    # Every road is driven at the same speed, so the times follow the lengths
+    for ID, distance in distances.items():
+        assert times[ID] == pytest.approx(distance / (50 / 3.6))
+
+
+def test_times_follow_the_lengths(network):
+    costs = TrafficCostModel(network)
+    checkTimes(costs, network, "00")
+    road = next(iter(network.getRoads()))
+    road.setLength(road.getLength() * 3)
+    checkTimes(costs, network, "00")
+
+
+def test_houses_and_ids_that_change_are_seen(network):
+    costs = TrafficCostModel(network)
+    checkTimes(costs, network, "00")
+
+    # A house added to an intersection and one taken away
+    house = House("new house", network.getIntersectionByID("05"))
+    network.addHouse(house)
+    checkTimes(costs, network, "00")
+    assert costs.dijkstra("00")[2]["05"] == len(network.getIntersectionByID("05").getHouses())
+    old = next(iter(network.getHouses()))
+    old.getLocation().removeHouse(old)
+    network.removeHouse(old)
+    checkTimes(costs, network, "00")
+
+    # Intersections that get a new ID are found under it
+    network.getIntersectionByID("48").setID("zzz")
+    times = costs.dijkstra("00")[0]
+    assert "zzz" in times and "48" not in times
+    checkTimes(costs, network, "zzz")
+    costs.close()
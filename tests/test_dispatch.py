@@ -0,0 +1,40 @@
+# The dispatch simulator: orders come in, vehicles deliver them, the report adds up
+import pytest
+
+from traffic import syntheticCity
+
+
+def simulate(seed, **options):
+    network = syntheticCity("grid", 100, seed=4, houseChance=0.3)
+    simulation = network.dispatchSimulation(network.getIntersectionByID("000"), seed=seed, **options)
+    simulation.run(4 * 3600)
+    return simulation
+
+
+def test_orders_are_delivered_or_waiting():
+    simulation = simulate(1, vehicles=3, capacity=5, orderRate=120, cancelRate=0.2, patience=600)
+    report = simulation.report()
+    assert report["orders"] > 0 and report["delivered"] > 0 and report["trips"] > 0
+    assert report["time"] == 4 * 3600
+    # Orders on a vehicle that is still out are neither delivered nor waiting
+    assert report["delivered"] + report["cancelled"] + report["waiting"] <= report["orders"]
+    assert report["waiting"] == len(simulation.getQueue())
+    assert len(simulation.getLatencies()) == report["delivered"]
+    assert min(simulation.getLatencies()) > 0
+    assert 0 <= report["utilisation"] <= 1
+    assert all(0 <= share <= 1 for share in report["vehicleUtilisation"])
+    latency = report["latency"]
+    assert latency["p50"] <= latency["p90"] <= latency["p99"] <= latency["max"]
+
+
+def test_same_seed_same_report():
+    assert simulate(7).report() == simulate(7).report()
+    assert simulate(7).report() != simulate(8).report()
+
+
+def test_bad_fleets_are_refused():
+    network = syntheticCity("grid", 16, seed=4)
+    with pytest.raises(ValueError):
+        network.dispatchSimulation(network.getIntersectionByID("00"), vehicles=0)
+    with pytest.raises(ValueError):
+        network.dispatchSimulation(network.getIntersectionByID("00"), capacity=0)
@@ -0,0 +1,64 @@
+# DynamicShortestPaths against running dijkstra again after every change
+import random
+
+import pytest
+
+from traffic import DynamicShortestPaths, House, syntheticCity
+
+
+def assertSameTrees(tree, network, sources):
+    for source in sources:
+        distances, unused, houses = tree.dijkstra(source)
+        expected, unused, expectedHouses = network.dijkstra(source)
+        assert distances == pytest.approx(expected)
+        assert houses == expectedHouses
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_repaired_trees_match_dijkstra(seed):
+    network = syntheticCity("grid", 144, seed=seed)
+    generator = random.Random(seed)
+    intersections = sorted(network.getIntersections(), key=lambda node: node.getID())
+    sources = intersections[:2]
+    tree = DynamicShortestPaths(network)
+    for source in sources:
+        tree.addSource(source)
+    removed = []
+    for step in range(60):
+        change = generator.randrange(5)
+        road = generator.choice(sorted(network.getRoads(), key=lambda road: road.getID()))
+        if change == 0:
+            road.setLength(road.getLength() * generator.choice((0.2, 0.5)))
+        elif change == 1:
+            road.setLength(road.getLength() * generator.choice((2, 5)))
+        elif change == 2:
+            # One end lets go of the road, so it can't be driven on any more
+            end = next(node for node in road.getIntersections() if node != None)
+            end.removeRoad(road)
+            removed.append((end, road))
+        elif change == 3 and removed:
+            end, road = removed.pop(generator.randrange(len(removed)))
+            end.addRoad(road)
+        else:
+            intersection = generator.choice(intersections[2:])
+            if intersection in network.getIntersections():
+                network.removeIntersection(intersection)
+            else:
+                network.addIntersection(intersection)
+                House(f"new{step}", intersection)
+        assertSameTrees(tree, network, sources)
+    tree.close()
+
+
+def test_batched_changes_match_dijkstra():
+    network = syntheticCity("grid", 100, seed=4)
+    source = min(network.getIntersections(), key=lambda node: node.getID())
+    tree = DynamicShortestPaths(network)
+    tree.addSource(source)
+    roads = sorted(network.getRoads(), key=lambda road: road.getID())
+    with network.batch():
+        for road in roads[::3]:
+            road.setLength(road.getLength() * 3)
+        for road in roads[1::7]:
+            road.setLength(1)
+    assertSameTrees(tree, network, [source])
@@ -0,0 +1,41 @@
+# Fleet plans: every package on one vehicle, no vehicle over capacity
+import pytest
+
+from traffic import House, syntheticCity
+
+
+def tourLength(matrix, ids):
+    return sum(matrix.distance(a, b) for a, b in zip(ids, ids[1:] + ids[:1]))
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_plan_delivers_every_package_within_capacity(processes, tmp_path):
+    network = syntheticCity("grid", 400, seed=8, houseChance=0.3)
+    depot = network.getIntersectionByID("000")
+    plan = network.planFleet(depot, vehicles=8, capacity=25, timeBudget=0.2, processes=processes,
+                             path=str(tmp_path / "matrix.bin"))
+    houses = {node.getID(): len(node.getHouses()) for node in network.getIntersections()
+              if node.getHouses() and node is not depot}
+    assert 0 < len(plan) <= 8
+    visited = []
+    matrix = network.distanceMatrix(str(tmp_path / "matrix.bin"), ["000"] + sorted(houses))
+    for ids, length, packages in plan:
+        assert ids[0] == "000"
+        assert packages == sum(houses[ID] for ID in ids[1:]) <= 25
+        assert length == pytest.approx(tourLength(matrix, ids))
+        visited.extend(ids[1:])
+    assert sorted(visited) == sorted(houses)
+
+
+def test_impossible_plans_are_refused():
+    network = syntheticCity("grid", 100, seed=8, houseChance=0.3)
+    depot = network.getIntersectionByID("000")
+    packages = sum(len(node.getHouses()) for node in network.getIntersections() if node is not depot)
+    with pytest.raises(ValueError):
+        network.planFleet(depot, vehicles=1, capacity=packages - 1, processes=1)
+    # An intersection with more houses than a vehicle can carry
+    busy = network.getIntersectionByID("055")
+    network.addHouse(House("H55a", busy))
+    network.addHouse(House("H55b", busy))
+    with pytest.raises(ValueError):
+        network.planFleet(depot, vehicles=100, capacity=1, processes=1)
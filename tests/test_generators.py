@@ -0,0 +1,39 @@
+# Synthetic cities: the same seed gives the same city, and the coordinates fit the road lengths
+import math
+import random
+
+import pytest
+
+from traffic import syntheticCity
+from traffic.generators import CITY_KINDS
+
+
+def roads(network):
+    return sorted((road.getID(), road.getLength()) for road in network.getRoads())
+
+
+@pytest.mark.parametrize("kind", CITY_KINDS)
+def test_the_same_seed_gives_the_same_city(kind):
+    assert roads(syntheticCity(kind, 120, seed=5)) == roads(syntheticCity(kind, 120, seed=5))
+    assert roads(syntheticCity(kind, 120, seed=5)) != roads(syntheticCity(kind, 120, seed=6))
+
+
+@pytest.mark.parametrize("kind", CITY_KINDS)
+def test_roads_are_no_shorter_than_the_straight_line(kind):
+    for road in syntheticCity(kind, 500, seed=1).getRoads():
+        start, end = road.getIntersections()
+        assert road.getLength() >= math.dist(start.getCoordinates(), end.getCoordinates())
+
+
+# A* with the straight distance to the target as its guess must find the shortest routes
+@pytest.mark.parametrize("kind", CITY_KINDS)
+def test_astar_with_coordinates_finds_the_shortest_routes(kind):
+    network = syntheticCity(kind, 400, seed=2)
+    coordinates = {node.getID(): node.getCoordinates() for node in network.getIntersections()}
+    ids = sorted(coordinates)
+    generator = random.Random(0)
+    for unused in range(100):
+        source, target = generator.choice(ids), generator.choice(ids)
+        expected = network.route(source, target)
+        found = network.route(source, target, "astar", coordinates=coordinates)
+        assert found.getLength() == expected.getLength()
@@ -0,0 +1,72 @@
+# Contraction hierarchies: distances and routes against dijkstra, and the hierarchy file
+import os
+
+import pytest
+
+from traffic import ContractionHierarchy, syntheticCity
+import traffic.hierarchy
+
+
+@pytest.fixture
+def network():
+    return syntheticCity("grid", 64, seed=4)
+
+
+def checkHierarchy(hierarchy, network, sources):
+    snapshot = network.snapshot()
+    for source in sources:
+        distances = snapshot.shortestPathTree(snapshot.indexOf(source))[0]
+        for target, distance in zip(snapshot.getIDs(), distances):
+            assert hierarchy.distance(source, target) == pytest.approx(distance)
+            path = hierarchy.path(source, target)
+            if distance != float('inf'):
+                assert path[0] == source and path[-1] == target
+        assert hierarchy.oneToMany(source, snapshot.getIDs()) == pytest.approx(list(distances))
+
+
+def test_distances_match_dijkstra(network):
+    ids = network.snapshot().getIDs()
+    checkHierarchy(ContractionHierarchy.build(network.snapshot()), network, ids[::9])
+
+
+def test_saved_hierarchy_answers_the_same(network, tmp_path):
+    path = str(tmp_path / "city.trch")
+    network.contractionHierarchy(path).close()
+    saved = ContractionHierarchy.load(path, network.snapshot().fingerprint())
+    try:
+        checkHierarchy(saved, network, network.snapshot().getIDs()[::13])
+    finally:
+        saved.close()
+    assert ContractionHierarchy.load(path, b"\0" * 16) == None
+    assert os.listdir(tmp_path) == ["city.trch"]
+
+
+def test_every_truncated_file_is_rejected(network, tmp_path):
+    path = str(tmp_path / "city.trch")
+    ContractionHierarchy.build(network.snapshot()).save(path)
+    with open(path, "rb") as file:
+        data = file.read()
+    cut = str(tmp_path / "cut.trch")
+    for size in range(0, len(data), 5):
+        with open(cut, "wb") as file:
+            file.write(data[:size])
+        assert ContractionHierarchy.load(cut) == None, size
+    assert ContractionHierarchy.load(str(tmp_path / "missing.trch")) == None
+
+
+def test_failed_save_keeps_the_old_file(network, tmp_path, monkeypatch):
+    path = str(tmp_path / "city.trch")
+    hierarchy = ContractionHierarchy.build(network.snapshot())
+    hierarchy.save(path)
+    with open(path, "rb") as file:
+        before = file.read()
+
+    def crash(descriptor):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(traffic.hierarchy.os, "fsync", crash)
+    with pytest.raises(OSError):
+        hierarchy.save(path)
+    assert os.listdir(tmp_path) == ["city.trch"]
+    with open(path, "rb") as file:
+        assert file.read() == before
@@ -0,0 +1,33 @@
+# Importing the package is quiet and leaves the heavy libraries alone
+import os
+import subprocess
+import sys
+
+import pytest
+
+import traffic
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(code):
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def test_import_has_no_side_effects():
+    result = run("import sys, traffic\n"
+                 "print(sorted(name for name in ('numpy', 'networkx', 'matplotlib', 'asyncio') "
+                 "if name in sys.modules))")
+    assert result.stdout == "[]\n" and result.stderr == ""
+
+
+def test_lazy_classes_load_on_first_use():
+    result = run("import sys, traffic\n"
+                 "model = traffic.TrafficCostModel\n"
+                 "print(model.__module__, 'numpy' in sys.modules)")
+    assert result.stdout == "traffic.costs True\n"
+    for name in traffic._lazy:
+        assert getattr(traffic, name).__name__ == name
+    assert set(traffic.__all__) <= set(dir(traffic))
+    with pytest.raises(AttributeError):
+        traffic.Missing
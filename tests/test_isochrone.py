@@ -0,0 +1,52 @@
+# Isochrones and nearest houses: the same distances as dijkstra, found closest first
+import pytest
+
+from traffic import MappedNetwork, syntheticCity
+from traffic.generators import CITY_KINDS
+
+
+@pytest.mark.parametrize("kind", CITY_KINDS)
+def test_isochrone_matches_dijkstra(kind):
+    network = syntheticCity(kind, 300, seed=9)
+    source = network.snapshot().getIntersection(0)
+    distances = network.dijkstra(source)[0]
+    limit = sorted(distances.values())[len(distances) // 3]
+    found = list(network.isochrone(source, limit))
+    lengths = [distance for node, distance in found]
+    assert lengths == sorted(lengths)
+    assert found[0] == (source, 0)
+    assert {node.getID(): distance for node, distance in found} == \
+        {ID: distance for ID, distance in distances.items() if distance <= limit}
+    # Without a limit it reaches everything
+    assert len(list(network.isochrone(source, float('inf')))) == len(distances)
+
+
+@pytest.mark.parametrize("kind", CITY_KINDS)
+def test_nearest_houses_match_dijkstra(kind):
+    network = syntheticCity(kind, 300, seed=9, houseChance=0.2)
+    snapshot = network.snapshot()
+    source = snapshot.getIntersection(0)
+    distances = network.dijkstra(source)[0]
+    withHouses = sorted(distances[ID] for node, ID in enumerate(snapshot.getIDs()) if snapshot.getHouses()[node] > 0)
+    found = list(network.nearestHouses(source, 5))
+    assert len(found) == 5
+    assert [distance for node, distance in found] == withHouses[:5]
+    assert all(node.getHouses() and distances[node.getID()] == distance for node, distance in found)
+    # k=None gives all of them within the limit
+    limit = withHouses[len(withHouses) // 2]
+    assert [distance for node, distance in network.nearestHouses(source, None, limit)] == \
+        [distance for distance in withHouses if distance <= limit]
+    assert list(network.nearestHouses(source, 0)) == []
+
+
+def test_saved_network_gives_the_same_answers(tmp_path):
+    network = syntheticCity("grid", 100, seed=9, houseChance=0.3)
+    network.save(str(tmp_path / "city.bin"))
+    mapped = MappedNetwork.open(str(tmp_path / "city.bin"))
+    try:
+        assert list(mapped.isochrone("000", 3000)) == \
+            [(node.getID(), distance) for node, distance in network.isochrone("000", 3000)]
+        assert [(ID, distance) for ID, distance, houses in mapped.nearestHouses("000", 4)] == \
+            [(node.getID(), distance) for node, distance in network.nearestHouses("000", 4)]
+    finally:
+        mapped.close()
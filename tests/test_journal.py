@@ -0,0 +1,126 @@
+# Batches, and ChangeJournal replays on another copy of the network
+import pytest
+
+from traffic import ChangeJournal, House, Intersection, Road, syntheticCity
+
+
+def city():
+    return syntheticCity("grid", 100, seed=5)
+
+
+# Everything about a network that a journal can change, by ID
+def state(network):
+    intersections = {}
+    for node in network.getIntersections():
+        roads = sorted((road.getID(), road.getName(), road.getLength(), road.getTraffic(),
+                        tuple(sorted(end.getID() for end in road.getIntersections() if end != None)))
+                       for road in node.getRoads() if road != None)
+        houses = sorted(house.getID() for house in node.getHouses())
+        intersections[node.getID()] = (roads, houses, node.getCoordinates())
+    return (network.getNetworkName(), intersections, sorted(road.getID() for road in network.getRoads()),
+            sorted(house.getID() for house in network.getHouses()))
+
+
+def byID(items):
+    return {item.getID(): item for item in items}
+
+
+# A batch with a bit of everything, some of it undone again inside the batch
+def makeChanges(network):
+    intersections = byID(network.getIntersections())
+    roads = byID(network.getRoads())
+    with network.batch() as journal:
+        road = roads["0-1"]
+        road.setLength(road.getLength() + 7)
+        road.setLength(road.getLength() + 3)
+        roads["1-2"].setTraffic("Heavy")
+        roads["1-2"].setTraffic("Normal")
+        roads["2-3"].setTraffic("Congested")
+        roads["3-4"].setName("Main Street")
+        intersections["005"].setCoordinates((1.0, 2.0))
+
+        house = House("new house", intersections["006"])
+        network.addHouse(house)
+        passing = House("passing house", intersections["007"])
+        network.addHouse(passing)
+        network.removeHouse(passing)
+        intersections["007"].removeHouse(passing)
+
+        network.removeIntersection(intersections["055"])
+
+        # A new intersection next to the corner, on a new road
+        newRoad = Road("00-new", "New Road", 321, "Light")
+        intersections["000"].addRoad(newRoad)
+        corner = Intersection.fromRoads("new", [newRoad], coordinates=(-550.0, 0.0))
+        newRoad.addIntersection(corner)
+        network.addIntersection(corner)
+        network.addRoad(newRoad)
+
+        intersections["099"].setID("renamed")
+        roads["98-99"].setID("renamed road")
+        roads["98-99"].setLength(1)
+        network.setNetworkName("changed city")
+    return journal
+
+
+def test_replay_matches_the_source_network():
+    source = city()
+    journal = makeChanges(source)
+    assert len(journal) > 0
+    copy = city()
+    journal.replay(copy)
+    assert state(copy) == state(source)
+    assert copy.snapshot().fingerprint() == source.snapshot().fingerprint()
+
+
+def test_compacted_replay_matches_the_source_network():
+    source = city()
+    journal = makeChanges(source)
+    compacted = journal.compact()
+    assert len(compacted) < len(journal)
+    copy = city()
+    compacted.replay(copy)
+    assert state(copy) == state(source)
+
+
+def test_saved_journal_replays_the_same(tmp_path):
+    source = city()
+    journal = makeChanges(source)
+    path = str(tmp_path / "changes.json")
+    journal.save(path)
+    copy = city()
+    ChangeJournal.load(path).replay(copy)
+    assert state(copy) == state(source)
+    assert ChangeJournal.load(str(tmp_path / "missing.json")) == None
+
+
+def test_failed_replay_changes_nothing():
+    journal = makeChanges(city())
+    copy = city()
+    # The copy is missing an intersection the journal renames
+    copy.removeIntersection(byID(copy.getIntersections())["099"])
+    before = state(copy)
+    with pytest.raises(ValueError):
+        journal.replay(copy)
+    assert state(copy) == before
+
+
+def test_batch_is_undone_when_it_raises():
+    network = city()
+    before = state(network)
+    events = []
+    network.addListener(lambda item, change, *details: events.append(change))
+    with pytest.raises(RuntimeError):
+        with network.batch():
+            makeChanges(network)
+            raise RuntimeError("stop")
+    assert state(network) == before
+    assert events == []
+
+
+def test_listeners_hear_about_a_batch_once():
+    network = city()
+    events = []
+    network.addListener(lambda item, change, *details: events.append((change, details)))
+    journal = makeChanges(network)
+    assert events == [("batch", (journal,))]
@@ -0,0 +1,93 @@
+# NetworkLoader keeps the good rows and reports the bad ones
+import pytest
+
+from traffic import NetworkLoader
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def reasons(loader):
+    return {line: reason for path, line, reason in loader.getErrors()}
+
+
+def test_bad_csv_road_rows_are_rejected(tmp_path):
+    roads = write(tmp_path, "roads.csv", "from,to,length,id\n"
+                                         "A,B,100,r1\n"
+                                         "B,C,abc,r2\n"
+                                         "C,D,-5,r3\n"
+                                         "D,D,10,r4\n"
+                                         "B,C,20,r1\n"
+                                         "C,D\n"
+                                         "C,,30,r6\n"
+                                         "B,C,inf,r7\n"
+                                         "B,C,50,r8\n")
+    loader = NetworkLoader()
+    network = loader.load("city", roads)
+    assert sorted(road.getID() for road in network.getRoads()) == ["r1", "r8"]
+    errors = reasons(loader)
+    assert sorted(errors) == [3, 4, 5, 6, 7, 8, 9]
+    assert "bad length" in errors[3] and "bad length" in errors[4] and "bad length" in errors[9]
+    assert "two different intersections" in errors[5]
+    assert "already used" in errors[6]
+    assert "expected" in errors[7]
+    assert "missing to" in errors[8]
+    assert loader.getErrorCount() == 7
+    assert network.dijkstra(network.getIntersectionByID("A"))[0]["C"] == 150
+
+
+def test_bad_edge_list_rows_are_rejected(tmp_path):
+    roads = write(tmp_path, "roads.txt", "# from to length\n"
+                                         "A B 100\n"
+                                         "A\n"
+                                         "A B 1 x y Normal extra\n"
+                                         "B C 2.5\n")
+    loader = NetworkLoader()
+    network = loader.load("city", roads)
+    assert len(network.getRoads()) == 2
+    assert sorted(reasons(loader)) == [3, 4]
+
+
+def test_rows_that_break_declared_intersections_and_houses(tmp_path):
+    intersections = write(tmp_path, "intersections.csv", "id,x,y\n"
+                                                         "A,0,0\n"
+                                                         "B,1,north\n"
+                                                         "A,5,5\n"
+                                                         "C,2,0\n")
+    roads = write(tmp_path, "roads.csv", "from,to,length\n"
+                                         "A,C,10\n"
+                                         "A,B,10\n")
+    houses = write(tmp_path, "houses.csv", "id,intersection\n"
+                                           "h1,A\n"
+                                           "h1,C\n"
+                                           "h2,Z\n")
+    loader = NetworkLoader()
+    network = loader.load("city", roads, houses, intersections)
+    files = {}
+    for path, line, reason in loader.getErrors():
+        files.setdefault(path, []).append(line)
+    # B has bad coordinates and A is listed twice, so the road to B goes to an unknown intersection
+    assert files == {intersections: [3, 4], roads: [3], houses: [3, 4]}
+    assert sorted(node.getID() for node in network.getIntersections()) == ["A", "C"]
+    assert network.getIntersectionByID("C").getCoordinates() == (2.0, 0.0)
+    assert [house.getID() for house in network.getHouses()] == ["h1"]
+
+
+def test_too_many_roads_at_an_intersection(tmp_path):
+    roads = write(tmp_path, "roads.csv", "from,to,length\n" + "".join(f"hub,n{i},10\n" for i in range(4)))
+    loader = NetworkLoader(maxRoads=3)
+    network = loader.load("city", roads)
+    assert len(network.getRoads()) == 3
+    assert "more than 3 roads" in reasons(loader)[5]
+
+
+def test_missing_columns_and_error_limit(tmp_path):
+    with pytest.raises(ValueError):
+        NetworkLoader().load("city", write(tmp_path, "roads.csv", "from,length\nA,10\n"))
+    roads = write(tmp_path, "many.csv", "from,to,length\nA,B,1\n" + "A,A,1\n" * 20)
+    loader = NetworkLoader(maxErrors=5)
+    loader.load("city", roads)
+    assert len(loader.getErrors()) == 5 and loader.getErrorCount() == 20
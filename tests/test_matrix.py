@@ -0,0 +1,92 @@
+# DistanceMatrix files: building, loading and builds that don't finish
+import os
+import stat
+
+import pytest
+
+from traffic import DistanceMatrix, GraphSnapshot, syntheticCity
+
+
+@pytest.fixture
+def network():
+    return syntheticCity("grid", 100, seed=1)
+
+
+def stopsOf(network):
+    snapshot = network.snapshot()
+    return [snapshot.getIDs()[node] for node in range(len(snapshot)) if snapshot.getHouses()[node] > 0]
+
+
+def test_matrix_matches_dijkstra_and_loads_again(network, tmp_path):
+    path = str(tmp_path / "houses.trdm")
+    stops = stopsOf(network)
+    matrix = network.distanceMatrix(path, processes=1)
+    for stop in stops:
+        distances = network.dijkstra(network.getIntersectionByID(stop))[0]
+        assert list(matrix.row(stop)) == [distances[other] for other in stops]
+    loaded = DistanceMatrix.load(path, DistanceMatrix.fingerprint(network.snapshot(), stops))
+    assert loaded != None
+    assert list(loaded.getTable()) == list(matrix.getTable())
+    assert os.listdir(tmp_path) == ["houses.trdm"]
+
+
+def test_interrupted_build_leaves_no_matrix(network, tmp_path, monkeypatch):
+    path = str(tmp_path / "houses.trdm")
+    rows = []
+    distancesTo = GraphSnapshot.distancesTo
+
+    def interrupted(snapshot, source, targets):
+        rows.append(source)
+        if len(rows) > 2:
+            raise KeyboardInterrupt
+        return distancesTo(snapshot, source, targets)
+
+    monkeypatch.setattr(GraphSnapshot, "distancesTo", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        network.distanceMatrix(path, processes=1)
+    assert os.listdir(tmp_path) == []
+    assert DistanceMatrix.load(path) == None
+
+
+def test_interrupted_rebuild_keeps_the_old_matrix(network, tmp_path, monkeypatch):
+    path = str(tmp_path / "houses.trdm")
+    before = list(network.distanceMatrix(path, processes=1).getTable())
+
+    def interrupted(snapshot, source, targets):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(GraphSnapshot, "distancesTo", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        DistanceMatrix.build(network.snapshot(), stopsOf(network), path, processes=1)
+    assert os.listdir(tmp_path) == ["houses.trdm"]
+    assert list(DistanceMatrix.load(path).getTable()) == before
+
+
+def test_broken_files_are_rejected(network, tmp_path):
+    path = str(tmp_path / "houses.trdm")
+    network.distanceMatrix(path, processes=1).close()
+    size = os.path.getsize(path)
+    # A matrix made for another network
+    assert DistanceMatrix.load(path, bytes(16)) == None
+    # A cut off file
+    os.truncate(path, size // 2)
+    assert DistanceMatrix.load(path) == None
+    # A table without its header, like a build that never got to the end used to leave
+    network.distanceMatrix(path, processes=1).close()
+    with open(path, "r+b") as file:
+        file.write(bytes(DistanceMatrix.HEADER.size))
+    assert DistanceMatrix.load(path) == None
+    assert DistanceMatrix.load(str(tmp_path / "missing.trdm")) == None
+
+
+def test_read_only_matrix_loads(network, tmp_path):
+    path = str(tmp_path / "houses.trdm")
+    table = list(network.distanceMatrix(path, processes=1).getTable())
+    os.chmod(path, stat.S_IRUSR)
+    try:
+        loaded = DistanceMatrix.load(path)
+        assert loaded != None and list(loaded.getTable()) == table
+        # The file is mapped for reading only
+        assert loaded.getTable().readonly
+    finally:
+        os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)
@@ -0,0 +1,54 @@
+# The slotted model classes and the configurable number of roads
+import pytest
+
+from traffic import House, Intersection, Road
+
+
+def roads(count):
+    return [Road(f"r{i}", f"Road {i}", 100 + i, "Normal") for i in range(count)]
+
+
+def test_objects_have_no_instance_dictionary():
+    first, second = roads(2)
+    intersection = Intersection("A", first, second)
+    for item in (first, intersection, House("H", intersection)):
+        assert not hasattr(item, "__dict__")
+        with pytest.raises(AttributeError):
+            item.extra = 1
+
+
+def test_road_limit_is_configurable():
+    first, second, third, fourth, fifth, sixth = roads(6)
+    intersection = Intersection("A", first, second)
+    assert intersection.getMaxRoads() == Intersection.MAX_ROADS == 4
+    for road in (third, fourth):
+        assert intersection.addRoad(road) == "Road added successfully"
+    assert intersection.addRoad(fifth) == "Road can't be added to the intersection, max number of roads reached."
+    assert intersection.getRoads() == (first, second, third, fourth)
+
+    # A roundabout can take as many roads as it is given room for
+    roundabout = Intersection("B", first, second, maxRoads=float('inf'))
+    for road in (third, fourth, fifth, sixth):
+        assert roundabout.addRoad(road) == "Road added successfully"
+    assert len(roundabout.getRoads()) == 6
+    # Every road has two ends, a road with both taken can't join a third intersection
+    assert third.getIntersections() == (intersection, roundabout)
+    assert Intersection("C", third, sixth).getRoads() == (sixth,)
+
+
+def test_roads_and_houses_come_and_go():
+    first, second = roads(2)
+    intersection = Intersection("A", first, second)
+    other = Intersection("B", first, second)
+    assert first.getIntersections() == (intersection, other)
+    intersection.removeRoad(first)
+    assert intersection.getRoads() == (second,)
+    assert first.getIntersections() == (None, other)
+
+    # Intersections without houses share one empty set, a house gets it its own
+    assert intersection.getHouses() is other.getHouses()
+    house = House("H", intersection)
+    assert house.getLocation() is intersection and intersection.getHouses() == {house}
+    assert other.getHouses() == set()
+    intersection.removeHouse(house)
+    assert house.getLocation() == None and intersection.getHouses() == set()
@@ -0,0 +1,52 @@
+# Building a network from one intersection and looking things up by ID
+import pytest
+
+from traffic import House, Intersection, Road, TrafficNetwork
+from traffic.generators import cityParts
+
+
+def test_network_finds_everything_from_one_intersection():
+    name, intersections = cityParts("grid", 400, seed=3)
+    network = TrafficNetwork(name, intersections[-1])
+    assert set(network.getIntersections()) == set(intersections)
+    roads = {road for node in intersections for road in node.getRoads() if road != None}
+    assert set(network.getRoads()) == roads
+    houses = {house for node in intersections for house in node.getHouses()}
+    assert set(network.getHouses()) == houses
+    for node in intersections:
+        assert network.getIntersectionByID(node.getID()) is node
+    for road in roads:
+        assert network.getRoadByID(road.getID()) is road
+    for house in houses:
+        assert network.getHouseByID(house.getID()) is house
+    assert network.getIntersectionByID("missing") == None
+
+
+def test_ids_must_be_unique():
+    name, intersections = cityParts("grid", 16, seed=3)
+    network = TrafficNetwork(name, intersections[0])
+    # Another intersection with a taken ID
+    road = Road("new road", "New Road", 100, "Normal")
+    with pytest.raises(ValueError):
+        network.addIntersection(Intersection.fromRoads("05", [road]))
+    assert network.getRoadByID("new road") == None
+    # An ID change to a taken ID is refused and undone
+    with pytest.raises(ValueError):
+        intersections[1].setID("00")
+    assert intersections[1].getID() == "01" and network.getIntersectionByID("01") is intersections[1]
+    with pytest.raises(ValueError):
+        network.addHouse(House(next(iter(network.getHouses())).getID(), intersections[2]))
+
+    # A free ID moves the intersection in the index
+    intersections[1].setID("renamed")
+    assert network.getIntersectionByID("renamed") is intersections[1]
+    assert network.getIntersectionByID("01") == None
+
+
+def test_removed_items_leave_the_index():
+    name, intersections = cityParts("grid", 16, seed=3)
+    network = TrafficNetwork(name, intersections[0])
+    corner = network.getIntersectionByID("15")
+    network.removeIntersection(corner)
+    assert network.getIntersectionByID("15") == None
+    assert corner not in network.getIntersections()
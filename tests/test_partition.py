@@ -0,0 +1,89 @@
+# Components and districts: every intersection in one district, distances like dijkstra
+import random
+
+import pytest
+
+from traffic import Intersection, Road, connectedComponents, syntheticCity
+
+
+def cityWithIsland():
+    network = syntheticCity("grid", 400, seed=6, houseChance=0.2)
+    # Two intersections joined only to each other
+    island = Road("island", "Island Road", 100, "Normal")
+    for ID, point in (("x1", (-500, 0)), ("x2", (-600, 0))):
+        intersection = Intersection.fromRoads(ID, [island], coordinates=point)
+        island.attachIntersection(intersection)
+        network.addIntersection(intersection)
+    return network
+
+
+def test_components():
+    network = cityWithIsland()
+    snapshot = network.snapshot()
+    labels, count = connectedComponents(snapshot)
+    assert count == 2
+    assert labels[snapshot.indexOf("x1")] == labels[snapshot.indexOf("x2")] != labels[snapshot.indexOf("000")]
+    assert [len(members) for members in network.components()] == [400, 2]
+    assert {node.getID() for node in network.component(network.getIntersectionByID("x2"))} == {"x1", "x2"}
+    partition = network.partition(districtSize=50)
+    assert partition.getComponentCount() == 2
+    assert sorted(partition.components()[1]) == ["x1", "x2"]
+    assert partition.componentOf("x1") == partition.componentOf("x2") != partition.componentOf("000")
+
+
+def test_districts_cover_the_network():
+    network = cityWithIsland()
+    snapshot = network.snapshot()
+    partition = network.partition(districtSize=50)
+    districts = partition.getDistricts()
+    # 400 intersections in districts of about 50, and the island on its own
+    assert len(districts) == 9
+    components = partition.getComponentLabels()
+    labels = partition.getLabels()
+    seen = []
+    for district in districts:
+        nodes = district.getNodes()
+        assert 0 < len(district) <= 50
+        assert {components[node] for node in nodes} == {district.getComponent()}
+        assert all(labels[node] == district.getNumber() for node in nodes)
+        seen.extend(nodes)
+        # The boundary is exactly the intersections with a road to another district
+        offsets, targets = snapshot.getOffsets(), snapshot.getTargets()
+        boundary = [node for node in nodes
+                    if any(labels[targets[edge]] != district.getNumber()
+                           for edge in range(offsets[node], offsets[node + 1]))]
+        assert district.getBoundary() == boundary
+        assert district.getBoundaryIDs() == [snapshot.getIDs()[node] for node in boundary]
+    assert sorted(seen) == list(range(len(snapshot)))
+    assert partition.districtOf("x1").getIntersectionIDs() == ["x1", "x2"]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_distances_match_dijkstra(processes):
+    network = cityWithIsland()
+    partition = network.partition(districtSize=50)
+    generator = random.Random(2)
+    ids = [ID for ID in network.snapshot().getIDs() if not ID.startswith("x")]
+    pairs = [(source, generator.sample(ids, 8)) for source in generator.sample(ids, 4)]
+    expected = {source: network.dijkstra(network.getIntersectionByID(source))[0] for source, targets in pairs}
+    for preprocessed in (False, True):
+        if preprocessed:
+            assert partition.preprocess(processes) is partition
+        assert partition.isPreprocessed() == preprocessed
+        for source, targets in pairs:
+            for target in targets + [source]:
+                assert partition.distance(source, target) == pytest.approx(expected[source][target])
+        assert partition.distance("000", "x1") == float('inf')
+        assert partition.distance("x2", "x1") == 100
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_plan_distribution_orders_every_district(processes):
+    network = cityWithIsland()
+    partition = network.partition(districtSize=50)
+    depot = partition.districtOf("000").getNumber()
+    plans = partition.planDistribution({depot: "000"}, processes=processes)
+    assert sorted(plans) == [district.getNumber() for district in partition.getDistricts()]
+    for district in partition.getDistricts():
+        assert sorted(plans[district.getNumber()]) == sorted(district.getIntersectionIDs())
+    assert plans[depot][0] == "000"
@@ -0,0 +1,49 @@
+# The package queue: first come first served, cancelled packages skipped
+import pytest
+
+from traffic.queue import Queue
+
+
+def test_packages_come_out_in_order():
+    queue = Queue()
+    for house in ("A", "B", "C"):
+        queue.pushPackage(house)
+    assert len(queue) == 3
+    assert queue.peekPackage() == "A"
+    assert [queue.processPackage() for unused in range(3)] == ["A", "B", "C"]
+    assert len(queue) == 0
+
+
+def test_cancelling_takes_out_the_first_one_pushed():
+    queue = Queue()
+    for house in ("A", "B", "A", "C"):
+        queue.pushPackage(house)
+    assert queue.cancelPackage("A")
+    assert queue.getPackages() == ["B", "A", "C"]
+    assert queue.cancelPackage("A")
+    assert not queue.cancelPackage("A")
+    assert not queue.cancelPackage("D")
+    assert len(queue) == 2
+    assert queue.processPackage() == "B"
+    queue.pushPackage("A")
+    assert queue.getPackages() == ["C", "A"]
+    assert [queue.processPackage(), queue.processPackage()] == ["C", "A"]
+
+
+def test_queue_attribute_is_read_only():
+    queue = Queue()
+    queue.pushPackage("A")
+    assert queue.queue == ("A",)
+    with pytest.raises(AttributeError):
+        queue.queue.append("B")
+    assert len(queue) == 1
+
+
+def test_empty_queue_says_so(capsys):
+    queue = Queue()
+    queue.pushPackage("A")
+    queue.cancelPackage("A")
+    assert queue.peekPackage() is None
+    assert capsys.readouterr().out == ""
+    assert queue.processPackage() is None
+    assert capsys.readouterr().out == "No packages in the queue.\n"
@@ -0,0 +1,57 @@
+# Drawing networks to files and keeping the layout between drawings
+import sys
+
+import pytest
+
+from traffic import Intersection, Road, syntheticCity
+
+pytest.importorskip("matplotlib")
+
+
+def test_small_network_is_drawn_without_a_display(tmp_path):
+    network = syntheticCity("grid", 25, seed=3)
+    for name in ("city.png", "city.svg"):
+        path = str(tmp_path / name)
+        assert network.render(path) == path
+        with open(path, "rb") as file:
+            assert len(file.read()) > 1000
+    assert "matplotlib.pyplot" not in sys.modules
+
+
+def test_layout_only_places_new_intersections(tmp_path):
+    network = syntheticCity("grid", 25, seed=3)
+    renderer = network.renderer()
+    before = dict(renderer.layout())
+    assert set(before) == {node.getID() for node in network.getIntersections()}
+
+    # A new corner joined to one intersection, the others stay where they were
+    road = Road("new road", "New Road", 300, "Normal")
+    corner = Intersection.fromRoads("new", [road])
+    road.attachIntersection(corner)
+    network.getIntersectionByID("00").addRoad(road)
+    network.addIntersection(corner)
+    after = renderer.layout()
+    assert "new" in after
+    assert {ID: after[ID] for ID in before} == before
+
+    path = str(tmp_path / "layout.json")
+    renderer.saveLayout(path)
+    other = syntheticCity("grid", 25, seed=3).renderer()
+    other.loadLayout(path)
+    assert {ID: tuple(point) for ID, point in other.layout().items()} == \
+           {ID: tuple(point) for ID, point in after.items() if ID != "new"}
+
+
+def test_big_network_is_drawn_as_districts(tmp_path):
+    network = syntheticCity("geometric", 3000, seed=3)
+    renderer = network.renderer()
+    positions = renderer.layout()
+    assert len(positions) == len(network.getIntersections())
+    path = str(tmp_path / "big.png")
+    renderer.render(path, maxNodes=500, cells=20)
+    with open(path, "rb") as file:
+        assert len(file.read()) > 1000
+    # Zoomed in on a corner there are few enough intersections to draw one by one
+    xs = sorted(x for x, y in positions.values())
+    ys = sorted(y for x, y in positions.values())
+    renderer.render(path, viewport=(xs[0], ys[0], xs[len(xs) // 10], ys[len(ys) // 10]), maxNodes=500)
@@ -0,0 +1,60 @@
+# Point-to-point routes: every mode finds a route as short as dijkstra's
+import random
+
+import pytest
+
+from traffic import Intersection, Road, syntheticCity
+from traffic.generators import CITY_KINDS
+
+
+def checkRoute(route, source, target, length):
+    ids = route.getIntersectionIDs()
+    assert ids[0] == source and ids[-1] == target
+    assert route.getLength() == pytest.approx(length)
+    # The roads join the intersections one after another and add up to the length
+    assert len(route.getRoads()) == len(ids) - 1
+    for road, a, b in zip(route.getRoads(), route.getIntersections(), route.getIntersections()[1:]):
+        assert set(road.getIntersections()) == {a, b}
+    assert sum(road.getLength() for road in route.getRoads()) == pytest.approx(length)
+
+
+@pytest.mark.parametrize("kind", CITY_KINDS)
+def test_every_mode_matches_dijkstra(kind):
+    network = syntheticCity(kind, 300, seed=3)
+    snapshot = network.snapshot()
+    landmarks = snapshot.landmarks()
+    coordinates = {node.getID(): node.getCoordinates() for node in network.getIntersections()}
+    ids = snapshot.getIDs()
+    generator = random.Random(1)
+    for source in generator.sample(ids, 6):
+        distances = network.dijkstra(network.getIntersectionByID(source))[0]
+        for target in generator.sample(ids, 10) + [source]:
+            for options in ({"method": "dijkstra"}, {"method": "bidirectional"},
+                            {"method": "astar", "landmarks": landmarks},
+                            {"method": "astar", "coordinates": coordinates}):
+                checkRoute(network.route(source, target, **options), source, target, distances[target])
+
+
+def test_unreachable_targets_have_no_route():
+    network = syntheticCity("grid", 16, seed=0)
+    # Two intersections joined only to each other
+    island = Road("island", "Island Road", 100, "Normal")
+    for ID, point in (("x1", (-500, 0)), ("x2", (-600, 0))):
+        intersection = Intersection.fromRoads(ID, [island], coordinates=point)
+        island.attachIntersection(intersection)
+        network.addIntersection(intersection)
+    snapshot = network.snapshot()
+    coordinates = {node.getID(): node.getCoordinates() for node in network.getIntersections()}
+    for options in ({"method": "dijkstra"}, {"method": "bidirectional"},
+                    {"method": "astar", "landmarks": snapshot.landmarks()},
+                    {"method": "astar", "coordinates": coordinates}):
+        assert network.route("00", "x1", **options) == None
+        checkRoute(network.route("x2", "x1", **options), "x2", "x1", 100)
+
+
+def test_unknown_modes_are_refused():
+    network = syntheticCity("grid", 16, seed=0)
+    with pytest.raises(ValueError):
+        network.route("00", "15", "astar")
+    with pytest.raises(ValueError):
+        network.route("00", "15", "teleport")
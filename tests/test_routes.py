@@ -0,0 +1,75 @@
+# k shortest loopless routes against every simple route of a small city
+import pytest
+
+from traffic import gridNetwork, syntheticCity
+
+
+# Every loopless route from source to target as (length, nodes, edges)
+def allRoutes(snapshot, source, target):
+    offsets, targets, weights = snapshot.getOffsets(), snapshot.getTargets(), snapshot.getWeights()
+    routes = []
+
+    def walk(node, nodes, edges, length):
+        if node == target:
+            routes.append((length, list(nodes), list(edges)))
+            return
+        for edge in range(offsets[node], offsets[node + 1]):
+            nextNode = targets[edge]
+            if nextNode not in nodes:
+                nodes.append(nextNode)
+                edges.append(edge)
+                walk(nextNode, nodes, edges, length + weights[edge])
+                nodes.pop()
+                edges.pop()
+
+    walk(source, [source], [], 0)
+    return sorted(routes, key=lambda route: route[0])
+
+
+def checkRoutes(snapshot, source, target, k):
+    found = snapshot.kShortestRoutes(source, target, k)
+    expected = allRoutes(snapshot, source, target)
+    assert len(found) == min(k, len(expected))
+    weights, targets = snapshot.getWeights(), snapshot.getTargets()
+    for length, nodes, edges in found:
+        # Loopless, connected, from source to target, with the right length
+        assert len(set(nodes)) == len(nodes)
+        assert nodes[0] == source and nodes[-1] == target
+        assert len(edges) == len(nodes) - 1
+        for edge, a, b in zip(edges, nodes, nodes[1:]):
+            assert snapshot.edgeSource(edge) == a and targets[edge] == b
+        assert length == pytest.approx(sum(weights[edge] for edge in edges))
+    assert len({tuple(edges) for length, nodes, edges in found}) == len(found)
+    lengths = [length for length, nodes, edges in found]
+    assert lengths == sorted(lengths)
+    assert lengths == pytest.approx([length for length, nodes, edges in expected[:k]])
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_grid_routes_match_brute_force(seed):
+    snapshot = gridNetwork(3, 4, seed).snapshot()
+    for source, target in ((0, 11), (0, 5), (3, 8), (6, 6)):
+        checkRoutes(snapshot, source, target, 12)
+
+
+@pytest.mark.parametrize("kind", ["geometric", "radial"])
+def test_city_routes_match_brute_force(kind):
+    snapshot = syntheticCity(kind, 13, seed=4).snapshot()
+    for source, target in ((0, len(snapshot) - 1), (1, len(snapshot) // 2)):
+        checkRoutes(snapshot, source, target, 8)
+
+
+def test_more_routes_than_there_are():
+    snapshot = gridNetwork(2, 2, 0).snapshot()
+    # Around a square there are two routes between opposite corners
+    assert len(snapshot.kShortestRoutes(0, 3, 10)) == 2
+
+
+def test_alternative_routes_of_the_network():
+    network = gridNetwork(4, 4, 1)
+    routes = network.alternativeRoutes("00", "15", k=4)
+    assert len(routes) == 4
+    assert routes[0].getLength() == network.dijkstra(network.getIntersectionByID("00"))[0]["15"]
+    assert [route.getLength() for route in routes] == sorted(route.getLength() for route in routes)
+    for route in routes:
+        assert route.getIntersectionIDs()[0] == "00" and route.getIntersectionIDs()[-1] == "15"
@@ -0,0 +1,78 @@
+# The routing service over HTTP: answers, shared searches and a worker that dies
+import asyncio
+import json
+import os
+import signal
+
+import pytest
+
+from traffic import RoutingService, syntheticCity
+
+
+async def get(port, target):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, unused, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def serve(network, test, **options):
+    async def main():
+        service = RoutingService(network, port=0, processes=2, **options)
+        port = await service.start()
+        try:
+            return await test(service, port)
+        finally:
+            await service.close()
+    return asyncio.run(main())
+
+
+@pytest.fixture(scope="module")
+def network():
+    return syntheticCity("grid", 100, seed=5, houseChance=0.3)
+
+
+def test_answers_match_the_network(network):
+    async def test(service, port):
+        distances, previous, houses = network.dijkstra(network.getIntersectionByID("000"))
+        status, body = await get(port, "/dijkstra?source=000")
+        assert status == 200
+        assert body["distances"] == distances and body["previous"] == previous and body["houses"] == houses
+        status, body = await get(port, "/distribution?source=000")
+        assert body["order"] == network.packageDistribution(distances, houses)
+        for target in ("099", "055", "000"):
+            status, body = await get(port, f"/route?source=000&target={target}")
+            assert body["length"] == distances[target]
+            assert body["intersections"][0] == "000" and body["intersections"][-1] == target
+        assert (await get(port, "/route?source=000"))[0] == 400
+        assert (await get(port, "/route?source=000&target=nowhere"))[0] == 404
+        assert (await get(port, "/elsewhere"))[0] == 404
+    serve(network, test)
+
+
+def test_every_kind_shares_one_search_per_source(network):
+    async def test(service, port):
+        targets = ["/route?source=010&target=099", "/dijkstra?source=010", "/distribution?source=010"] * 5
+        answers = await asyncio.gather(*(get(port, target) for target in targets))
+        assert all(status == 200 for status, body in answers)
+        assert service.getSearches() == 1
+        status, stats = await get(port, "/stats")
+        assert stats["searches"] == 1 and stats["coalesced"] >= 2
+    serve(network, test)
+
+
+def test_a_dead_worker_is_replaced(network):
+    async def test(service, port):
+        assert (await get(port, "/dijkstra?source=000"))[0] == 200
+        # A worker that is killed breaks its pool for good
+        pool = service._RoutingService__pool
+        for process in list(pool._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+        status, body = await get(port, "/route?source=000&target=099")
+        assert status == 200 and body["intersections"][-1] == "099"
+        assert service._RoutingService__pool is not pool
+        assert (await get(port, "/dijkstra?source=005"))[0] == 200
+    serve(network, test)
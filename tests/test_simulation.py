@@ -0,0 +1,79 @@
+# The traffic simulation: every vehicle gets where it is going, crowded roads get busy statuses
+import pytest
+
+from traffic import Intersection, Road, syntheticCity
+
+np = pytest.importorskip("numpy")
+
+
+def test_every_vehicle_arrives():
+    network = syntheticCity("grid", 100, seed=2)
+    simulation = network.trafficSimulation(step=30)
+    simulation.addTrips(["000", "099", "009"], ["099", "000", "090"], [0, 60, 600], vehicles=[5, 3, 2])
+    assert simulation.getPending() == 3
+    simulation.run(3 * 3600)
+    assert simulation.getPending() == 0
+    assert simulation.getActive() == 0
+    assert simulation.getArrived() == 10
+    assert simulation.getArrivedTrips() == 3
+    assert simulation.getUnroutable() == 0
+    # A trip can't be faster than its shortest route at the free speed of the fastest road
+    fastest = network.trafficModel().getSpeeds().max()
+    shortest = network.dijkstra(network.getIntersectionByID("000"))[0]["099"]
+    assert simulation.getAverageTravelTime() >= shortest / fastest
+
+
+def test_gridlock_doesnt_stop_the_city():
+    # Roads with room for only a couple of vehicles, and many trips all at once
+    def simulate(gridlockTime):
+        network = syntheticCity("grid", 100, seed=2)
+        simulation = network.trafficSimulation(step=30, jamDensity=0.002, laneCapacity=300, gridlockTime=gridlockTime)
+        simulation.addRandomDemand(400, zones=10, seed=1, peaks=((0, 60),))
+        trips = simulation.getPending()
+        simulation.run(86400)
+        return simulation, trips
+
+    simulation, trips = simulate(120)
+    assert simulation.getPending() == 0
+    assert simulation.getActive() == 0
+    # Trips that start where they end go nowhere
+    assert 0 < simulation.getArrivedTrips() <= trips
+    assert simulation.getUnroutable() == 0
+    # Groups that never give up waiting stay stuck in rings of full roads
+    stuck, trips = simulate(float('inf'))
+    assert stuck.getActive() > 0
+    assert stuck.getArrivedTrips() < simulation.getArrivedTrips()
+
+
+def test_crowded_roads_get_busy_statuses():
+    network = syntheticCity("grid", 100, seed=2)
+    closed = network.getRoadByID("0-1")
+    closed.setTraffic("Closed")
+    events = []
+    network.addListener(lambda item, change, *details: events.append(change))
+    simulation = network.trafficSimulation(step=30, statusInterval=600)
+    simulation.addTrips(["000"] * 20 + ["090"] * 20, ["099"] * 20 + ["009"] * 20, 0, vehicles=40)
+    simulation.run(1800)
+    assert simulation.getStatusWrites() > 0
+    assert events.count("batch") == simulation.getStatusWrites()
+    statuses = {road.getTraffic() for road in network.getRoads()}
+    assert statuses & {"Moderate", "Heavy", "Congested"}
+    assert closed.getTraffic() == "Closed"
+    assert simulation.getDensities().max() > 0
+
+
+def test_unroutable_trips_and_layout_changes():
+    network = syntheticCity("grid", 16, seed=2)
+    island = Road("island", "Island Road", 100, "Normal")
+    for ID in ("x1", "x2"):
+        intersection = Intersection.fromRoads(ID, [island])
+        island.attachIntersection(intersection)
+        network.addIntersection(intersection)
+    simulation = network.trafficSimulation()
+    simulation.addTrips(["00", "x1"], ["x1", "x2"], 0)
+    simulation.run(600)
+    assert simulation.getUnroutable() == 1
+    assert simulation.getArrivedTrips() == 1
+    network.removeIntersection(network.getIntersectionByID("x1"))
+    with pytest.raises(ValueError):
+        simulation.step()
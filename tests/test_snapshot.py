@@ -0,0 +1,45 @@
+# GraphSnapshot against the object graph of TrafficNetwork
+import pytest
+
+from traffic import GraphSnapshot, syntheticCity
+
+
+@pytest.mark.parametrize("kind", ["grid", "radial", "geometric"])
+def test_shortest_distances_match_dijkstra(kind):
+    network = syntheticCity(kind, 300, seed=3)
+    snapshot = network.snapshot()
+    for current in sorted(network.getIntersections(), key=lambda node: node.getID())[::37]:
+        expected, unused, expectedHouses = network.dijkstra(current)
+        distances, unused, houses = snapshot.dijkstra(current)
+        assert distances == expected
+        assert houses == expectedHouses
+
+
+def test_shortest_distances_match_dijkstra_after_removals():
+    # Removing intersections leaves pieces that can't be reached (inf in both)
+    network = syntheticCity("grid", 100, seed=1)
+    intersections = sorted(network.getIntersections(), key=lambda node: node.getID())
+    for intersection in intersections[10:20]:
+        network.removeIntersection(intersection)
+    snapshot = network.snapshot()
+    current = intersections[0]
+    expected = network.dijkstra(current)[0]
+    assert snapshot.dijkstra(current)[0] == expected
+    assert float('inf') in expected.values()
+
+
+def test_snapshot_follows_the_network():
+    network = syntheticCity("grid", 100, seed=1)
+    first = network.snapshot()
+    assert network.snapshot() is first
+    road = next(iter(network.getRoads()))
+    road.setLength(road.getLength() + 1000)
+    second = network.snapshot()
+    assert second is not first
+    assert second.fingerprint() != first.fingerprint()
+
+
+def test_from_intersections_matches_network_snapshot():
+    network = syntheticCity("radial", 200, seed=2)
+    rebuilt = GraphSnapshot.fromIntersections(network.getIntersections())
+    assert rebuilt.fingerprint() == network.snapshot().fingerprint()
@@ -0,0 +1,70 @@
+# SpatialIndex against checking every intersection
+import math
+import random
+
+import pytest
+
+from traffic import SpatialIndex, syntheticCity
+
+
+def bruteNearest(network, x, y, k):
+    found = sorted((math.hypot(node.getCoordinates()[0] - x, node.getCoordinates()[1] - y), node.getID())
+                   for node in network.getIntersections() if node.getCoordinates() != None)
+    return found[:k]
+
+
+def randomPoints(network, count, seed):
+    xs = [node.getCoordinates()[0] for node in network.getIntersections()]
+    ys = [node.getCoordinates()[1] for node in network.getIntersections()]
+    generator = random.Random(seed)
+    # Some points are well outside the city
+    margin = max(max(xs) - min(xs), max(ys) - min(ys))
+    return [(generator.uniform(min(xs) - margin, max(xs) + margin), generator.uniform(min(ys) - margin, max(ys) + margin))
+            for i in range(count)]
+
+
+@pytest.mark.parametrize("kind", ["grid", "radial", "geometric"])
+def test_nearest_matches_brute_force(kind):
+    network = syntheticCity(kind, 400, seed=7)
+    for x, y in randomPoints(network, 100, 1):
+        found = network.spatialIndex().nearest(x, y, k=3)
+        expected = bruteNearest(network, x, y, 3)
+        assert [distance for node, distance in found] == pytest.approx([distance for distance, ID in expected])
+
+
+@pytest.mark.parametrize("kind", ["grid", "geometric"])
+def test_snap_matches_nearest(kind):
+    pytest.importorskip("numpy")
+    network = syntheticCity(kind, 400, seed=8)
+    points = randomPoints(network, 300, 2)
+    snapped, distances = network.snapPoints(points)
+    for (x, y), node, distance in zip(points, snapped, distances.tolist()):
+        expected = bruteNearest(network, x, y, 1)[0][0]
+        assert distance == pytest.approx(expected)
+        assert math.hypot(node.getCoordinates()[0] - x, node.getCoordinates()[1] - y) == pytest.approx(expected)
+
+
+def test_index_follows_moved_and_removed_intersections():
+    network = syntheticCity("grid", 100, seed=9)
+    index = network.spatialIndex()
+    intersections = sorted(network.getIntersections(), key=lambda node: node.getID())
+    moved, removed = intersections[0], intersections[1]
+    moved.setCoordinates((100000.0, 100000.0))
+    network.removeIntersection(removed)
+    assert len(index) == 99
+    assert index.nearest(100001.0, 100000.0)[0][0] is moved
+    x, y = removed.getCoordinates()
+    assert index.nearest(x, y)[0][0] is not removed
+    assert removed not in index.within(x - 1, y - 1, x + 1, y + 1)
+    for px, py in randomPoints(network, 50, 3):
+        assert index.nearest(px, py)[0][1] == pytest.approx(bruteNearest(network, px, py, 1)[0][0])
+
+
+def test_within_matches_brute_force():
+    network = syntheticCity("geometric", 300, seed=10)
+    index = SpatialIndex(network.getIntersections())
+    for minX, minY in randomPoints(network, 20, 4):
+        box = (minX, minY, minX + 2000, minY + 1500)
+        expected = {node for node in network.getIntersections()
+                    if box[0] <= node.getCoordinates()[0] <= box[2] and box[1] <= node.getCoordinates()[1] <= box[3]}
+        assert set(index.within(*box)) == expected
@@ -0,0 +1,48 @@
+# Search stats: the counters of dijkstra and packageDistribution and the exporters
+import json
+
+from traffic import JSONLinesExporter, syntheticCity
+
+
+def test_dijkstra_counters():
+    network = syntheticCity("grid", 100, seed=7)
+    recorder = network.enableStats()
+    depot = network.getIntersectionByID("000")
+    distances, previous, houses = network.dijkstra(depot)
+    stats = recorder.getLast()
+    intersections = network.getIntersections()
+    assert stats.getMethod() == "dijkstra" and stats.getSource() == "000"
+    assert stats.getSettled() == len(intersections)
+    # Every settled intersection looks at each of its roads once, and every road has two ends
+    assert stats.getRelaxations() == 2 * len(network.getRoads())
+    assert stats.getPops() == stats.getPushes() == stats.getImprovements() + 1
+    assert stats.getStalePops() == stats.getPushes() - stats.getSettled()
+    assert stats.getImprovements() >= len(intersections) - 1
+    assert list(stats.getPhases()) == ["setup", "search", "sort"] and not stats.isCacheHit()
+
+
+def test_cache_hits_and_totals(tmp_path):
+    network = syntheticCity("grid", 100, seed=7)
+    network.enableCache()
+    path = str(tmp_path / "stats.jsonl")
+    seen = []
+    recorder = network.enableStats(JSONLinesExporter(path), seen.append)
+    depot = network.getIntersectionByID("000")
+    for unused in range(3):
+        distances, previous, houses = network.dijkstra(depot)
+        order = network.packageDistribution(distances, houses)
+    totals = recorder.getTotals()
+    assert totals["dijkstra"]["calls"] == 3 and totals["dijkstra"]["cacheHits"] == 2
+    assert totals["packageDistribution"]["calls"] == 3 and totals["packageDistribution"]["cacheHits"] == 2
+    assert totals["packageDistribution"]["items"] == 3 * len(order)
+    assert totals["dijkstra"]["relaxations"] == 2 * len(network.getRoads())
+
+    with open(path) as file:
+        lines = [json.loads(line) for line in file]
+    assert [line["method"] for line in lines] == [stats.getMethod() for stats in seen] == \
+           ["dijkstra", "packageDistribution"] * 3
+    assert [line["cacheHit"] for line in lines] == [False, False, True, True, True, True]
+
+    network.disableStats()
+    network.dijkstra(network.getIntersectionByID("001"))
+    assert len(seen) == 6 and recorder.getLast() is seen[-1]
@@ -0,0 +1,61 @@
+# The binary network file: saving, opening and broken files
+import os
+
+import pytest
+
+from traffic import MappedNetwork, TrafficNetwork, syntheticCity
+import traffic.storage
+
+
+@pytest.fixture
+def network():
+    return syntheticCity("grid", 36, seed=2)
+
+
+def test_saved_network_routes_like_the_original(network, tmp_path):
+    path = str(tmp_path / "city.trnw")
+    network.save(path)
+    mapped = MappedNetwork.open(path)
+    try:
+        source = min(node.getID() for node in network.getIntersections())
+        assert mapped.dijkstra(source) == network.dijkstra(network.getIntersectionByID(source))
+        copy = mapped.toNetwork()
+        assert sorted((road.getID(), road.getLength(), road.getTraffic()) for road in copy.getRoads()) == \
+               sorted((road.getID(), road.getLength(), road.getTraffic()) for road in network.getRoads())
+        assert sorted(house.getID() for house in copy.getHouses()) == \
+               sorted(house.getID() for house in network.getHouses())
+    finally:
+        mapped.close()
+    assert os.listdir(tmp_path) == ["city.trnw"]
+
+
+def test_every_truncated_file_is_rejected(network, tmp_path):
+    path = str(tmp_path / "city.trnw")
+    network.save(path)
+    with open(path, "rb") as file:
+        data = file.read()
+    cut = str(tmp_path / "cut.trnw")
+    for size in range(0, len(data), 7):
+        with open(cut, "wb") as file:
+            file.write(data[:size])
+        assert MappedNetwork.open(cut) == None, size
+    assert MappedNetwork.open(str(tmp_path / "missing.trnw")) == None
+    assert TrafficNetwork.load(cut) == None
+
+
+def test_failed_save_keeps_the_old_file(network, tmp_path, monkeypatch):
+    path = str(tmp_path / "city.trnw")
+    network.save(path)
+    with open(path, "rb") as file:
+        before = file.read()
+    network.getIntersectionByID(min(node.getID() for node in network.getIntersections())).setID("renamed")
+
+    def crash(descriptor):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(traffic.storage.os, "fsync", crash)
+    with pytest.raises(OSError):
+        network.save(path)
+    assert os.listdir(tmp_path) == ["city.trnw"]
+    with open(path, "rb") as file:
+        assert file.read() == before
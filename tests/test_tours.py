@@ -0,0 +1,44 @@
+# Delivery tours: every stop once, the right length, and no longer than the sorted order
+import pytest
+
+from traffic import Intersection, Road, TourOptimizer, syntheticCity
+
+
+def tourLength(matrix, ids, returnToStart=True):
+    length = sum(matrix.distance(a, b) for a, b in zip(ids, ids[1:]))
+    if returnToStart:
+        length += matrix.distance(ids[-1], ids[0])
+    return length
+
+
+@pytest.mark.parametrize("kind", ["grid", "geometric"])
+def test_tour_visits_every_house_once(kind):
+    network = syntheticCity(kind, 300, seed=4, houseChance=0.2)
+    depot = network.getIntersectionByID(min(node.getID() for node in network.getIntersections()))
+    ids, length = network.deliveryTour(depot, timeBudget=0.5, processes=1)
+    stops = {node.getID() for node in network.getIntersections() if node.getHouses()} - {depot.getID()}
+    assert ids[0] == depot.getID()
+    assert sorted(ids[1:]) == sorted(stops)
+    matrix = network.distanceMatrix(intersections=ids, processes=1)
+    assert length == pytest.approx(tourLength(matrix, ids))
+
+    # The old way was to drive to the stops from the closest to the furthest
+    distances, previous, houses = network.dijkstra(depot)
+    order = [ID for ID in network.packageDistribution(distances, houses) if ID in stops]
+    assert length <= tourLength(matrix, [depot.getID()] + order)
+
+
+def test_open_tours_and_unreachable_stops():
+    network = syntheticCity("grid", 100, seed=4, houseChance=0.3)
+    # Two intersections joined only to each other can't be reached from the rest
+    island = Road("island", "Island Road", 100, "Normal")
+    for ID in ("x1", "x2"):
+        intersection = Intersection.fromRoads(ID, [island])
+        island.attachIntersection(intersection)
+        network.addIntersection(intersection)
+    ids = sorted(node.getID() for node in network.getIntersections())
+    matrix = network.distanceMatrix(intersections=ids, processes=1)
+    optimizer = TourOptimizer(matrix, "000", ids[1:20] + ["x1", "x2"], returnToStart=False)
+    tour, length = optimizer.optimize(0.2)
+    assert tour[0] == "000" and sorted(tour) == ids[:20]
+    assert length == pytest.approx(tourLength(matrix, tour, returnToStart=False))
@@ -0,0 +1,44 @@
+# A traffic network of intersections, roads and houses with fast routing and delivery planning
+# Importing the package has no side effects and doesn't load networkx, matplotlib or NumPy.
+# The classes that need NumPy (TrafficCostModel, TrafficSimulation, TourOptimizer, FleetPlanner and
+# NetworkRenderer) and the asyncio RoutingService are only imported the first time someone uses them.
+from .model import House, Intersection, Road
+from .network import TrafficNetwork
+from .snapshot import GraphSnapshot, Landmarks, Route
+from .cache import RouteCache
+from .matrix import DistanceMatrix
+from .dynamic import DynamicShortestPaths
+from .hierarchy import ContractionHierarchy
+from .generators import gridNetwork, radialNetwork, randomGeometricNetwork, syntheticCity
+from .loader import NetworkLoader
+from .tables import StringTable
+from .storage import MappedNetwork
+from .stats import SearchStats, StatsRecorder, JSONLinesExporter
+from .partition import District, NetworkPartition, connectedComponents
+from .journal import ChangeJournal
+from .spatial import SpatialIndex
+from .queue import Queue
+from .dispatch import DispatchSimulation
+
+# Where the classes that are loaded on first use live
+_lazy = {"TrafficCostModel": "costs", "TrafficSimulation": "simulation", "TourOptimizer": "tours",
+         "FleetPlanner": "tours", "NetworkRenderer": "rendering", "RoutingService": "service"}
+
+
+def __getattr__(name):
+    if name in _lazy:
+        import importlib
+        value = getattr(importlib.import_module(f".{_lazy[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["House", "Intersection", "Road", "TrafficNetwork", "GraphSnapshot", "Landmarks", "Route",
+           "RouteCache", "DistanceMatrix", "DynamicShortestPaths", "ContractionHierarchy", "gridNetwork",
+           "radialNetwork", "randomGeometricNetwork", "syntheticCity", "NetworkLoader", "StringTable",
+           "MappedNetwork",
+           "SearchStats", "StatsRecorder", "JSONLinesExporter", "District", "NetworkPartition",
+           "connectedComponents", "ChangeJournal", "SpatialIndex", "Queue", "DispatchSimulation",
+           "TrafficCostModel", "TrafficSimulation", "TourOptimizer", "FleetPlanner", "NetworkRenderer",
+           "RoutingService"]
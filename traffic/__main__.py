@@ -0,0 +1,5 @@
+# To run the demo of the traffic system: python -m traffic
+from traffic.demo import main
+
+if __name__ == "__main__":
+    main()
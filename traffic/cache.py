@@ -0,0 +1,94 @@
+# Caching of routing results between changes to the network
+import sys
+from collections import OrderedDict
+
+
+# A least recently used cache for routing results
+# The keys hold the network version, so results from before a change are never returned,
+# they just get pushed out. We keep an estimate of the memory used and drop the least recently
+# used results once we go over the budget.
+class RouteCache:
+    def __init__(self, maxBytes=64 * 1024 * 1024):
+        self.__maxBytes = maxBytes
+        self.__entries = OrderedDict()
+        self.__size = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        # This links the distances dictionary of a cached dijkstra result to its key,
+        # so packageDistribution can tell which source and version it was given
+        self.__sources = {}
+
+    # Getter functions
+    def getMaxBytes(self):
+        return self.__maxBytes
+    def getSize(self):
+        return self.__size
+    def getHits(self):
+        return self.__hits
+    def getMisses(self):
+        return self.__misses
+    def getEvictions(self):
+        return self.__evictions
+    def __len__(self):
+        return len(self.__entries)
+
+    # To look up a result, this returns None if it isn't cached
+    def get(self, key):
+        entry = self.__entries.get(key)
+        if entry == None:
+            self.__misses += 1
+            return None
+        self.__entries.move_to_end(key)
+        self.__hits += 1
+        return entry[0]
+
+    # To save a result
+    def put(self, key, result):
+        if key in self.__entries:
+            self.__remove(key)
+        size = RouteCache.estimateSize(result)
+        # Results bigger than the whole budget are not worth keeping
+        if size > self.__maxBytes:
+            return
+        self.__entries[key] = (result, size)
+        self.__size += size
+        if key[0] == "dijkstra":
+            self.__sources[id(result[0])] = (key, result[1], result[2])
+        while self.__size > self.__maxBytes:
+            self.__remove(next(iter(self.__entries)))
+            self.__evictions += 1
+
+    # The key for packageDistribution, if these dictionaries are a cached dijkstra result
+    def distributionKey(self, distances, houses_count):
+        source = self.__sources.get(id(distances))
+        if source == None or source[2] is not houses_count:
+            return None
+        key, previous, houses = source
+        return ("packageDistribution",) + key[1:]
+
+    # To empty the cache, the counters are kept
+    def clear(self):
+        self.__entries.clear()
+        self.__sources.clear()
+        self.__size = 0
+
+    def __remove(self, key):
+        result, size = self.__entries.pop(key)
+        self.__size -= size
+        if key[0] == "dijkstra":
+            del self.__sources[id(result[0])]
+
+    # A rough estimate of the memory used by a result (dictionaries, lists and their items)
+    @staticmethod
+    def estimateSize(result):
+        size = sys.getsizeof(result)
+        if isinstance(result, (tuple, list)):
+            for part in result:
+                size += sys.getsizeof(part)
+                if isinstance(part, dict):
+                    # Every item has a key and a value, the IDs are usually shared with the network
+                    size += 32 * len(part)
+                elif isinstance(part, list):
+                    size += 8 * len(part)
+        return size
@@ -0,0 +1,255 @@
+# Travel times from traffic statuses and time of day speed profiles
+import heapq
+
+import numpy as np
+
+from .model import Road
+
+
+# This turns the traffic status of every road and its time of day speed profile into travel times
+# Everything is kept in dense per-road NumPy arrays (in the order of the snapshot's roads), so a
+# congestion feed changing thousands of statuses is one vectorized update instead of a loop.
+# Travel time = length / (free speed * status factor * profile[time of day]), in seconds.
+class TrafficCostModel:
+    # How much of the free speed is left for each traffic status, a closed road has no speed left
+    # Statuses that aren't in here get a factor of 1 until setStatusFactor is called
+    STATUS_FACTORS = {"Normal": 1.0, "Light": 1.0, "Moderate": 0.75, "Heavy": 0.5, "Congested": 0.25, "Closed": 0.0}
+
+    # freeSpeed is in meters per second (50 km/h by default) and a day is split into
+    # buckets time slots for the speed profiles
+    def __init__(self, network, freeSpeed=50 / 3.6, buckets=24):
+        self.__network = network
+        self.__defaultSpeed = freeSpeed
+        self.__buckets = buckets
+        self.__statusNames = list(TrafficCostModel.STATUS_FACTORS)
+        self.__statusCodes = {name: code for code, name in enumerate(self.__statusNames)}
+        self.__factors = np.array([TrafficCostModel.STATUS_FACTORS[name] for name in self.__statusNames])
+        self.__snapshot = None
+        self.__roadIndex = {}
+        self.__times = None
+        # While we write statuses back to the roads ourselves we ignore their notifications
+        self.__writing = False
+        self.__listener = self.__onChange
+        network.addListener(self.__listener)
+        self.__rebuild()
+
+    # Getter functions
+    def getBuckets(self):
+        return self.__buckets
+    # The snapshot the arrays follow, a new one after the layout of the network changed
+    def getSnapshot(self):
+        self.__update()
+        return self.__snapshot
+    def getRoads(self):
+        self.__update()
+        return self.__snapshot.getRoads()
+    def getLengths(self):
+        self.__update()
+        return self.__lengths
+    def getSpeeds(self):
+        self.__update()
+        return self.__speeds
+    def getStatusCodes(self):
+        self.__update()
+        return self.__codes
+    def getProfiles(self):
+        self.__update()
+        return self.__profiles
+
+    # To stop listening to the network
+    def close(self):
+        self.__network.removeListener(self.__listener)
+
+    # The position of a road in the arrays
+    def indexOf(self, road):
+        self.__update()
+        return self.__roadIndex[road]
+
+    # The code used for a traffic status in the arrays
+    def statusCode(self, status):
+        if status not in self.__statusCodes:
+            self.__statusCodes[status] = len(self.__statusNames)
+            self.__statusNames.append(status)
+            self.__factors = np.append(self.__factors, 1.0)
+        return self.__statusCodes[status]
+
+    # To change how much speed is left for a traffic status
+    def setStatusFactor(self, status, factor):
+        self.__factors[self.statusCode(status)] = factor
+        self.__times = None
+
+    # To set the free speed of roads (meters per second)
+    def setSpeeds(self, roads, speeds):
+        self.__update()
+        self.__speeds[self.__indexes(roads)] = speeds
+        self.__times = None
+
+    # To set the speed profile of a road, one speed multiplier per time slot
+    def setProfile(self, road, multipliers):
+        self.setProfiles([road], np.asarray(multipliers, dtype=float).reshape(1, self.__buckets))
+
+    # To set the speed profiles of many roads at once (one row per road)
+    def setProfiles(self, roads, multipliers):
+        self.__update()
+        self.__profiles[self.__indexes(roads)] = multipliers
+        self.__times = None
+
+    # To apply a congestion feed, roads (Road objects or road positions) and their new statuses
+    # The arrays are updated in one go, and with writeBack the Road objects get the new status too
+    def applyStatuses(self, roads, statuses, writeBack=True):
+        self.__update()
+        indexes = self.__indexes(roads)
+        statuses = np.asarray(statuses)
+        # We only look up the codes of the distinct statuses, not of every road
+        names, inverse = np.unique(statuses, return_inverse=True)
+        codes = np.array([self.statusCode(name) for name in names.tolist()], dtype=np.int16)
+        self.__codes[indexes] = codes[inverse]
+        self.__times = None
+
+        if writeBack:
+            roadObjects = self.__snapshot.getRoads()
+            self.__writing = True
+            try:
+                for index, status in zip(indexes.tolist(), statuses.tolist()):
+                    roadObjects[index].setTraffic(status)
+            finally:
+                self.__writing = False
+
+    # Travel time on every road (seconds) for a departure time, or without profiles if it is None
+    def roadTimes(self, departure=None):
+        self.__update()
+        if departure == None:
+            speeds = self.__speeds * self.__factors[self.__codes]
+        else:
+            speeds = self.__speeds * self.__factors[self.__codes] * self.__profiles[:, self.bucket(departure)]
+        with np.errstate(divide="ignore"):
+            return self.__lengths / speeds
+
+    # Travel time of every edge of the snapshot, ready to use as Dijkstra weights
+    def edgeCosts(self, departure=None):
+        self.__update()
+        return self.roadTimes(departure)[self.__edgeRoads]
+
+    # The time slot of a time in seconds (days repeat)
+    def bucket(self, time):
+        return int(time // (86400 / self.__buckets)) % self.__buckets
+
+    # Like TrafficNetwork.dijkstra with travel times in seconds
+    def dijkstra(self, current, departure=None, timeDependent=False):
+        self.__update()
+        snapshot = self.__snapshot
+        source = snapshot.indexOf(current)
+        if timeDependent:
+            distances, previous = self.__timeDependentTree(source, 0 if departure == None else departure)
+        else:
+            distances, previous = snapshot.shortestPathTree(source, self.edgeCosts(departure).tolist())
+        return snapshot.toDictionaries(distances, previous)
+
+    # Time-dependent Dijkstra, every road uses the speed of the time slot in which we enter it
+    # This returns the travel time from the departure to every intersection
+    def __timeDependentTree(self, source, departure):
+        if self.__times == None:
+            # One row per road with the travel time in every time slot
+            speeds = (self.__speeds * self.__factors[self.__codes])[:, None] * self.__profiles
+            with np.errstate(divide="ignore"):
+                self.__times = (self.__lengths[:, None] / speeds).tolist()
+        times = self.__times
+        snapshot = self.__snapshot
+        offsets = snapshot.getOffsets()
+        targets = snapshot.getTargets()
+        edgeRoads = snapshot.getEdgeRoads()
+        slot = 86400 / self.__buckets
+        buckets = self.__buckets
+
+        arrival = [float('inf')] * len(snapshot)
+        previous = [-1] * len(snapshot)
+        arrival[source] = departure
+        pq = [(departure, source)]
+        while pq:
+            currentTime, current = heapq.heappop(pq)
+            if currentTime > arrival[current]:
+                continue
+            bucket = int(currentTime // slot) % buckets
+            for edge in range(offsets[current], offsets[current + 1]):
+                destination = targets[edge]
+                new_time = currentTime + times[edgeRoads[edge]][bucket]
+                if new_time < arrival[destination]:
+                    arrival[destination] = new_time
+                    previous[destination] = current
+                    heapq.heappush(pq, (new_time, destination))
+        return [time - departure for time in arrival], previous
+
+    # Road objects or positions to an array of positions
+    def __indexes(self, roads):
+        if isinstance(roads, np.ndarray):
+            return roads
+        return np.array([road if isinstance(road, (int, np.integer)) else self.__roadIndex[road] for road in roads],
+                        dtype=np.intp)
+
+    # To make sure the arrays match the network's roads
+    def __update(self):
+        if self.__snapshot == None:
+            self.__rebuild()
+
+    # To build the arrays again after the layout changed, speeds and profiles are kept
+    def __rebuild(self):
+        oldIndex = self.__roadIndex
+        oldSpeeds = self.__speeds if oldIndex else None
+        oldProfiles = self.__profiles if oldIndex else None
+
+        snapshot = self.__network.snapshot()
+        roads = snapshot.getRoads()
+        self.__snapshot = snapshot
+        self.__roadIndex = {road: i for i, road in enumerate(roads)}
+        self.__edgeRoads = np.asarray(snapshot.getEdgeRoads(), dtype=np.intp)
+        self.__lengths = np.array([road.getLength() for road in roads], dtype=float)
+        self.__codes = np.array([self.statusCode(road.getTraffic()) for road in roads], dtype=np.int16)
+        self.__speeds = np.full(len(roads), self.__defaultSpeed)
+        self.__profiles = np.ones((len(roads), self.__buckets))
+        self.__times = None
+
+        # Roads we already knew keep their speed and profile
+        if oldIndex:
+            kept = [(i, oldIndex[road]) for i, road in enumerate(roads) if road in oldIndex]
+            if kept:
+                new, old = np.array(kept, dtype=np.intp).T
+                self.__speeds[new] = oldSpeeds[old]
+                self.__profiles[new] = oldProfiles[old]
+
+    # The network tells us about every change, lengths and statuses are updated in place
+    # and anything that changes the layout makes us rebuild the arrays on the next query
+    # The snapshot also has the IDs and the houses of the intersections, so new IDs and houses
+    # that come or go need a new snapshot too
+    def __onChange(self, item, change, *details):
+        if isinstance(item, Road) and change in ("length", "traffic"):
+            if self.__writing or self.__snapshot == None:
+                return
+            index = self.__roadIndex.get(item)
+            if index == None:
+                return
+            if change == "length":
+                self.__lengths[index] = item.getLength()
+            else:
+                self.__codes[index] = self.statusCode(item.getTraffic())
+            self.__times = None
+        elif change in ("addIntersection", "removeIntersection", "addRoad", "removeRoad", "addHouse", "removeHouse",
+                        "id"):
+            self.__snapshot = None
+        elif change == "batch":
+            # A batch that only changed lengths and statuses is updated in place too
+            if any(entry[0] not in ("setLength", "setTraffic", "setName", "setNetworkName") for entry in details[0]):
+                self.__snapshot = None
+            if self.__writing or self.__snapshot == None:
+                return
+            for entry in details[0]:
+                if entry[0] not in ("setLength", "setTraffic"):
+                    continue
+                road = self.__network.getRoadByID(entry[1])
+                index = self.__roadIndex.get(road)
+                if index == None:
+                    continue
+                if entry[0] == "setLength":
+                    self.__lengths[index] = road.getLength()
+                else:
+                    self.__codes[index] = self.statusCode(road.getTraffic())
+            self.__times = None
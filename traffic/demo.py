@@ -0,0 +1,265 @@
+# The demo of the traffic system, run it with python -m traffic
+import os
+import tempfile
+
+from . import DynamicShortestPaths, House, Intersection, NetworkLoader, Road, TrafficNetwork
+
+
+def main():
+    # Test cases:
+    # First we will create 22 roads
+    road1 = Road("01", "Andrew Road", 2000, "Normal")
+    road2 = Road("02", "IDK Road", 1500, "Normal")
+    road3 = Road("03", "Mohammed Road", 1750, "Normal")
+    road4 = Road("04", "Speed Road", 10000, "Normal")
+    road5 = Road("05", "Godzilla Road", 1900, "Normal")
+    road6 = Road("06", "Kong Road", 1800, "Normal")
+    road7 = Road("07", "DON'T SPEED Road", 15000, "Normal")
+    road8 = Road("08", "Cold Road", 2200, "Normal")
+    road9 = Road("09", "Warm Road", 2250, "Normal")
+    road10 = Road("10", "Andre Road", 3000, "Normal")
+    road11 = Road("11", "Dot Road", 3500, "Normal")
+    road12 = Road("12", "Cole Road", 2700, "Normal")
+    road13 = Road("13", "Running Out of Names Road", 2800, "Normal")
+    road14 = Road("14", "Some Name Road", 2850, "Normal")
+    road15 = Road("15", "X Road", 2900, "Normal")
+    road16 = Road("16", "Y Road", 1500, "Normal")
+    road17 = Road("17", "Z Road", 2000, "Normal")
+    road18 = Road("18", "Poke Road", 2100, "Normal")
+    road19 = Road("19", "R6 Road", 1750, "Normal")
+    road20 = Road("20", "Final Road", 17000, "Normal")
+    road21 = Road("21", "Extra Road", 3100, "Normal")
+    road22 = Road("22", "Final 2 Road", 18000, "Normal")
+
+
+    # Now we create 20 intersections using the roads we have
+    intersection1 = Intersection("01", road1, road2)
+    intersection2 = Intersection("02", road2, road3)
+    intersection3 = Intersection("03", road3, road4)
+    intersection4 = Intersection("04", road13, road5)
+    intersection5 = Intersection("05", road5, road4)
+    intersection6 = Intersection("06", road6, road7)
+    intersection7 = Intersection("07", road7, road8)
+    intersection8 = Intersection("08", road8, road9)
+    intersection9 = Intersection("09", road9, road10)
+    intersection10 = Intersection("10", road10, road11)
+    intersection11 = Intersection("11", road11, road12)
+    intersection12 = Intersection("12", road12, road6)
+    intersection13 = Intersection("13", road12, road1)
+    intersection14 = Intersection("14", road13, road14)
+    intersection15 = Intersection("15", road15, road14)
+    intersection16 = Intersection("16", road16, road15)
+    intersection17 = Intersection("17", road16, road17)
+    intersection18 = Intersection("18", road18, road20)
+    intersection19 = Intersection("19", road19, road18)
+    intersection20 = Intersection("20", road18, road17)
+
+    # Now we will add the remaining roads to the intersections
+    intersection18.addRoad(road21)
+    intersection5.addRoad(road22)
+    intersection3.addRoad(road21)
+    intersection10.addRoad(road22)
+
+    # Add houses to the system so we can test the package distribution system
+    house1 = House("001", intersection1)
+    house2 = House("002", intersection1)
+    house3 = House("003", intersection10)
+    house4 = House("004", intersection10)
+    house5 = House("005", intersection10)
+    house6 = House("006", intersection20)
+    house7 = House("007", intersection17)
+    house8 = House("008", intersection7)
+    house9 = House("009", intersection18)
+    house10 = House("010", intersection15)
+
+
+    # Now we will initialize and show the network
+    # As you can see, the network has 20 intersections
+    # If the image is too cramped use the magnifying glass to look closer
+    trafficSystem1 = TrafficNetwork("Andrew City", intersection1)
+
+    # Here we get the shortest path from a node to every other node
+    # We will also print out the order of distributing packages from this info
+    distances, previous, houses_count = trafficSystem1.dijkstra(intersection20)
+    print(f"Shortest distances (from intersection 20): {distances}\n")
+    print(f"Shortest distance order (from intersection 20): {previous}\n")
+    print(f"Number of houses in each intersection: {houses_count}\n")
+    print(f"Order of package distribution: {trafficSystem1.packageDistribution(distances, houses_count)}\n")
+    print(f"Based on our distances it makes sense intersection 10 is the last because it is the furthest away. "
+          f"Even if it did have the largest number of packages it is the furthest and we can distriubte more if we leave it last.")
+
+    # The compact snapshot of the network should give the exact same results
+    snapshot1 = trafficSystem1.snapshot()
+    print(f"Snapshot gives the same results: {snapshot1.dijkstra(intersection20) == (distances, previous, houses_count)}\n")
+
+    # We can also ask for a single route, all three methods should agree with dijkstra
+    landmarks1 = snapshot1.landmarks(3)
+    for method in ["dijkstra", "bidirectional", "astar"]:
+        route1 = trafficSystem1.route(intersection20, intersection10, method, landmarks=landmarks1, snapshot=snapshot1)
+        print(f"Route from 20 to 10 ({method}): {route1.getIntersectionIDs()}, length {route1.getLength()}")
+    print(f"Same length as dijkstra: {route1.getLength() == distances['10']}\n")
+
+    # Distances between every pair of intersections with houses
+    matrix1 = trafficSystem1.distanceMatrix(processes=1, snapshot=snapshot1)
+    print(f"Intersections with houses: {matrix1.getIDs()}")
+    print(f"Distance between intersection 01 and 10: {matrix1.distance('01', '10')}\n")
+
+    # A real delivery tour from intersection 20 through every intersection with houses and back
+    tour1, tourLength1 = trafficSystem1.deliveryTour(intersection20, timeBudget=0.5, processes=1)
+    print(f"Delivery tour from intersection 20: {tour1}, length {tourLength1}\n")
+
+    # With three vans that carry 4 packages each, every van gets its own route
+    for van, (stops, length, packages) in enumerate(trafficSystem1.planFleet(intersection20, 3, 4, 0.2, processes=1)):
+        print(f"Van {van + 1}: {stops}, length {length}, {packages} packages")
+    print()
+
+    # With the cache on, asking again from the same intersection is just a lookup
+    cache1 = trafficSystem1.enableCache()
+    trafficSystem1.dijkstra(intersection20)
+    trafficSystem1.dijkstra(intersection20)
+    print(f"Cache hits: {cache1.getHits()}, misses: {cache1.getMisses()}, network version: {trafficSystem1.getVersion()}\n")
+
+    # A contraction hierarchy answers the same question with two tiny searches
+    hierarchy1 = trafficSystem1.contractionHierarchy(snapshot=snapshot1)
+    print(f"Contraction hierarchy route from 20 to 10: {hierarchy1.path('20', '10')}, length {hierarchy1.distance('20', '10')}")
+    print()
+
+    # Travel times depend on the traffic, so a heavy road 13 makes the trip from 20 to 10 slower
+    times1 = trafficSystem1.travelTimes(intersection20)[0]
+    road13.setTraffic("Heavy")
+    times2 = trafficSystem1.travelTimes(intersection20)[0]
+    road13.setTraffic("Normal")
+    print(f"Travel time from 20 to 10: {round(times1['10'])} s normally, {round(times2['10'])} s with heavy traffic on road 13\n")
+
+    # Big maps come from files, here we write our city as CSV (with one bad road) and load it back
+    with tempfile.TemporaryDirectory() as folder:
+        with open(os.path.join(folder, "roads.csv"), "w") as file:
+            file.write("id,name,length,traffic,from,to\n")
+            for road in trafficSystem1.getRoads():
+                start, end = road.getIntersections()
+                # A road needs both ends in the file, road 20 only has one so it is left out
+                if start == None or end == None:
+                    continue
+                file.write(f"{road.getID()},{road.getName()},{road.getLength()},{road.getTraffic()},{start.getID()},{end.getID()}\n")
+            file.write("99,Broken Road,far,Normal,01,02\n")
+        with open(os.path.join(folder, "houses.csv"), "w") as file:
+            file.write("id,intersection\n")
+            for house in trafficSystem1.getHouses():
+                file.write(f"{house.getID()},{house.getLocation().getID()}\n")
+        loader1 = NetworkLoader()
+        loadedSystem1 = loader1.load("Loaded Andrew City", os.path.join(folder, "roads.csv"), os.path.join(folder, "houses.csv"))
+    print(f"Bad rows: {[(line, reason) for path, line, reason in loader1.getErrors()]}")
+    print(f"Loaded city gives the same results: "
+          f"{loadedSystem1.dijkstra(loadedSystem1.getIntersectionByID('20')) == trafficSystem1.dijkstra(intersection20)}\n")
+
+    # Saving the city in the binary format lets the next run start routing without building anything
+    with tempfile.TemporaryDirectory() as folder:
+        trafficSystem1.save(os.path.join(folder, "city.trnw"))
+        mapped1 = TrafficNetwork.load(os.path.join(folder, "city.trnw"))
+        print(f"Saved city gives the same results: {mapped1.dijkstra('20') == trafficSystem1.dijkstra(intersection20)}")
+        rebuiltSystem1 = mapped1.toNetwork()
+        print(f"Rebuilt city gives the same results: "
+              f"{rebuiltSystem1.dijkstra(rebuiltSystem1.getIntersectionByID('20')) == trafficSystem1.dijkstra(intersection20)}\n")
+        mapped1.close()
+
+    # Servers have no display, so there we draw the network to a file instead
+    # The layout is kept, so drawing again after an edit only places the new intersections
+    with tempfile.TemporaryDirectory() as folder:
+        trafficSystem1.render(os.path.join(folder, "city.png"))
+        print(f"Drawn to a file without a display: {os.path.getsize(os.path.join(folder, 'city.png')) > 0}\n")
+
+    trafficSystem1.initializeNetwork()
+    trafficSystem1.showNetwork()
+
+
+    # Now we will try to remove two intersection, add one, change the distance between node 10 and 5,
+    # and start from another node.
+
+    # We will keep the shortest routes from intersection 13 up to date while we edit the network
+    tracker1 = DynamicShortestPaths(trafficSystem1)
+    tracker1.addSource(intersection13)
+
+    # Let's try removing intersection 7
+    trafficSystem1.removeIntersection(intersection7)
+
+    # Change the distance between node 10 and 5 (road 22)
+    road22.setLength(1050)
+
+    # Add a node to connecting to intersection 19
+    intersection21 = Intersection("21", road19, road18)
+
+    # Create a new road and use it to connect a new intersection to intersection 3
+    # Lets add a package there to the new intersection
+    road23 = Road("23", "Vince Road", 1000, "Normal")
+
+    # Connect the road to intersection 3
+    intersection3.addRoad(road23)
+
+    # Create the new intersection and add a house to it
+    intersection22 = Intersection("22", road23, road19)
+    house11 = House("011", intersection22)
+
+    # Now let's add the intersections to the system
+    trafficSystem1.addIntersection(intersection21)
+    trafficSystem1.addIntersection(intersection22)
+
+
+    # Finally, we generate a new shortest distance and distribute packages from there
+    # We will choose intersection 13 this time
+    distances, previous, houses_count = trafficSystem1.dijkstra(intersection13)
+    print(f"Shortest distances (from intersection 13): {distances}\n")
+    print(f"Shortest distance order (from intersection 13): {previous}\n")
+    print(f"Number of houses in each intersection: {houses_count}\n")
+    print(f"Order of package distribution: {trafficSystem1.packageDistribution(distances, houses_count)}\n")
+    print(f"The repaired routes from intersection 13 match: {tracker1.dijkstra(intersection13) == (distances, previous, houses_count)}\n")
+    print(f"You notice the this time, when reached node 03, we went to 22 first then 18.")
+    print(f"This tells us our system works perfectly fine because it is faster to go to intersection 22 then to 18.")
+    print(f"Moreover, out system looks different and the length between node 10 and node 5 changed")
+
+    # Lastly, we display our new traffic network
+    # We see that the system works perfectly fine
+    trafficSystem1.initializeNetwork()
+    trafficSystem1.showNetwork()
+
+    # As a final test-case, we will try removing most intersection than add more houses to see how the system changes
+    # Removing intersection 12 should remove intersection 6 as well
+    trafficSystem1.removeIntersection(intersection12)
+    trafficSystem1.removeIntersection(intersection13)
+    trafficSystem1.removeIntersection(intersection20)
+    trafficSystem1.removeIntersection(intersection17)
+    trafficSystem1.removeIntersection(intersection6)
+
+    house12 = House("012", intersection19)
+    house13 = House("013", intersection15)
+    house14 = House("014", intersection9)
+    house15 = House("015", intersection1)
+    house16 = House("016", intersection19)
+    house17 = House("017", intersection8)
+    house18 = House("018", intersection21)
+    house19 = House("019", intersection10)
+    house20 = House("020", intersection4)
+
+    # This time, we have to add them to the traffic system as well
+    trafficSystem1.addHouse(house12)
+    trafficSystem1.addHouse(house13)
+    trafficSystem1.addHouse(house14)
+    trafficSystem1.addHouse(house15)
+    trafficSystem1.addHouse(house16)
+    trafficSystem1.addHouse(house17)
+    trafficSystem1.addHouse(house18)
+    trafficSystem1.addHouse(house19)
+    trafficSystem1.addHouse(house20)
+
+    # Now lets try printing the results and showcase the graph
+    # You would notice that our system function as intended.
+    # We will start from node 22 this time
+    distances, previous, houses_count = trafficSystem1.dijkstra(intersection22)
+    print(f"Shortest distances (from intersection 22): {distances}\n")
+    print(f"Shortest distance order (from intersection 22): {previous}\n")
+    print(f"Number of houses in each intersection: {houses_count}\n")
+    print(f"Order of package distribution: {trafficSystem1.packageDistribution(distances, houses_count)}\n")
+    print(f"Notice how the distance between node 5 and node 3 made the algorithm get the other branches first.")
+    pieces1 = trafficSystem1.components()
+    print(f"Pieces of the network after the removals: {[sorted(node.getID() for node in piece) for piece in pieces1]}\n")
+    trafficSystem1.initializeNetwork()
+    trafficSystem1.showNetwork()
@@ -0,0 +1,220 @@
+# Simulating package deliveries from a depot, event by event, to try dispatch policies offline
+import heapq
+import random
+from array import array
+from collections import deque
+
+from .queue import Queue
+
+
+# Orders for random houses come in at random times (orderRate per hour on average) and wait in
+# the package Queue. Idle vehicles at the depot take up to capacity packages from the front of
+# the queue and deliver them in the order of packageDistribution (closest intersection first,
+# then the one with more houses), then drive back to the depot.
+# - The dispatch policy is set with capacity and holdTime: with a holdTime a vehicle waits for a
+#   full load until the oldest package has waited that long.
+# - With a cancelRate that share of the orders is cancelled after some time (patience on
+#   average) if no vehicle took it yet.
+# - Vehicles drive at speed meters per second over the shortest routes and take serviceTime
+#   seconds at every stop.
+# The simulation jumps from event to event. The calendar is a heap of (time, code) pairs where
+# the code is a number (an order or a vehicle) times KINDS plus the kind of event, and an order is
+# a position in two arrays, so millions of events need little memory and nothing is printed.
+# The network is used as it was when the simulation was made.
+class DispatchSimulation:
+    # The kinds of events
+    ORDER, CANCEL, DELIVER, RETURN, WAKE = range(5)
+    KINDS = 8
+
+    # orderRate is in orders per hour, the times are in seconds
+    def __init__(self, network, depot, vehicles=10, capacity=20, orderRate=60, speed=10.0, serviceTime=60,
+                 holdTime=0, cancelRate=0.0, patience=1800, seed=0):
+        if vehicles < 1 or capacity < 1:
+            raise ValueError("A dispatch simulation needs at least one vehicle that carries a package")
+        self.__capacity = capacity
+        self.__orderRate = orderRate
+        self.__speed = speed
+        self.__serviceTime = serviceTime
+        self.__holdTime = holdTime
+        self.__cancelRate = cancelRate
+        self.__patience = patience
+        self.__random = random.Random(seed)
+
+        # The distances from the depot and the order packageDistribution visits intersections in
+        snapshot = network.snapshot()
+        distances, previous, houses_count = network.dijkstra(depot)
+        ids = snapshot.getIDs()
+        self.__snapshot = snapshot
+        self.__depot = snapshot.indexOf(depot)
+        self.__depotDistances = array('d', [distances[ID] for ID in ids])
+        self.__rank = array('l', [0]) * len(ids)
+        for position, ID in enumerate(network.packageDistribution(distances, houses_count)):
+            self.__rank[snapshot.indexOf(ID)] = position
+        # Leg lengths between two stops, roads go both ways so (a, b) and (b, a) are the same
+        # They come from A* with landmarks, which looks at far fewer intersections than dijkstra
+        self.__legs = {}
+        self.__landmarks = snapshot.landmarks()
+
+        # Only the houses a vehicle can get to get orders
+        houses = [house for house in network.getHouses() if house.getLocation() != None and
+                  distances.get(house.getLocation().getID(), float('inf')) != float('inf')]
+        if not houses:
+            raise ValueError("There are no houses that can be reached from the depot")
+        houses.sort(key=lambda house: house.getID())
+        self.__houses = houses
+        self.__houseNodes = array('l', [snapshot.indexOf(house.getLocation()) for house in houses])
+
+        # Every order is its house and the time it came in
+        self.__orderHouses = array('l')
+        self.__orderTimes = array('d')
+        self.__queue = Queue()
+        self.__calendar = []
+        self.__time = 0.0
+        self.__wakeAt = None
+        self.__idle = deque(range(vehicles))
+        # When every vehicle that is out left, and how long each one was out in total
+        self.__departed = array('d', [0.0] * vehicles)
+        self.__busy = array('d', [0.0] * vehicles)
+
+        # What happened so far
+        self.__events = 0
+        self.__cancelled = 0
+        self.__latencies = array('d')
+        self.__trips = 0
+        self.__distance = 0.0
+        self.__maxQueue = 0
+        self.__schedule(self.__random.expovariate(orderRate / 3600), 0, DispatchSimulation.ORDER)
+
+    # Getter functions
+    def getTime(self):
+        return self.__time
+    def getQueue(self):
+        return self.__queue
+    def getHouses(self):
+        return self.__houses
+    def getEvents(self):
+        return self.__events
+    # The time every delivered package waited from its order to its delivery, in delivery order
+    def getLatencies(self):
+        return self.__latencies
+
+    def __schedule(self, time, number, kind):
+        heapq.heappush(self.__calendar, (time, number * DispatchSimulation.KINDS + kind))
+
+    # To run the simulation for some seconds
+    def run(self, seconds):
+        end = self.__time + seconds
+        calendar = self.__calendar
+        heappop = heapq.heappop
+        kinds = DispatchSimulation.KINDS
+        orderTimes = self.__orderTimes
+        latencies = self.__latencies
+        while calendar and calendar[0][0] <= end:
+            time, code = heappop(calendar)
+            self.__time = time
+            self.__events += 1
+            number, kind = divmod(code, kinds)
+            # Deliveries are most of the events, they only need to be counted
+            if kind == DispatchSimulation.DELIVER:
+                latencies.append(time - orderTimes[number])
+            elif kind == DispatchSimulation.ORDER:
+                self.__order(number)
+            elif kind == DispatchSimulation.RETURN:
+                self.__busy[number] += time - self.__departed[number]
+                self.__idle.append(number)
+                self.__dispatch()
+            elif kind == DispatchSimulation.CANCEL:
+                if self.__queue.cancelPackage(number):
+                    self.__cancelled += 1
+            else:
+                self.__wakeAt = None
+                self.__dispatch()
+        self.__time = end
+
+    # A new order comes in, and the time of the next one is drawn
+    def __order(self, number):
+        generator = self.__random
+        time = self.__time
+        self.__orderHouses.append(generator.randrange(len(self.__houses)))
+        self.__orderTimes.append(time)
+        self.__queue.pushPackage(number)
+        self.__maxQueue = max(self.__maxQueue, len(self.__queue))
+        if self.__cancelRate > 0 and generator.random() < self.__cancelRate:
+            self.__schedule(time + generator.expovariate(1 / self.__patience), number, DispatchSimulation.CANCEL)
+        self.__schedule(time + generator.expovariate(self.__orderRate / 3600), number + 1, DispatchSimulation.ORDER)
+        self.__dispatch()
+
+    # Idle vehicles leave while there are packages, unless they wait for a fuller load
+    def __dispatch(self):
+        queue = self.__queue
+        while self.__idle and len(queue):
+            if len(queue) < self.__capacity and self.__holdTime > 0:
+                ready = self.__orderTimes[queue.peekPackage()] + self.__holdTime
+                if self.__time < ready:
+                    if self.__wakeAt == None:
+                        self.__wakeAt = ready
+                        self.__schedule(ready, 0, DispatchSimulation.WAKE)
+                    return
+            self.__trip(self.__idle.popleft())
+
+    # A vehicle takes a load from the queue, its deliveries and its return are put in the calendar
+    def __trip(self, vehicle):
+        queue = self.__queue
+        orderHouses = self.__orderHouses
+        houseNodes = self.__houseNodes
+        stops = {}
+        for unused in range(min(self.__capacity, len(queue))):
+            order = queue.processPackage()
+            stops.setdefault(houseNodes[orderHouses[order]], []).append(order)
+
+        speed = self.__speed
+        time = self.__time
+        here = self.__depot
+        driven = 0.0
+        for node in sorted(stops, key=self.__rank.__getitem__):
+            leg = self.__depotDistances[node] if here == self.__depot else self.__leg(here, node)
+            driven += leg
+            time += leg / speed
+            for order in stops[node]:
+                self.__schedule(time, order, DispatchSimulation.DELIVER)
+            time += self.__serviceTime
+            here = node
+        driven += self.__depotDistances[here]
+        time += self.__depotDistances[here] / speed
+        self.__departed[vehicle] = self.__time
+        self.__schedule(time, vehicle, DispatchSimulation.RETURN)
+        self.__trips += 1
+        self.__distance += driven
+
+    # The length of the shortest route between two stops
+    def __leg(self, a, b):
+        key = (a, b) if a < b else (b, a)
+        length = self.__legs.get(key)
+        if length == None:
+            # A few million legs is enough to remember
+            if len(self.__legs) >= 4000000:
+                self.__legs.clear()
+            length = self.__snapshot.shortestRoute(a, b, self.__landmarks.heuristic(b))[0]
+            self.__legs[key] = length
+        return length
+
+    # The results so far: throughput in deliveries per hour, the latencies of the deliveries
+    # (mean and percentiles in seconds) and the share of the time the vehicles were out
+    def report(self):
+        elapsed = self.__time
+        busy = [total + (elapsed - self.__departed[vehicle] if vehicle not in self.__idle else 0)
+                for vehicle, total in enumerate(self.__busy)]
+        utilisation = [total / elapsed if elapsed > 0 else 0.0 for total in busy]
+        latencies = sorted(self.__latencies)
+        delivered = len(latencies)
+        if delivered:
+            latency = {"mean": sum(latencies) / delivered, "max": latencies[-1]}
+            for share in (50, 90, 95, 99):
+                latency[f"p{share}"] = latencies[min(delivered - 1, delivered * share // 100)]
+        else:
+            latency = None
+        return {"time": elapsed, "events": self.__events, "orders": len(self.__orderTimes),
+                "delivered": delivered, "cancelled": self.__cancelled, "waiting": len(self.__queue),
+                "maxQueue": self.__maxQueue, "throughput": delivered * 3600 / elapsed if elapsed > 0 else 0.0,
+                "latency": latency, "trips": self.__trips, "distance": self.__distance,
+                "utilisation": sum(utilisation) / len(utilisation), "vehicleUtilisation": utilisation}
@@ -0,0 +1,183 @@
+# Shortest route trees that are repaired instead of recomputed when the network changes
+import heapq
+import itertools
+
+from .model import Intersection, Road
+
+
+# This keeps shortest route trees up to date while the network changes
+# Instead of running dijkstra again after every edit, we only repair the part of each tree
+# that the edit touches (decrease/increase propagation, like Ramalingam and Reps):
+# - when a road gets shorter or a new connection appears, we push the improved intersections
+#   and continue Dijkstra from there
+# - when a road on the tree gets longer or disappears, only the intersections below it in the
+#   tree can get worse, so we reset that subtree, give each of them the best distance from its
+#   neighbours outside the subtree and continue Dijkstra from there
+class DynamicShortestPaths:
+    def __init__(self, network):
+        self.__network = network
+        # For every source we keep three dictionaries keyed by intersection:
+        # distances, parents (the previous intersection and the road used) and children
+        self.__trees = {}
+        # Used to break ties in the priority queue, intersections can't be compared
+        self.__counter = itertools.count()
+        self.__listener = self.__onChange
+        network.addListener(self.__listener)
+
+    # To start keeping the tree of a source, this runs one full Dijkstra
+    def addSource(self, source):
+        tree = ({source: 0}, {}, {})
+        self.__trees[source] = tree
+        self.__propagate(tree, [(0, next(self.__counter), source)])
+    def removeSource(self, source):
+        if source in self.__trees:
+            del self.__trees[source]
+    def getSources(self):
+        return list(self.__trees)
+
+    # To stop listening to the network
+    def close(self):
+        self.__network.removeListener(self.__listener)
+        self.__trees = {}
+
+    # The current distance between a source and an intersection
+    def getDistance(self, source, intersection):
+        return self.__trees[source][0].get(intersection, float('inf'))
+
+    # The same results as TrafficNetwork.dijkstra, without running it again
+    def dijkstra(self, source):
+        distances, parents, children = self.__trees[source]
+        inf = float('inf')
+        nodes = sorted(self.__network.getIntersections(), key=lambda node: node.getID())
+
+        sorted_distances = {node.getID(): distances.get(node, inf) for node in nodes}
+        sorted_previous = {node.getID(): (parents[node][0].getID() if node in parents else None) for node in nodes}
+        sorted_houses = {node.getID(): len(node.getHouses()) for node in nodes if node in parents}
+
+        return sorted_distances, sorted_previous, sorted_houses
+
+    # The neighbours we can drive to from an intersection, with the road and its length
+    # This follows the same rules as Intersection.shortestRoad, inside the network only
+    def __neighbours(self, node):
+        members = self.__network.getIntersections()
+        if node not in members:
+            return
+        for road in node.getRoads():
+            if road != None:
+                for destination in road.getIntersections():
+                    if destination != node and destination != None and destination in members:
+                        yield destination, road, road.getLength()
+
+    # To move a node under a new parent in the tree
+    def __setParent(self, tree, node, parent, road):
+        distances, parents, children = tree
+        if node in parents:
+            children[parents[node][0]].discard(node)
+        parents[node] = (parent, road)
+        children.setdefault(parent, set()).add(node)
+
+    # Dijkstra from the intersections in the queue, only nodes that improve are visited
+    def __propagate(self, tree, pq):
+        distances, parents, children = tree
+        heapq.heapify(pq)
+        inf = float('inf')
+        while pq:
+            currentLength, order, current = heapq.heappop(pq)
+            if currentLength > distances.get(current, inf):
+                continue
+            for destination, road, length in self.__neighbours(current):
+                new_distance = currentLength + length
+                if new_distance < distances.get(destination, inf):
+                    distances[destination] = new_distance
+                    self.__setParent(tree, destination, current, road)
+                    heapq.heappush(pq, (new_distance, next(self.__counter), destination))
+
+    # A connection between a and b got shorter or was added
+    def __shorter(self, tree, a, b, road, length):
+        distances = tree[0]
+        inf = float('inf')
+        pq = []
+        for start, end in ((a, b), (b, a)):
+            if distances.get(start, inf) + length < distances.get(end, inf):
+                distances[end] = distances[start] + length
+                self.__setParent(tree, end, start, road)
+                pq.append((distances[end], next(self.__counter), end))
+        self.__propagate(tree, pq)
+
+    # A connection between a and b got longer or was removed
+    def __longer(self, tree, a, b, road):
+        distances, parents, children = tree
+        inf = float('inf')
+        # Only a tree road matters, everything under it might get further away
+        affected = []
+        for parent, child in ((a, b), (b, a)):
+            if parents.get(child) == (parent, road):
+                affected.append(child)
+        if not affected:
+            return
+        # We collect the whole subtree
+        stack = list(affected)
+        affected = set()
+        while stack:
+            node = stack.pop()
+            if node not in affected:
+                affected.add(node)
+                stack.extend(children.get(node, ()))
+        # Reset it
+        for node in affected:
+            children[parents[node][0]].discard(node)
+            del parents[node]
+            del distances[node]
+        # Every node in the subtree looks for its best neighbour outside of it
+        pq = []
+        for node in affected:
+            best = inf
+            for neighbour, neighbourRoad, length in self.__neighbours(node):
+                if neighbour in distances and distances[neighbour] + length < best:
+                    best = distances[neighbour] + length
+                    bestParent = (neighbour, neighbourRoad)
+            if best < inf:
+                distances[node] = best
+                self.__setParent(tree, node, bestParent[0], bestParent[1])
+                pq.append((best, next(self.__counter), node))
+        self.__propagate(tree, pq)
+
+    # This is called by the network for every change
+    def __onChange(self, item, change, *details):
+        members = self.__network.getIntersections()
+        if item is self.__network:
+            if change == "batch":
+                # The repairs need every change on its own, after many of them we start over
+                for source in list(self.__trees):
+                    if source in members:
+                        self.addSource(source)
+                    else:
+                        self.removeSource(source)
+            elif change == "addIntersection":
+                # A new intersection brings new connections
+                node = details[0]
+                for neighbour, road, length in list(self.__neighbours(node)):
+                    for tree in self.__trees.values():
+                        self.__shorter(tree, node, neighbour, road, length)
+            elif change == "removeIntersection":
+                # Its roads were already removed one by one, so it is not on any tree anymore
+                self.removeSource(details[0])
+        elif isinstance(item, Road) and change == "length":
+            ends = [end for end in item.getIntersections() if end != None and end in members]
+            if len(ends) == 2 and ends[0] != ends[1]:
+                oldLength = details[0]
+                for tree in self.__trees.values():
+                    if item.getLength() < oldLength:
+                        self.__shorter(tree, ends[0], ends[1], item, item.getLength())
+                    elif item.getLength() > oldLength:
+                        self.__longer(tree, ends[0], ends[1], item)
+        elif isinstance(item, Intersection) and change in ("addRoad", "removeRoad"):
+            road = details[0]
+            for end in road.getIntersections():
+                if end != None and end != item:
+                    for tree in self.__trees.values():
+                        if change == "addRoad":
+                            if item in members and end in members:
+                                self.__shorter(tree, item, end, road, road.getLength())
+                        else:
+                            self.__longer(tree, item, end, road)
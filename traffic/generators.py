@@ -0,0 +1,214 @@
+# Synthetic cities for testing and benchmarks
+# Every generator is seeded, so the same arguments always give the same city.
+# The cities are built in bulk (Intersection.fromRoads and Road.attachIntersection, like the
+# loader does), which keeps a million intersections within reach.
+# Every intersection gets coordinates in meters (see Intersection.getCoordinates).
+import gc
+import math
+import random
+
+from .model import House, Intersection, Road
+from .network import TrafficNetwork
+
+
+# The kinds of city syntheticCity can make
+CITY_KINDS = ("grid", "radial", "geometric")
+
+
+# To build a rows x cols grid city for testing and benchmarks
+# The blocks are 550 m apart and every road is that long or up to 1.8 times longer (it winds a
+# bit), so road lengths are random between 550 and 990. Some intersections get a house.
+def gridNetwork(rows, cols, seed=0, houseChance=0.1):
+    return _network(*_gridParts(rows, cols, seed, houseChance))
+
+
+# To build a city of rings around a centre, with spokes going out from the centre
+# Ring r is 500 m further out than ring r - 1, so the roads on the outer rings are longer.
+# The centre is a big roundabout with one road for every spoke.
+def radialNetwork(rings, spokes, seed=0, houseChance=0.1):
+    return _network(*_radialParts(rings, spokes, seed, houseChance))
+
+
+# To build a city with intersections at random spots, each one connected to its nearest neighbours
+# The intersections are spread about 200 m apart and the road lengths are the straight distances
+# (rounded up to whole meters).
+# Only the biggest connected part is kept, so every intersection can be reached.
+def randomGeometricNetwork(count, neighbours=3, seed=0, houseChance=0.1):
+    return _network(*_geometricParts(count, neighbours, seed, houseChance))
+
+
+# To build a city of one of the CITY_KINDS with about the given number of intersections
+def syntheticCity(kind, intersections, seed=0, houseChance=0.1):
+    return _network(*cityParts(kind, intersections, seed, houseChance))
+
+
+# The same as syntheticCity, but without making the network
+# This gives the network name and the intersections, so the network can be timed on its own
+# with TrafficNetwork(name, intersections[0])
+def cityParts(kind, intersections, seed=0, houseChance=0.1):
+    if kind == "grid":
+        rows = max(2, round(math.sqrt(intersections)))
+        return _gridParts(rows, max(2, round(intersections / rows)), seed, houseChance)
+    if kind == "radial":
+        spokes = max(6, round(math.sqrt(intersections)))
+        return _radialParts(max(1, round((intersections - 1) / spokes)), spokes, seed, houseChance)
+    if kind == "geometric":
+        return _geometricParts(intersections, 3, seed, houseChance)
+    raise ValueError(f"Unknown kind of city {kind}, use one of {', '.join(CITY_KINDS)}")
+
+
+# Every intersection of a city can be reached from the first one, so the network finds them all
+def _network(networkName, intersections):
+    return TrafficNetwork(networkName, intersections[0])
+
+
+# Every generator makes roads at least as long as the straight line between the coordinates of
+# their ends, so the straight distance to the target never overestimates and A* with the
+# coordinates (see GraphSnapshot.route) finds the shortest routes.
+def _gridParts(rows, cols, seed, houseChance):
+    generator = random.Random(seed)
+    edges = []
+    names = []
+    lengths = []
+    for row in range(rows):
+        for col in range(cols):
+            node = row * cols + col
+            if col + 1 < cols:
+                edges.append((node, node + 1))
+                names.append(f"Street {row}")
+                lengths.append(math.ceil(550 * generator.uniform(1.0, 1.8)))
+            if row + 1 < rows:
+                edges.append((node, node + cols))
+                names.append(f"Avenue {col}")
+                lengths.append(math.ceil(550 * generator.uniform(1.0, 1.8)))
+    coordinates = [(col * 550, row * 550) for row in range(rows) for col in range(cols)]
+    return f"Grid {rows}x{cols}", _build(rows * cols, edges, names, lengths, generator, houseChance, coordinates)
+
+
+def _radialParts(rings, spokes, seed, houseChance):
+    generator = random.Random(seed)
+    # Node 0 is the centre, then ring by ring and spoke by spoke
+    edges = []
+    names = []
+    lengths = []
+    for ring in range(rings):
+        radius = (ring + 1) * 500
+        for spoke in range(spokes):
+            node = 1 + ring * spokes + spoke
+            # Out along the spoke, from the centre or from the ring inside
+            edges.append((0 if ring == 0 else node - spokes, node))
+            names.append(f"Spoke {spoke}")
+            lengths.append(math.ceil(500 * generator.uniform(1.0, 1.2)))
+            # Around the ring, to the next spoke (the arc is longer than the straight line)
+            edges.append((node, 1 + ring * spokes + (spoke + 1) % spokes))
+            names.append(f"Ring {ring}")
+            lengths.append(math.ceil(2 * math.pi * radius / spokes * generator.uniform(1.0, 1.2)))
+    coordinates = [(0.0, 0.0)]
+    for ring in range(rings):
+        radius = (ring + 1) * 500
+        for spoke in range(spokes):
+            angle = 2 * math.pi * spoke / spokes
+            coordinates.append((radius * math.cos(angle), radius * math.sin(angle)))
+    return (f"Radial {rings}x{spokes}",
+            _build(1 + rings * spokes, edges, names, lengths, generator, houseChance, coordinates))
+
+
+def _geometricParts(count, neighbours, seed, houseChance):
+    # numpy is only needed for this kind of city
+    import numpy as np
+    generator = random.Random(seed)
+    side = math.sqrt(count) * 200
+    points = np.random.default_rng(seed).uniform(0, side, (count, 2))
+
+    # The points go in square cells of about one point each, so the nearest neighbours of a point
+    # are in the 3x3 cells around it. We go through those cells for all the points at once,
+    # one candidate per cell at a time, and keep the closest candidates so far.
+    cellSize = 200
+    columns = int(side // cellSize) + 1
+    cell = (points // cellSize).astype(np.int64)
+    key = cell[:, 1] * columns + cell[:, 0]
+    order = np.argsort(key, kind="stable")
+    starts = np.searchsorted(key[order], np.arange(columns * columns + 1))
+    nodes = np.arange(count)
+    best = np.full((count, neighbours), np.inf)
+    bestNodes = np.full((count, neighbours), -1)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            column, row = cell[:, 0] + dx, cell[:, 1] + dy
+            valid = (column >= 0) & (column < columns) & (row >= 0) & (row < columns)
+            target = np.where(valid, row * columns + column, 0)
+            begin = np.where(valid, starts[target], 0)
+            end = np.where(valid, starts[target + 1], 0)
+            for step in range(int((end - begin).max(initial=0))):
+                other = order[np.minimum(begin + step, count - 1)]
+                distance = ((points[other] - points) ** 2).sum(axis=1)
+                distance[(begin + step >= end) | (other == nodes)] = np.inf
+                candidates = np.concatenate([best, distance[:, None]], axis=1)
+                candidateNodes = np.concatenate([bestNodes, other[:, None]], axis=1)
+                keep = np.argsort(candidates, axis=1, kind="stable")[:, :neighbours]
+                best = np.take_along_axis(candidates, keep, axis=1)
+                bestNodes = np.take_along_axis(candidateNodes, keep, axis=1)
+    found = np.isfinite(best)
+    first = np.repeat(nodes[:, None], neighbours, axis=1)[found]
+    second = bestNodes[found]
+    pairs = np.unique(np.minimum(first, second) * count + np.maximum(first, second))
+    firsts, seconds = (pairs // count).tolist(), (pairs % count).tolist()
+
+    # We keep the biggest connected part (union find over the roads)
+    parent = list(range(count))
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+    for a, b in zip(firsts, seconds):
+        parent[find(a)] = find(b)
+    roots = [find(node) for node in range(count)]
+    sizes = {}
+    for root in roots:
+        sizes[root] = sizes.get(root, 0) + 1
+    biggest = max(sizes, key=sizes.get)
+    kept = [node for node in range(count) if roots[node] == biggest]
+    number = {node: index for index, node in enumerate(kept)}
+
+    lengths = np.maximum(1, np.ceil(np.hypot(*(points[firsts] - points[seconds]).T))).astype(np.int64).tolist()
+    edges = []
+    edgeLengths = []
+    for a, b, length in zip(firsts, seconds, lengths):
+        if a in number:
+            edges.append((number[a], number[b]))
+            edgeLengths.append(length)
+    return (f"Random geometric {count}",
+            _build(len(kept), edges, [""] * len(edges), edgeLengths, generator, houseChance,
+                   points[kept].tolist()))
+
+
+# To make the intersections, roads and houses of a city from its edges (pairs of node numbers)
+# The IDs are the zero padded node numbers, so they sort in order, and a node gets as many roads
+# as it needs. Some intersections get a house, drawn after the road lengths.
+def _build(count, edges, names, lengths, generator, houseChance, coordinates):
+    # Nothing made here is garbage, so the garbage collector going through millions of new
+    # objects again and again is wasted time (about half of it on big cities)
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        roads = [[] for node in range(count)]
+        for (a, b), name, length in zip(edges, names, lengths):
+            road = Road(f"{a}-{b}", name, length, "Normal")
+            roads[a].append(road)
+            roads[b].append(road)
+
+        width = len(str(count))
+        intersections = []
+        for node in range(count):
+            intersection = Intersection.fromRoads(str(node).zfill(width), roads[node],
+                                                  max(Intersection.MAX_ROADS, len(roads[node])), coordinates[node])
+            for road in roads[node]:
+                road.attachIntersection(intersection)
+            if generator.random() < houseChance:
+                House(f"H{node}", intersection)
+            intersections.append(intersection)
+    finally:
+        if collecting:
+            gc.enable()
+    return intersections
@@ -0,0 +1,385 @@
+# Contraction hierarchies for very fast distance queries
+import heapq
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from .model import Intersection
+
+
+# Contraction hierarchy for very fast distance queries on big networks
+# We contract the intersections one by one (least important first). When we contract one,
+# we add a shortcut between two of its neighbours if the route through it was the only shortest
+# one. Every intersection then only keeps its roads/shortcuts to more important intersections
+# (the upward graph), and a query is two small upward searches that meet at the top.
+# File layout: header, the intersection IDs as JSON, then rank, offsets, targets, weights and
+# middles (the intersection a shortcut skips, -1 for real roads), each 8 byte aligned.
+class ContractionHierarchy:
+    MAGIC = b"TRCH"
+    VERSION = 1
+    # magic, version, intersections, upward edges, fingerprint, length of the IDs
+    HEADER = struct.Struct("<4sIQQ16sQ")
+    TYPECODES = ("i", "q", "i", "d", "i")
+
+    def __init__(self, ids, rank, offsets, targets, weights, middles, fingerprint, memory=None, file=None):
+        self.__ids = ids
+        self.__rank = rank
+        self.__offsets = offsets
+        self.__targets = targets
+        self.__weights = weights
+        self.__middles = middles
+        self.__fingerprint = fingerprint
+        self.__memory = memory
+        self.__file = file
+        self.__index = None
+
+    # Getter functions
+    def getIDs(self):
+        return self.__ids
+    def getRank(self):
+        return self.__rank
+    def getOffsets(self):
+        return self.__offsets
+    def getTargets(self):
+        return self.__targets
+    def getWeights(self):
+        return self.__weights
+    def getMiddles(self):
+        return self.__middles
+    def getFingerprint(self):
+        return self.__fingerprint
+
+    # The number of intersections
+    def __len__(self):
+        return len(self.__rank)
+
+    # The position of an intersection (or its ID) in the hierarchy
+    def indexOf(self, intersection):
+        if isinstance(intersection, Intersection):
+            intersection = intersection.getID()
+        if self.__index == None:
+            self.__index = {ID: i for i, ID in enumerate(self.__ids)}
+        return self.__index[intersection]
+
+    # To release the memory map when the hierarchy was loaded from a file
+    def close(self):
+        if self.__memory != None:
+            for buffer in (self.__rank, self.__offsets, self.__targets, self.__weights, self.__middles):
+                buffer.release()
+            self.__memory.close()
+            self.__file.close()
+            self.__memory = None
+
+    # The shortest distance between two intersections (or IDs)
+    def distance(self, source, target):
+        return self.__query(self.indexOf(source), self.indexOf(target))[0]
+
+    # The shortest route between two intersections as a list of IDs, or None if there is none
+    def path(self, source, target):
+        length, meeting, previous = self.__query(self.indexOf(source), self.indexOf(target))
+        if meeting == -1:
+            return None
+        # We go down from the meeting point to both ends, then unpack the shortcuts
+        nodes = []
+        for side in (0, 1):
+            half = [meeting]
+            while previous[side][half[-1]] != None:
+                half.append(previous[side][half[-1]])
+            if side == 0:
+                half.reverse()
+                nodes = half
+            else:
+                nodes = nodes + half[1:]
+        route = [nodes[0]]
+        for a, b in zip(nodes, nodes[1:]):
+            self.__unpack(a, b, route)
+        return [self.__ids[node] for node in route]
+
+    # Distances from one intersection to many others
+    # The upward search from the source is done once and reused for every target
+    def oneToMany(self, source, targets):
+        forward = self.__upward(self.indexOf(source))
+        inf = float('inf')
+        results = []
+        for target in targets:
+            best = inf
+            for node, length in self.__upward(self.indexOf(target)).items():
+                if node in forward and forward[node] + length < best:
+                    best = forward[node] + length
+            results.append(best)
+        return results
+
+    # Every intersection we can reach going only upward, with its distance
+    def __upward(self, source):
+        offsets = self.__offsets
+        targets = self.__targets
+        weights = self.__weights
+        distances = {source: 0}
+        pq = [(0, source)]
+        while pq:
+            currentLength, current = heapq.heappop(pq)
+            if currentLength > distances[current]:
+                continue
+            for edge in range(offsets[current], offsets[current + 1]):
+                destination = targets[edge]
+                new_distance = currentLength + weights[edge]
+                if new_distance < distances.get(destination, float('inf')):
+                    distances[destination] = new_distance
+                    heapq.heappush(pq, (new_distance, destination))
+        return distances
+
+    # Bidirectional upward search, this returns the length, the meeting intersection and the
+    # previous dictionaries of both searches
+    def __query(self, source, target):
+        offsets = self.__offsets
+        targets = self.__targets
+        weights = self.__weights
+        heappop = heapq.heappop
+        heappush = heapq.heappush
+        inf = float('inf')
+
+        distances = ({source: 0}, {target: 0})
+        previous = ({source: None}, {target: None})
+        pqs = ([(0, source)], [(0, target)])
+        best = inf
+        meeting = source if source == target else -1
+
+        while pqs[0] or pqs[1]:
+            # We take the side with the smaller distance waiting in its queue
+            if not pqs[1] or (pqs[0] and pqs[0][0][0] <= pqs[1][0][0]):
+                side = 0
+            else:
+                side = 1
+            pq = pqs[side]
+            # Once a side can't beat the best route, it is done
+            if pq[0][0] >= best:
+                pq.clear()
+                continue
+            currentLength, current = heappop(pq)
+            distance = distances[side]
+            if currentLength > distance[current]:
+                continue
+            other = distances[1 - side]
+            if current in other and currentLength + other[current] < best:
+                best = currentLength + other[current]
+                meeting = current
+            # Stall on demand: if a more important intersection we already reached gives a shorter
+            # way here, this node isn't on a shortest route, so we don't expand it.
+            # Roads go both ways, so those intersections are exactly our upward neighbours.
+            stalled = False
+            for edge in range(offsets[current], offsets[current + 1]):
+                destination = targets[edge]
+                if destination in distance and distance[destination] + weights[edge] < currentLength:
+                    stalled = True
+                    break
+            if stalled:
+                continue
+            for edge in range(offsets[current], offsets[current + 1]):
+                destination = targets[edge]
+                new_distance = currentLength + weights[edge]
+                if new_distance < distance.get(destination, inf):
+                    distance[destination] = new_distance
+                    previous[side][destination] = current
+                    heappush(pq, (new_distance, destination))
+
+        if source == target:
+            best = 0
+        return best, meeting, previous
+
+    # To replace the shortcut from a to b with the intersections it skips
+    # The intersections after a (up to b) are added to the route
+    def __unpack(self, a, b, route):
+        stack = [(a, b)]
+        while stack:
+            a, b = stack.pop()
+            # The edge is saved on the less important of the two
+            low, high = (a, b) if self.__rank[a] < self.__rank[b] else (b, a)
+            middle = -1
+            best = float('inf')
+            for edge in range(self.__offsets[low], self.__offsets[low + 1]):
+                if self.__targets[edge] == high and self.__weights[edge] < best:
+                    best = self.__weights[edge]
+                    middle = self.__middles[edge]
+            if middle == -1:
+                route.append(b)
+            else:
+                # The second half goes on the stack first, so the first half comes out first
+                stack.append((middle, b))
+                stack.append((a, middle))
+
+    # To build the hierarchy from a snapshot
+    # The witness search (looking for a route that avoids the contracted intersection) gives up
+    # after settling witnessLimit intersections, which can only add extra shortcuts.
+    @staticmethod
+    def build(snapshot, witnessLimit=64):
+        count = len(snapshot)
+        inf = float('inf')
+        # neighbour -> (length, middle) for every intersection that isn't contracted yet
+        adjacency = [{} for node in range(count)]
+        for node in range(count):
+            for destination, length in snapshot.neighbours(node):
+                if destination != node:
+                    old = adjacency[node].get(destination)
+                    if old == None or length < old[0]:
+                        adjacency[node][destination] = (length, -1)
+
+        # Dijkstra from start that never goes through skip, limited in distance and size
+        def witness(start, skip, limit):
+            distances = {start: 0}
+            pq = [(0, start)]
+            settled = 0
+            while pq and settled < witnessLimit:
+                currentLength, current = heapq.heappop(pq)
+                if currentLength > distances[current]:
+                    continue
+                if currentLength > limit:
+                    break
+                settled += 1
+                for destination, (length, middle) in adjacency[current].items():
+                    if destination == skip:
+                        continue
+                    new_distance = currentLength + length
+                    if new_distance < distances.get(destination, inf):
+                        distances[destination] = new_distance
+                        heapq.heappush(pq, (new_distance, destination))
+            return distances
+
+        # The shortcuts we need if we contract a node now
+        def shortcuts(node):
+            neighbours = list(adjacency[node].items())
+            needed = []
+            for i, (start, (startLength, unused)) in enumerate(neighbours):
+                others = neighbours[i + 1:]
+                if not others:
+                    continue
+                limit = startLength + max(length for unused, (length, unused2) in others)
+                distances = witness(start, node, limit)
+                for end, (endLength, unused) in others:
+                    if distances.get(end, inf) > startLength + endLength:
+                        needed.append((start, end, startLength + endLength))
+            return needed
+
+        # Less important intersections add fewer shortcuts than the roads they remove,
+        # and we spread the work by counting already contracted neighbours and keeping
+        # the hierarchy shallow (the level is how many contractions happened below a node)
+        contractedNeighbours = [0] * count
+        level = [0] * count
+        def priority(node, needed):
+            return 2 * (len(needed) - len(adjacency[node])) + contractedNeighbours[node] + level[node]
+
+        pq = []
+        for node in range(count):
+            pq.append((priority(node, shortcuts(node)), node))
+        heapq.heapify(pq)
+
+        rank = array('i', [0] * count)
+        upward = [None] * count
+        order = 0
+        while pq:
+            oldPriority, node = heapq.heappop(pq)
+            # Priorities change as neighbours get contracted, so we check again (lazy update)
+            needed = shortcuts(node)
+            newPriority = priority(node, needed)
+            if pq and newPriority > pq[0][0]:
+                heapq.heappush(pq, (newPriority, node))
+                continue
+
+            for start, end, length in needed:
+                old = adjacency[start].get(end)
+                if old == None or length < old[0]:
+                    adjacency[start][end] = (length, node)
+                    adjacency[end][start] = (length, node)
+            # Everything still connected to this node is more important, so these are its upward edges
+            upward[node] = list(adjacency[node].items())
+            for neighbour in adjacency[node]:
+                del adjacency[neighbour][node]
+                contractedNeighbours[neighbour] += 1
+                level[neighbour] = max(level[neighbour], level[node] + 1)
+            adjacency[node] = None
+            rank[node] = order
+            order += 1
+
+        offsets = array('q', [0])
+        targets = array('i')
+        weights = array('d')
+        middles = array('i')
+        for node in range(count):
+            for destination, (length, middle) in upward[node]:
+                targets.append(destination)
+                weights.append(length)
+                middles.append(middle)
+            offsets.append(len(targets))
+        return ContractionHierarchy(list(snapshot.getIDs()), rank, offsets, targets, weights, middles,
+                                    snapshot.fingerprint())
+
+    # To save the hierarchy to a file
+    # Like MappedNetwork.save we write a temporary file and only put it in place once it is complete
+    def save(self, path):
+        idsBytes = json.dumps(list(self.__ids)).encode()
+        saving = f"{path}.{os.getpid()}.saving"
+        try:
+            with open(saving, "wb") as file:
+                file.write(ContractionHierarchy.HEADER.pack(ContractionHierarchy.MAGIC, ContractionHierarchy.VERSION,
+                                                            len(self), len(self.__targets), self.__fingerprint,
+                                                            len(idsBytes)))
+                file.write(idsBytes)
+                for buffer, typecode in zip((self.__rank, self.__offsets, self.__targets, self.__weights,
+                                             self.__middles), ContractionHierarchy.TYPECODES):
+                    file.write(b"\0" * ((-file.tell()) % 8))
+                    file.write(memoryview(array(typecode, buffer)).cast('B'))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(saving, path)
+        except BaseException:
+            if os.path.exists(saving):
+                os.remove(saving)
+            raise
+
+    # To open a saved hierarchy, the arrays stay in the memory-mapped file
+    # This returns None if the file is missing, broken or was made for a different network
+    @staticmethod
+    def load(path, fingerprint=None):
+        if not os.path.exists(path):
+            return None
+        file = open(path, "rb")
+        try:
+            memory = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            file.close()
+            return None
+        try:
+            magic, version, count, edges, savedFingerprint, idsLength = \
+                ContractionHierarchy.HEADER.unpack_from(memory, 0)
+        except struct.error:
+            magic = None
+        if magic != ContractionHierarchy.MAGIC or version != ContractionHierarchy.VERSION or \
+                (fingerprint != None and fingerprint != savedFingerprint):
+            memory.close()
+            file.close()
+            return None
+        start = ContractionHierarchy.HEADER.size
+        # The header tells how big every array is, so a file that is cut short is caught before
+        # anything is taken out of it
+        position = start + idsLength
+        layout = []
+        for typecode, length in zip(ContractionHierarchy.TYPECODES, (count, count + 1, edges, edges, edges)):
+            position += (-position) % 8
+            size = length * array(typecode).itemsize
+            layout.append((typecode, position, size))
+            position += size
+        try:
+            if position > len(memory):
+                raise ValueError("The hierarchy file is cut short")
+            ids = json.loads(bytes(memory[start:start + idsLength]).decode())
+            if len(ids) != count:
+                raise ValueError("The hierarchy file has the wrong number of intersections")
+        except (ValueError, TypeError):
+            memory.close()
+            file.close()
+            return None
+        view = memoryview(memory)
+        buffers = [view[position:position + size].cast(typecode) for typecode, position, size in layout]
+        view.release()
+        return ContractionHierarchy(ids, *buffers, savedFingerprint, memory, file)
@@ -0,0 +1,336 @@
+# A journal of changes to a traffic network, made by TrafficNetwork.batch
+import json
+import os
+
+from .model import House, Intersection, Road
+
+
+# The changes made to a network in a batch, in order, with IDs instead of objects
+# so they can be saved, sent to another copy of the network and replayed there.
+# Every entry is a tuple, the name of the change first:
+#   ("setLength", roadID, old, new), ("setTraffic", roadID, old, new), ("setName", roadID, old, new)
+#   ("setCoordinates", intersectionID, old, new)
+#   ("setRoadID", old, new), ("setIntersectionID", old, new), ("setHouseID", old, new)
+#   ("attach", roadID, intersectionID), ("detach", roadID, intersectionID)
+#   ("addRoad", intersectionID, road), ("removeRoad", intersectionID, roadID)
+#   ("addHouse", intersectionID, houseID), ("removeHouse", intersectionID, houseID)
+#   ("addIntersection", intersectionID, [road, ...], [houseID, ...], maxRoads, coordinates)
+#   ("removeIntersection", intersectionID)
+#   ("addNetworkRoad", road), ("removeNetworkRoad", roadID)
+#   ("addNetworkHouse", houseID, intersectionID), ("removeNetworkHouse", houseID)
+#   ("setNetworkName", old, new)
+# where a road is [ID, name, length, traffic], enough to make it again on another copy.
+class ChangeJournal:
+    # The changes of a value, where a later one replaces an earlier one
+    SETTERS = ("setLength", "setTraffic", "setName", "setCoordinates")
+    # Changes that are undone by a later change, with nothing in between about the same things
+    PAIRS = {"attach": "detach", "addRoad": "removeRoad", "addHouse": "removeHouse",
+             "addNetworkRoad": "removeNetworkRoad", "addNetworkHouse": "removeNetworkHouse"}
+    # After an ID changes the entries before and after it talk about different IDs,
+    # so compact doesn't move anything across these
+    RENAMES = ("setRoadID", "setIntersectionID", "setHouseID")
+
+    def __init__(self, entries=None):
+        self.__entries = list(entries) if entries != None else []
+
+    # Getter functions
+    def getEntries(self):
+        return self.__entries
+    def __len__(self):
+        return len(self.__entries)
+    def __iter__(self):
+        return iter(self.__entries)
+
+    def append(self, entry):
+        self.__entries.append(entry)
+    # To add the changes of a later journal, like several batches for one replica
+    def extend(self, journal):
+        self.__entries.extend(journal)
+
+    # To turn a change a network heard about into an entry, this gives None for changes
+    # that aren't worth keeping (like changes to intersections outside the network)
+    @staticmethod
+    def entry(network, item, change, details):
+        if item is network:
+            if change == "name":
+                return ("setNetworkName", details[0], network.getNetworkName())
+            if change == "addIntersection":
+                intersection = details[0]
+                return ("addIntersection", intersection.getID(),
+                        [ChangeJournal.roadSpec(road) for road in intersection.getRoads() if road != None],
+                        sorted(house.getID() for house in intersection.getHouses()), intersection.getMaxRoads(),
+                        intersection.getCoordinates())
+            if change == "removeIntersection":
+                return ("removeIntersection", details[0].getID())
+            if change == "addRoad":
+                return ("addNetworkRoad", ChangeJournal.roadSpec(details[0]))
+            if change == "removeRoad":
+                return ("removeNetworkRoad", details[0].getID())
+            if change == "addHouse":
+                location = details[0].getLocation()
+                return ("addNetworkHouse", details[0].getID(), location.getID() if location != None else None)
+            if change == "removeHouse":
+                return ("removeNetworkHouse", details[0].getID())
+            return None
+        if isinstance(item, Road):
+            if change == "length":
+                return ("setLength", item.getID(), details[0], item.getLength())
+            if change == "traffic":
+                return ("setTraffic", item.getID(), details[0], item.getTraffic())
+            if change == "name":
+                return ("setName", item.getID(), details[0], item.getName())
+            if change == "id":
+                return ("setRoadID", details[0], item.getID())
+            if change == "addIntersection":
+                return ("attach", item.getID(), details[0].getID())
+            if change == "removeIntersection":
+                return ("detach", item.getID(), details[0].getID())
+            return None
+        if isinstance(item, Intersection):
+            if change == "id":
+                return ("setIntersectionID", details[0], item.getID())
+            if change == "coordinates":
+                return ("setCoordinates", item.getID(), details[0], item.getCoordinates())
+            if change == "addRoad":
+                return ("addRoad", item.getID(), ChangeJournal.roadSpec(details[0]))
+            if change == "removeRoad":
+                return ("removeRoad", item.getID(), details[0].getID())
+            if change == "addHouse":
+                return ("addHouse", item.getID(), details[0].getID())
+            if change == "removeHouse":
+                return ("removeHouse", item.getID(), details[0].getID())
+            return None
+        if isinstance(item, House) and change == "id":
+            return ("setHouseID", details[0], item.getID())
+        return None
+
+    # What we need to make a road again
+    @staticmethod
+    def roadSpec(road):
+        return [road.getID(), road.getName(), road.getLength(), road.getTraffic()]
+
+    # To add an entry, an intersection adding a road first tells the road about it, so the
+    # "attach" of the road is part of the "addRoad" that follows it (the same for removing)
+    def record(self, entry):
+        if entry == None:
+            return
+        if self.__entries and entry[0] in ("addRoad", "removeRoad"):
+            last = self.__entries[-1]
+            roadID = entry[2][0] if entry[0] == "addRoad" else entry[2]
+            if last == ("attach" if entry[0] == "addRoad" else "detach", roadID, entry[1]):
+                self.__entries.pop()
+        self.__entries.append(entry)
+
+    # The IDs an entry is about
+    @staticmethod
+    def subjects(entry):
+        change = entry[0]
+        if change in ChangeJournal.SETTERS or change in ("removeIntersection", "removeNetworkRoad",
+                                                         "removeNetworkHouse"):
+            return {entry[1]}
+        if change == "addRoad":
+            return {entry[1], entry[2][0]}
+        if change == "addNetworkRoad":
+            return {entry[1][0]}
+        if change == "addIntersection":
+            return {entry[1]} | {road[0] for road in entry[2]} | set(entry[3])
+        if change == "setNetworkName":
+            return set()
+        return {value for value in entry[1:] if isinstance(value, str)}
+
+    # For the entries of PAIRS, the ID of what is added or removed and where
+    @staticmethod
+    def __added(entry):
+        change = entry[0]
+        if change in ("attach", "detach"):
+            return entry[1], entry[2]
+        if change in ("addRoad", "addNetworkRoad"):
+            spec = entry[2] if change == "addRoad" else entry[1]
+            return spec[0], entry[1] if change == "addRoad" else None
+        if change in ("removeRoad", "addHouse", "removeHouse"):
+            return entry[2], entry[1]
+        return entry[1], None
+
+    # A shorter journal with the same end result:
+    # - many changes of one value become one (from the first old value to the last new one),
+    #   and it goes away if the value ends where it started
+    # - something added and removed again, with nothing about it in between, goes away
+    def compact(self):
+        entries = []
+        # The entries are compacted in pieces between ID changes
+        piece = []
+        for entry in self.__entries:
+            if entry[0] in ChangeJournal.RENAMES:
+                entries.extend(ChangeJournal.__compactPiece(piece))
+                entries.append(entry)
+                piece = []
+            else:
+                piece.append(entry)
+        entries.extend(ChangeJournal.__compactPiece(piece))
+        return ChangeJournal(entries)
+
+    @staticmethod
+    def __compactPiece(entries):
+        # The last change of every value, with the first old value
+        first = {}
+        last = {}
+        for index, entry in enumerate(entries):
+            if entry[0] in ChangeJournal.SETTERS:
+                key = entry[:2]
+                first.setdefault(key, entry[2])
+                last[key] = index
+        kept = []
+        for index, entry in enumerate(entries):
+            if entry[0] in ChangeJournal.SETTERS:
+                key = entry[:2]
+                if last[key] != index or first[key] == entry[3]:
+                    continue
+                entry = (entry[0], entry[1], first[key], entry[3])
+            kept.append(entry)
+
+        # Adding and removing the same thing, until there is nothing left to cancel
+        # (a pair can be around another pair, like a house added to an intersection and the network)
+        while True:
+            removed = set()
+            for index, entry in enumerate(kept):
+                undo = ChangeJournal.PAIRS.get(entry[0])
+                if undo == None or index in removed:
+                    continue
+                thing, where = ChangeJournal.__added(entry)
+                for later in range(index + 1, len(kept)):
+                    if later in removed or thing not in ChangeJournal.subjects(kept[later]):
+                        continue
+                    other = kept[later]
+                    if other[0] == undo and ChangeJournal.__added(other) == (thing, where):
+                        removed.update((index, later))
+                    break
+            if not removed:
+                return kept
+            kept = [entry for index, entry in enumerate(kept) if index not in removed]
+
+    # To make the same changes to another copy of the network, matched by ID
+    # Everything happens in one batch there, so it is all or nothing and the copy's listeners
+    # hear about it once. A change that can't be made raises ValueError.
+    def replay(self, network):
+        with network.batch():
+            for entry in self.__entries:
+                ChangeJournal.__apply(network, entry)
+
+    @staticmethod
+    def __apply(network, entry):
+        change = entry[0]
+        if change == "setCoordinates":
+            ChangeJournal.__intersection(network, entry[1]).setCoordinates(entry[3])
+        elif change in ChangeJournal.SETTERS:
+            road = ChangeJournal.__road(network, entry[1])
+            getattr(road, change)(entry[3])
+        elif change == "setRoadID":
+            ChangeJournal.__road(network, entry[1]).setID(entry[2])
+        elif change == "setIntersectionID":
+            ChangeJournal.__intersection(network, entry[1]).setID(entry[2])
+        elif change == "setHouseID":
+            ChangeJournal.__house(network, entry[1]).setID(entry[2])
+        elif change == "setNetworkName":
+            network.setNetworkName(entry[2])
+        elif change in ("attach", "detach"):
+            road = network.getRoadByID(entry[1])
+            intersection = network.getIntersectionByID(entry[2])
+            # An intersection that isn't in the network yet gets its roads when it is added
+            if road == None or intersection == None:
+                return
+            if change == "attach" and intersection not in road.getIntersections():
+                if not road.addIntersection(intersection):
+                    raise ValueError(f"Road {entry[1]} has no free end for intersection {entry[2]}")
+            elif change == "detach":
+                road.removeIntersection(intersection)
+        elif change == "addRoad":
+            intersection = ChangeJournal.__intersection(network, entry[1])
+            road = network.getRoadByID(entry[2][0]) or Road(*entry[2])
+            if road not in intersection.getRoads():
+                if intersection.addRoad(road) != "Road added successfully":
+                    raise ValueError(f"Road {entry[2][0]} can't be added to intersection {entry[1]}")
+        elif change == "removeRoad":
+            ChangeJournal.__intersection(network, entry[1]).removeRoad(ChangeJournal.__road(network, entry[2]))
+        elif change == "addHouse":
+            intersection = ChangeJournal.__intersection(network, entry[1])
+            house = ChangeJournal.__findHouse(network, entry[2])
+            intersection.addHouse(house if house != None else House(entry[2], None))
+        elif change == "removeHouse":
+            intersection = ChangeJournal.__intersection(network, entry[1])
+            house = ChangeJournal.__findHouse(network, entry[2], intersection)
+            if house != None:
+                intersection.removeHouse(house)
+        elif change == "addIntersection":
+            if network.getIntersectionByID(entry[1]) != None:
+                return
+            roads = [network.getRoadByID(spec[0]) or Road(*spec) for spec in entry[2]]
+            intersection = Intersection.fromRoads(entry[1], roads, entry[4], entry[5])
+            for road in roads:
+                if intersection not in road.getIntersections():
+                    road.attachIntersection(intersection)
+            for houseID in entry[3]:
+                House(houseID, intersection)
+            network.addIntersection(intersection)
+        elif change == "removeIntersection":
+            network.removeIntersection(ChangeJournal.__intersection(network, entry[1]))
+        elif change == "addNetworkRoad":
+            network.addRoad(network.getRoadByID(entry[1][0]) or Road(*entry[1]))
+        elif change == "removeNetworkRoad":
+            network.removeRoad(ChangeJournal.__road(network, entry[1]))
+        elif change == "addNetworkHouse":
+            location = network.getIntersectionByID(entry[2]) if entry[2] != None else None
+            house = ChangeJournal.__findHouse(network, entry[1], location)
+            network.addHouse(house if house != None else House(entry[1], location))
+        elif change == "removeNetworkHouse":
+            network.removeHouse(ChangeJournal.__house(network, entry[1]))
+        else:
+            raise ValueError(f"Unknown change {change}")
+
+    # To look up what an entry is about, it has to be in the network
+    @staticmethod
+    def __road(network, ID):
+        road = network.getRoadByID(ID)
+        if road == None:
+            raise ValueError(f"Road {ID} is not in the network {network.getNetworkName()}")
+        return road
+    @staticmethod
+    def __intersection(network, ID):
+        intersection = network.getIntersectionByID(ID)
+        if intersection == None:
+            raise ValueError(f"Intersection {ID} is not in the network {network.getNetworkName()}")
+        return intersection
+    @staticmethod
+    def __house(network, ID):
+        house = ChangeJournal.__findHouse(network, ID)
+        if house == None:
+            raise ValueError(f"House {ID} is not in the network {network.getNetworkName()}")
+        return house
+    # Houses at an intersection aren't always added to the network, so we look there too
+    @staticmethod
+    def __findHouse(network, ID, intersection=None):
+        house = network.getHouseByID(ID)
+        if house == None and intersection != None:
+            house = next((house for house in intersection.getHouses() if house.getID() == ID), None)
+        return house
+
+    # To send or keep a journal as text
+    def toJSON(self):
+        return json.dumps(self.__entries)
+    @staticmethod
+    def fromJSON(text):
+        return ChangeJournal(tuple(entry) for entry in json.loads(text))
+
+    def save(self, path):
+        with open(path, "w") as file:
+            file.write(self.toJSON())
+
+    # To read a saved journal, this returns None if the file is missing or broken
+    @staticmethod
+    def load(path):
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as file:
+                return ChangeJournal.fromJSON(file.read())
+        except (ValueError, TypeError):
+            return None
@@ -0,0 +1,185 @@
+# Loading traffic networks from CSV and edge list files
+import csv
+import itertools
+import math
+
+from .model import House, Intersection, Road
+from .network import TrafficNetwork
+
+
+# This loads a traffic network from CSV or edge list files in one pass
+# Files ending with .csv need a header row naming the columns, any other file is an edge list
+# with whitespace separated values in the order below and # for comment lines.
+# - roads: from, to, length, then optionally id, name and traffic (the line number is used as the
+#   ID when there is none, and the traffic is "Normal")
+# - houses: id, intersection
+# - intersections (optional): id, then optionally x and y (see Intersection.getCoordinates).
+#   Without this file every intersection a road mentions is made, with it roads to unknown
+#   intersections are bad rows.
+# The files are read in chunks of lines and only the network itself is kept, never the rows.
+# Every row is checked once here, so the intersections and roads are connected directly instead
+# of through addRoad/addIntersection. Bad rows are skipped and reported in getErrors.
+# A quoted CSV value can't go over several lines.
+class NetworkLoader:
+    ROAD_COLUMNS = ("from", "to", "length", "id", "name", "traffic")
+    HOUSE_COLUMNS = ("id", "intersection")
+    INTERSECTION_COLUMNS = ("id", "x", "y")
+
+    # Only the first maxErrors bad rows are kept, the rest are just counted
+    # Every intersection can have up to maxRoads roads (Intersection.MAX_ROADS by default)
+    def __init__(self, chunkSize=100000, maxErrors=1000, maxRoads=None):
+        self.__chunkSize = chunkSize
+        self.__maxErrors = maxErrors
+        self.__maxRoads = maxRoads if maxRoads != None else Intersection.MAX_ROADS
+        self.__errors = []
+        self.__errorCount = 0
+
+    # The bad rows of the last load as (file, line number, reason)
+    def getErrors(self):
+        return self.__errors
+    def getErrorCount(self):
+        return self.__errorCount
+
+    # To load the files into a new TrafficNetwork
+    def load(self, networkName, roads, houses=None, intersections=None):
+        self.__errors = []
+        self.__errorCount = 0
+        # Intersection ID -> list of its roads, later the intersection itself
+        ends = {}
+        coordinates = {}
+        declared = intersections != None
+        if declared:
+            for line, (ID, x, y) in self.__rows(intersections, self.INTERSECTION_COLUMNS, 1):
+                if ID in ends:
+                    self.__error(intersections, line, f"intersection {ID} is listed twice")
+                    continue
+                if x != None or y != None:
+                    try:
+                        coordinates[ID] = (float(x), float(y))
+                    except (TypeError, ValueError):
+                        self.__error(intersections, line, f"intersection {ID} has bad coordinates {x!r}, {y!r}")
+                        continue
+                ends[ID] = []
+
+        trafficRoads = []
+        roadIDs = set()
+        # Most roads share a few traffic statuses, so we keep one string for each
+        statuses = {}
+        for line, (start, end, length, ID, name, traffic) in self.__rows(roads, self.ROAD_COLUMNS, 3):
+            if ID == None:
+                ID = str(line)
+            if ID in roadIDs:
+                self.__error(roads, line, f"road ID {ID} is already used")
+                continue
+            if start == end:
+                self.__error(roads, line, f"road {ID} needs two different intersections")
+                continue
+            try:
+                length = NetworkLoader.parseLength(length)
+            except ValueError:
+                self.__error(roads, line, f"road {ID} has a bad length {length!r}")
+                continue
+            startRoads = ends.get(start)
+            endRoads = ends.get(end)
+            if declared and (startRoads == None or endRoads == None):
+                self.__error(roads, line, f"road {ID} goes to an unknown intersection "
+                                          f"{start if startRoads == None else end}")
+                continue
+            if startRoads == None:
+                startRoads = ends[start] = []
+            if endRoads == None:
+                endRoads = ends[end] = []
+            maxRoads = self.__maxRoads
+            if len(startRoads) >= maxRoads or len(endRoads) >= maxRoads:
+                self.__error(roads, line, f"road {ID} would give intersection "
+                                          f"{start if len(startRoads) >= maxRoads else end} more than {maxRoads} roads")
+                continue
+            if traffic == None:
+                traffic = "Normal"
+            traffic = statuses.setdefault(traffic, traffic)
+            road = Road(ID, name if name != None else "", length, traffic)
+            roadIDs.add(ID)
+            trafficRoads.append(road)
+            startRoads.append(road)
+            endRoads.append(road)
+        roadIDs = None
+
+        # Now every intersection knows all of its roads, so we can make them
+        for ID, intersectionRoads in ends.items():
+            intersection = Intersection.fromRoads(ID, intersectionRoads, self.__maxRoads, coordinates.get(ID))
+            for road in intersectionRoads:
+                road.attachIntersection(intersection)
+            ends[ID] = intersection
+
+        trafficHouses = []
+        if houses != None:
+            houseIDs = set()
+            for line, (ID, location) in self.__rows(houses, self.HOUSE_COLUMNS, 2):
+                intersection = ends.get(location)
+                if ID in houseIDs:
+                    self.__error(houses, line, f"house ID {ID} is already used")
+                elif intersection == None:
+                    self.__error(houses, line, f"house {ID} is at an unknown intersection {location}")
+                else:
+                    houseIDs.add(ID)
+                    trafficHouses.append(House(ID, intersection))
+
+        return TrafficNetwork.fromParts(networkName, ends.values(), trafficRoads, trafficHouses)
+
+    # Road lengths stay whole numbers when they are written that way, like in the rest of the code
+    @staticmethod
+    def parseLength(text):
+        try:
+            length = int(text)
+        except ValueError:
+            length = float(text)
+        if not 0 <= length < math.inf:
+            raise ValueError(f"Bad road length {text!r}")
+        return length
+
+    def __error(self, path, line, reason):
+        self.__errorCount += 1
+        if len(self.__errors) < self.__maxErrors:
+            self.__errors.append((path, line, reason))
+
+    # This goes through the rows of a file as (line number, values in the order of columns),
+    # missing optional values are None
+    def __rows(self, path, columns, required):
+        with open(path, newline="", encoding="utf-8-sig") as file:
+            isCSV = path.lower().endswith(".csv")
+            line = 0
+            order = None
+            if isCSV:
+                header = next(csv.reader([file.readline()]), [])
+                line = 1
+                header = [name.strip().lower() for name in header]
+                missing = [name for name in columns[:required] if name not in header]
+                if missing:
+                    raise ValueError(f"{path} has no {', '.join(missing)} column")
+                order = [header.index(name) if name in header else None for name in columns]
+                width = max(index for index in order if index != None) + 1
+
+            while True:
+                chunk = list(itertools.islice(file, self.__chunkSize))
+                if not chunk:
+                    break
+                for row in (csv.reader(chunk) if isCSV else (text.split() for text in chunk)):
+                    line += 1
+                    if not row:
+                        continue
+                    if order != None:
+                        if len(row) < width:
+                            self.__error(path, line, f"expected {len(header)} values, got {len(row)}")
+                            continue
+                        row = [row[index].strip() or None if index != None else None for index in order]
+                        if None in row[:required]:
+                            self.__error(path, line, f"missing {columns[row.index(None)]}")
+                            continue
+                    else:
+                        if row[0].startswith("#"):
+                            continue
+                        if not required <= len(row) <= len(columns):
+                            self.__error(path, line, f"expected {required} to {len(columns)} values, got {len(row)}")
+                            continue
+                        row.extend([None] * (len(columns) - len(row)))
+                    yield line, row
@@ -0,0 +1,215 @@
+# Pairwise distances computed over a pool of processes and kept in memory-mapped files
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+from array import array
+
+from .model import Intersection
+from .snapshot import GraphSnapshot
+
+
+# Pairwise shortest distances between a list of intersections (usually the ones with houses)
+# The distances live in a memory-mapped file (or an anonymous map), so a later run can open the
+# file and reuse it without computing anything, and several processes can share the pages.
+# File layout: header, the intersection IDs as JSON, then a count x count table of doubles.
+class DistanceMatrix:
+    MAGIC = b"TRDM"
+    VERSION = 1
+    # magic, version, count, fingerprint, length of the IDs
+    HEADER = struct.Struct("<4sIQ16sQ")
+
+    def __init__(self, ids, fingerprint, memory, offset, file=None):
+        self.__ids = ids
+        self.__fingerprint = fingerprint
+        self.__memory = memory
+        self.__file = file
+        self.__table = memoryview(memory)[offset:offset + 8 * len(ids) * len(ids)].cast('d')
+        self.__index = {ID: i for i, ID in enumerate(ids)}
+
+    # Getter functions
+    def getIDs(self):
+        return self.__ids
+    def getFingerprint(self):
+        return self.__fingerprint
+    def getTable(self):
+        return self.__table
+
+    # The number of intersections in the matrix
+    def __len__(self):
+        return len(self.__ids)
+
+    # The position of an intersection (or its ID) in the matrix
+    def indexOf(self, intersection):
+        if isinstance(intersection, Intersection):
+            intersection = intersection.getID()
+        return self.__index[intersection]
+
+    # The distance between two intersections (or IDs)
+    def distance(self, a, b):
+        return self.__table[self.indexOf(a) * len(self) + self.indexOf(b)]
+
+    # All the distances from one intersection, in the same order as getIDs()
+    def row(self, a):
+        start = self.indexOf(a) * len(self)
+        return self.__table[start:start + len(self)]
+
+    # To write the matrix to a file, for example to share an in-memory matrix with other processes
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.__memory)
+
+    # To release the memory map and the file
+    def close(self):
+        self.__table.release()
+        self.__memory.close()
+        if self.__file != None:
+            self.__file.close()
+
+    # Where the table starts in the file, we keep it 8 byte aligned
+    @staticmethod
+    def tableOffset(idsLength):
+        offset = DistanceMatrix.HEADER.size + idsLength
+        return offset + (-offset) % 8
+
+    # To open a saved matrix, this returns None if the file is missing, broken
+    # or was made for a different network (when a fingerprint is given)
+    @staticmethod
+    def load(path, fingerprint=None):
+        if not os.path.exists(path):
+            return None
+        # Loaded matrices are only read, so read-only files work too
+        file = open(path, "rb")
+        try:
+            memory = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            file.close()
+            return None
+        try:
+            magic, version, count, savedFingerprint, idsLength = DistanceMatrix.HEADER.unpack_from(memory, 0)
+            ok = magic == DistanceMatrix.MAGIC and version == DistanceMatrix.VERSION
+            ok = ok and (fingerprint == None or fingerprint == savedFingerprint)
+            offset = DistanceMatrix.tableOffset(idsLength)
+            ok = ok and len(memory) >= offset + 8 * count * count
+        except struct.error:
+            ok = False
+        if not ok:
+            memory.close()
+            file.close()
+            return None
+        start = DistanceMatrix.HEADER.size
+        ids = json.loads(bytes(memory[start:start + idsLength]).decode())
+        return DistanceMatrix(ids, savedFingerprint, memory, offset, file)
+
+    # To build the matrix for some intersections of a snapshot
+    # We run one Dijkstra per intersection, spread over a pool of processes when there is
+    # enough work. The workers get the graph through shared memory instead of pickling
+    # objects, and write their rows straight into the memory-mapped file.
+    # Without a path the matrix is kept in memory. With a path we build into a temporary file
+    # next to it and only write the header once every row is there, then the file takes the
+    # place of the old one. A build that crashes leaves no file load would accept.
+    @staticmethod
+    def build(snapshot, intersections, path=None, processes=None):
+        stops = [snapshot.indexOf(node) for node in intersections]
+        ids = [snapshot.getIDs()[stop] for stop in stops]
+        count = len(stops)
+        fingerprint = DistanceMatrix.fingerprint(snapshot, ids)
+
+        # First we make the file (or anonymous map) with the IDs, the header comes last
+        idsBytes = json.dumps(ids).encode()
+        offset = DistanceMatrix.tableOffset(len(idsBytes))
+        size = offset + 8 * count * count
+        file = None
+        building = None
+        if path != None:
+            building = f"{path}.{os.getpid()}.building"
+            file = open(building, "w+b")
+            file.truncate(max(size, 1))
+            memory = mmap.mmap(file.fileno(), max(size, 1))
+        else:
+            memory = mmap.mmap(-1, max(size, 1))
+        memory[DistanceMatrix.HEADER.size:DistanceMatrix.HEADER.size + len(idsBytes)] = idsBytes
+        matrix = DistanceMatrix(ids, fingerprint, memory, offset, file)
+
+        try:
+            if processes == None:
+                processes = os.cpu_count() or 1
+            processes = min(processes, count)
+            if processes <= 1:
+                for row, stop in enumerate(stops):
+                    matrix.getTable()[row * count:(row + 1) * count] = array('d', snapshot.distancesTo(stop, stops))
+            else:
+                DistanceMatrix.__buildParallel(snapshot, stops, matrix, building, offset, processes)
+
+            DistanceMatrix.HEADER.pack_into(memory, 0, DistanceMatrix.MAGIC, DistanceMatrix.VERSION,
+                                            count, fingerprint, len(idsBytes))
+            if file != None:
+                memory.flush()
+                os.fsync(file.fileno())
+                matrix.close()
+                os.replace(building, path)
+        except BaseException:
+            if file != None:
+                matrix.close()
+                os.remove(building)
+            raise
+        if file != None:
+            return DistanceMatrix.load(path)
+        return matrix
+
+    # The fingerprint of a matrix is the network fingerprint plus the list of intersections
+    @staticmethod
+    def fingerprint(snapshot, ids):
+        digest = hashlib.blake2b(snapshot.fingerprint(), digest_size=16)
+        digest.update(repr(list(ids)).encode())
+        return digest.digest()
+
+    # To run the rows over a process pool
+    @staticmethod
+    def __buildParallel(snapshot, stops, matrix, path, offset, processes):
+        # The workers get the CSR buffers through one shared memory block (see GraphSnapshot.share)
+        block, layout = snapshot.share()
+        try:
+            count = len(stops)
+            with multiprocessing.Pool(processes, initializer=_matrixWorkerStart,
+                                      initargs=(block.name, layout, stops, path, offset)) as pool:
+                chunk = max(1, count // (processes * 8))
+                for row, distances in pool.imap_unordered(_matrixWorkerRow, range(count), chunk):
+                    # Without a file the workers send the rows back to us instead
+                    if distances != None:
+                        matrix.getTable()[row * count:(row + 1) * count] = distances
+        finally:
+            block.close()
+            block.unlink()
+
+
+# Worker process state for DistanceMatrix.build
+_matrixWorker = {}
+
+# This runs once in every worker, it attaches to the shared graph and the output file
+def _matrixWorkerStart(blockName, layout, stops, path, offset):
+    block, snapshot = GraphSnapshot.attach(blockName, layout)
+    _matrixWorker["block"] = block
+    _matrixWorker["snapshot"] = snapshot
+    _matrixWorker["stops"] = stops
+    _matrixWorker["table"] = None
+    if path != None:
+        file = open(path, "r+b")
+        memory = mmap.mmap(file.fileno(), 0)
+        count = len(stops)
+        _matrixWorker["file"] = file
+        _matrixWorker["memory"] = memory
+        _matrixWorker["table"] = memoryview(memory)[offset:offset + 8 * count * count].cast('d')
+
+# This computes one row of the matrix in a worker
+def _matrixWorkerRow(row):
+    stops = _matrixWorker["stops"]
+    distances = array('d', _matrixWorker["snapshot"].distancesTo(stops[row], stops))
+    table = _matrixWorker["table"]
+    if table == None:
+        return row, distances
+    table[row * len(stops):(row + 1) * len(stops)] = distances
+    return row, None
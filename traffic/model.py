@@ -0,0 +1,325 @@
+# The building blocks of a traffic network: intersections, roads and houses
+# Real maps have millions of these, so they use __slots__ instead of an instance dictionary,
+# keep their roads and intersections in tuples and share one empty set of houses.
+
+# Intersections without houses all share this, a set of their own is only made for the first house
+_noHouses = frozenset()
+
+
+# This class will define intersections
+class Intersection:
+    __slots__ = ("__ID", "__roads", "__maxRoads", "__houses", "__listeners", "__coordinates")
+
+    # How many roads an intersection can have unless it is given another maximum
+    # Real junctions and roundabouts can have more, pass maxRoads (float('inf') for no limit)
+    MAX_ROADS = 4
+
+    # This will construct an intersection,
+    # which needs at least two roads for it to be an intersection.
+    # An intersection isn't one without two roads, but a road is a road
+    # regardless of intersections.
+    # The coordinates (x, y) are optional, in meters like the road lengths
+    def __init__(self, ID, roadOne, roadTwo, maxRoads=None, coordinates=None):
+        self.__ID = ID
+        self.__listeners = ()
+        self.__coordinates = tuple(coordinates) if coordinates != None else None
+
+        # An intersection intersects at least 2 roads (edges) and at most maxRoads
+        # Here we put all the roads in a tuple for easy access
+        # But first we make sure we can add the roads to the intersection
+        self.__maxRoads = maxRoads if maxRoads != None else Intersection.MAX_ROADS
+        self.__roads = ()
+        for road in (roadOne, roadTwo):
+            if len(self.__roads) < self.__maxRoads and road.addIntersection(self) != False:
+                self.__roads = self.__roads + (road,)
+        # This will be used for houses that need delivery
+        self.__houses = _noHouses
+
+    # To make an intersection from a list of roads in one go, used by the bulk loader
+    # This skips the checks of addRoad, so the caller makes sure there are at most maxRoads
+    # roads and connects every road to the intersection (see Road.attachIntersection).
+    @staticmethod
+    def fromRoads(ID, roads, maxRoads=None, coordinates=None):
+        intersection = Intersection.__new__(Intersection)
+        intersection.__ID = ID
+        intersection.__listeners = ()
+        intersection.__coordinates = tuple(coordinates) if coordinates != None else None
+        intersection.__roads = tuple(roads)
+        intersection.__maxRoads = maxRoads if maxRoads != None else Intersection.MAX_ROADS
+        intersection.__houses = _noHouses
+        return intersection
+
+    # Objects that want to hear about changes (like the traffic network) add a listener here
+    # A listener is called as listener(intersection, change, *details)
+    # The listeners are kept in a tuple, so intersections nobody listens to share the empty one
+    def addListener(self, listener):
+        if listener not in self.__listeners:
+            self.__listeners = self.__listeners + (listener,)
+    def removeListener(self, listener):
+        self.__listeners = tuple(other for other in self.__listeners if other != listener)
+    def __notify(self, change, *details):
+        for listener in self.__listeners:
+            listener(self, change, *details)
+
+
+    # Setter/Getter functions
+    def getID(self):
+        return self.__ID
+    def setID(self, ID):
+        oldID = self.__ID
+        self.__ID = ID
+        try:
+            self.__notify("id", oldID)
+        except ValueError:
+            # A network refused the new ID because it is already used there
+            self.__ID = oldID
+            raise
+
+    # Where the intersection is as (x, y), or None if we don't know
+    def getCoordinates(self):
+        return self.__coordinates
+    def setCoordinates(self, coordinates):
+        oldCoordinates = self.__coordinates
+        self.__coordinates = tuple(coordinates) if coordinates != None else None
+        self.__notify("coordinates", oldCoordinates)
+
+    # The most roads this intersection can have
+    def getMaxRoads(self):
+        return self.__maxRoads
+
+    # Here we add/remove roads from an intersection
+    def addRoad(self, road):
+        # First we check if a road can be added
+        if len(self.__roads) < self.__maxRoads:
+            # Then we check if the road has an empty space for the intersection
+            # This will add the intersection if the road has an empty space
+            if road.addIntersection(self) == False:
+                return "Can't add road to intersection, not empty space available"
+
+            # The roads are a tuple, so we make a new one with the new road at the end
+            oldRoads = self.__roads
+            self.__roads = oldRoads + (road,)
+            try:
+                self.__notify("addRoad", road)
+            except ValueError:
+                # A network refused the road because its ID is already used there
+                self.__roads = oldRoads
+                road.removeIntersection(self)
+                raise
+            return "Road added successfully"
+        return "Road can't be added to the intersection, max number of roads reached."
+    def removeRoad(self, road):
+        # We remove the road if it is connected to the intersection
+        if road in self.__roads and road != None:
+            # We remove the intersection from the road object
+            road.removeIntersection(self)
+            # Anyone going through the old tuple of roads (like removeIntersection) isn't affected
+            self.__roads = tuple(other for other in self.__roads if other != road)
+            self.__notify("removeRoad", road)
+        return "Road has been removed"
+
+    # This helps us replace a road with another
+    def replaceRoad(self, roadReplaced, road):
+        self.removeRoad(roadReplaced)
+        self.addRoad(road)
+
+    # This returns the roads connected to the intersection
+    def getRoads(self):
+        return self.__roads
+
+    # To add/remove houses from the intersection
+    def addHouse(self, house):
+        # We are using a set for houses, so we don't need to worry about duplicates
+        if self.__houses is _noHouses:
+            self.__houses = set()
+        self.__houses.add(house)
+        # Now we update the house's location
+        house.setLocation(self)
+        self.__notify("addHouse", house)
+    def removeHouse(self, house):
+        # First we check if the house is near the intersection or not
+        if house in self.__houses:
+            self.__houses.remove(house)
+            self.__notify("removeHouse", house)
+        # Now we update the house's location
+        house.setLocation(None)
+
+    # To get houses
+    def getHouses(self):
+        return self.__houses
+
+    # To find the shortest distance between two roads
+    # This will be used for dijkstra algorithm
+    def shortestRoad(self):
+        # This will check the length of each road if available
+        # Then return the list of roads and the distance in each
+        # We will also get the destination from that road
+        edges = self.__roads
+        roadLengths = []
+        destinations = []
+        for i in range(len(edges)):
+            if edges[i] != None:
+                for posDest in edges[i].getIntersections():
+                    if posDest != self and posDest != None:
+                        roadLengths.append(edges[i].getLength())
+                        destinations.append(posDest)
+        return destinations, roadLengths
+
+    # To display intersection details:
+    def displayIntersection(self):
+        print(f"Intersection ID: {self.getID()}")
+        print(f"Roads: ")
+        if not self.getRoads():
+            print("NO ROADS ARE CONNECTED")
+            return
+        for road in self.getRoads():
+            if road != None:
+                print(f"Road name: {road.getName()}")
+                print(f"Road ID: {road.getID}")
+                return
+        print("Houses near intersection: ")
+        for house in self.getHouses():
+            print(f"House ID: {house.getID()}")
+
+# This class will define roads
+class Road:
+    __slots__ = ("__ID", "__name", "__length", "__traffic", "__intersections", "__listeners")
+
+    # This constructs a road
+    def __init__(self, ID, name, length, traffic_status):
+        self.__ID = ID
+        self.__listeners = ()
+        self.__name = name
+        self.__length = length
+        # This will be used to generate approximated time to go through this road
+        # but in this implementation it won't be a variable for showcasing simplicity
+        self.__traffic = traffic_status
+
+        # Here a road will connect two intersections at most, None is a free end
+        self.__intersections = (None, None)
+
+    # Objects that want to hear about changes (like the traffic network) add a listener here
+    # A listener is called as listener(road, change, *details), the details hold the old value
+    def addListener(self, listener):
+        if listener not in self.__listeners:
+            self.__listeners = self.__listeners + (listener,)
+    def removeListener(self, listener):
+        self.__listeners = tuple(other for other in self.__listeners if other != listener)
+    def __notify(self, change, *details):
+        for listener in self.__listeners:
+            listener(self, change, *details)
+
+    # Setter/Getter functions
+    def getID(self):
+        return self.__ID
+    def setID(self, ID):
+        oldID = self.__ID
+        self.__ID = ID
+        try:
+            self.__notify("id", oldID)
+        except ValueError:
+            # A network refused the new ID because it is already used there
+            self.__ID = oldID
+            raise
+    def getName(self):
+        return self.__name
+    def setName(self, name):
+        oldName = self.__name
+        self.__name = name
+        self.__notify("name", oldName)
+    def getLength(self):
+        return self.__length
+    def setLength(self, length):
+        oldLength = self.__length
+        self.__length = length
+        self.__notify("length", oldLength)
+    def getTraffic(self):
+        return self.__traffic
+    def setTraffic(self, traffic_status):
+        oldTraffic = self.__traffic
+        self.__traffic = traffic_status
+        self.__notify("traffic", oldTraffic)
+
+    # To add/remove intersections
+    def addIntersection(self, intersection):
+        # Check if there is an empty space
+        first, second = self.__intersections
+        if first == None or second == None:
+            self.__intersections = (intersection, second) if first == None else (first, intersection)
+            self.__notify("addIntersection", intersection)
+            return True
+        return False
+    # To put an intersection in the next free end of the road, used by the bulk loader
+    # Unlike addIntersection there are no checks and nobody is notified
+    def attachIntersection(self, intersection):
+        first, second = self.__intersections
+        self.__intersections = (intersection, second) if first == None else (first, intersection)
+    def removeIntersection(self, intersection):
+        if intersection in self.__intersections:
+            self.__intersections = tuple(None if end == intersection else end for end in self.__intersections)
+            self.__notify("removeIntersection", intersection)
+        return True
+
+    # This is to get the list of intersections connected to the road
+    def getIntersections(self):
+        return self.__intersections
+
+    # To display the road
+    def displayRoad(self):
+        print(f"Road name: {self.getName()}")
+        print(f"Road ID: {self.getID()}")
+        print("Intersections: ")
+        if self.getIntersections() == (None, None):
+            print("NO INTERSECTIONS ARE CONNECTED")
+            return
+        for intersection in range(len(self.getIntersections())):
+            if intersection != None:
+                print(f"Intersection: {self.__intersections[intersection].getID()}")
+                return
+
+
+# Class for houses to send packages to
+class House:
+    __slots__ = ("__ID", "__location", "__listeners")
+
+    # Contract the house and give it a location
+    # In this case we will connect houses to intersection
+    def __init__(self, ID, intersection):
+        self.__ID = ID
+        self.__listeners = ()
+        self.__location = intersection
+        if intersection != None:
+            intersection.addHouse(self)
+
+    # Objects that want to hear about changes (like the traffic network) add a listener here
+    # A listener is called as listener(house, change, *details)
+    def addListener(self, listener):
+        if listener not in self.__listeners:
+            self.__listeners = self.__listeners + (listener,)
+    def removeListener(self, listener):
+        self.__listeners = tuple(other for other in self.__listeners if other != listener)
+    def __notify(self, change, *details):
+        for listener in self.__listeners:
+            listener(self, change, *details)
+
+    # Setter/getter functions
+    def getID(self):
+        return self.__ID
+    def setID(self, ID):
+        oldID = self.__ID
+        self.__ID = ID
+        try:
+            self.__notify("id", oldID)
+        except ValueError:
+            # A network refused the new ID because it is already used there
+            self.__ID = oldID
+            raise
+    def getLocation(self):
+        return self.__location
+    def setLocation(self, intersection):
+        self.__location = intersection
+
+    # To display house details
+    def displayHouse(self):
+        print(f"House ID: {self.getID()}")
+        print(f"Location (Nearest intersection): {self.getLocation()}")
@@ -0,0 +1,818 @@
+# The traffic network and everything it can compute about itself
+# networkx and matplotlib are only loaded when the network is drawn, and NumPy only when travel
+# times, delivery tours or snapping many points are used, so importing this stays fast for routing workers.
+import contextlib
+import heapq
+import itertools
+import time
+
+from .model import Intersection, Road
+from .snapshot import GraphSnapshot
+from .cache import RouteCache
+from .matrix import DistanceMatrix
+from .hierarchy import ContractionHierarchy
+from .storage import MappedNetwork
+from .stats import SearchStats, StatsRecorder
+from .partition import NetworkPartition, connectedComponents
+from .journal import ChangeJournal
+from .spatial import SpatialIndex
+
+
+# This will represent the traffic network
+class TrafficNetwork:
+    # Since the whole system is connected via roads
+    # One intersection could use the roads connected to it to represent and draw the system
+    # So we will have one intersection as the parameter, then the code will do the rest
+    def __init__(self, networkName, intersection):
+        self.__networkName = networkName
+        # We will make our nodes/intersections and edges/roads in a set so no duplicates appear
+        # We will also add a set for houses
+        self.__trafficIntersections = set()
+        self.__trafficRoads = set()
+        self.__trafficHouses = set()
+
+        self.__trafficIntersections.add(intersection)
+        # This queue will save us from running into errors while iterating
+        queue = [intersection]
+
+        # This will use that one intersection to add every other intersection
+        # via traversing the roads.
+        # The set of intersections tells us which ones we already queued, so we never
+        # go through an intersection twice and checking is instant
+        for intersections in queue:
+            # We will first add the houses to the traffic network
+            # then we traverse the roads
+            for houses in intersections.getHouses():
+                self.__trafficHouses.add(houses)
+            for roads in intersections.getRoads():
+                # We get the road's intersections and add new ones.
+                # We will also add roads while doing this
+                if roads != None:
+                    # We filter None
+                    self.__trafficRoads.add(roads)
+                    for roadIntersections in roads.getIntersections():
+                        # We filter None
+                        if roadIntersections != None and roadIntersections not in self.__trafficIntersections:
+                            self.__trafficIntersections.add(roadIntersections)
+                            # Add to the queue
+                            queue.append(roadIntersections)
+
+        self.__track()
+
+    # To make a network straight from its intersections, roads and houses (see NetworkLoader)
+    # Unlike the constructor this doesn't walk the roads, so the network doesn't need to be connected
+    @staticmethod
+    def fromParts(networkName, intersections, roads, houses):
+        network = TrafficNetwork.__new__(TrafficNetwork)
+        network.__networkName = networkName
+        network.__trafficIntersections = set(intersections)
+        network.__trafficRoads = set(roads)
+        network.__trafficHouses = set(houses)
+        network.__track()
+        return network
+
+    # This sets up the ID dictionaries and starts listening to everything in the network
+    def __track(self):
+        # We keep dictionaries from ID to intersection, road and house for instant lookups
+        # IDs have to be unique, dijkstra and the other results are keyed by them
+        self.__intersectionsByID = {}
+        self.__roadsByID = {}
+        self.__housesByID = {}
+        for intersection in self.__trafficIntersections:
+            self.__register(self.__intersectionsByID, intersection, "Intersection")
+        for road in self.__trafficRoads:
+            self.__register(self.__roadsByID, road, "Road")
+        for house in self.__trafficHouses:
+            self.__register(self.__housesByID, house, "House")
+
+        # We listen to every intersection and road, so we hear about changes made directly on them
+        # and pass them on to our own listeners (see addListener)
+        self.__listeners = ()
+        self.__listener = self.__onChange
+        # The version goes up with every change, so saved results know when they are out of date
+        self.__version = 0
+        # The journal and the undo steps of the batch we are in (see batch)
+        self.__batch = None
+        self.__undoing = False
+        self.__snapshot = None
+        self.__components = None
+        self.__spatial = None
+        self.__cache = None
+        self.__stats = None
+        self.__trafficModel = None
+        self.__renderer = None
+        self.__G = None
+        self.__graphVersion = None
+        for intersection in self.__trafficIntersections:
+            intersection.addListener(self.__listener)
+        for road in self.__trafficRoads:
+            road.addListener(self.__listener)
+        for house in self.__trafficHouses:
+            house.addListener(self.__listener)
+
+    # To add an item to an ID dictionary, another item with the same ID is an error
+    def __register(self, index, item, kind):
+        other = index.get(item.getID())
+        if other != None and other is not item:
+            raise ValueError(f"{kind} ID {item.getID()} is already used in the network {self.__networkName}")
+        index[item.getID()] = item
+    def __unregister(self, index, item):
+        if index.get(item.getID()) is item:
+            del index[item.getID()]
+
+    # To look up intersections, roads and houses by their ID, this returns None if there is none
+    def getIntersectionByID(self, ID):
+        return self.__intersectionsByID.get(ID)
+    def getRoadByID(self, ID):
+        return self.__roadsByID.get(ID)
+    def getHouseByID(self, ID):
+        return self.__housesByID.get(ID)
+
+    # Objects that keep results based on the network add a listener here
+    # A listener is called as listener(item, change, *details) where the item is this network
+    # or the intersection/road that changed, and the details say what changed
+    # After a batch it is called once as listener(network, "batch", journal) instead (see batch)
+    def addListener(self, listener):
+        if listener not in self.__listeners:
+            self.__listeners = self.__listeners + (listener,)
+    def removeListener(self, listener):
+        self.__listeners = tuple(other for other in self.__listeners if other != listener)
+    def __notify(self, item, change, *details):
+        self.__version += 1
+        if self.__batch != None:
+            # Our listeners hear about the whole batch at the end (or not at all if it is undone)
+            if not self.__undoing:
+                self.__batch[0].record(ChangeJournal.entry(self, item, change, details))
+                self.__batch[1].append(self.__undoStep(item, change, details))
+            return
+        for listener in self.__listeners:
+            listener(item, change, *details)
+
+    # To make many changes as one:
+    #     with network.batch() as journal:
+    #         road.setLength(5)
+    #         network.removeIntersection(intersection)
+    # The changes are made straight away, so everything read inside the batch (dijkstra,
+    # snapshot...) sees them, but our listeners aren't told about every one of them. At the
+    # end they are called once as listener(network, "batch", journal) and rebuild what they
+    # keep once. The journal says what changed by ID, it can be saved and replayed on another
+    # copy of the network (see ChangeJournal).
+    # If anything raises inside the batch, every change made in it is undone in reverse order
+    # and the error goes on, so the network is as it was before the batch. Objects made inside
+    # the batch (like a new Road) keep whatever was done to them outside the network.
+    # A batch inside a batch is part of the outer one.
+    @contextlib.contextmanager
+    def batch(self):
+        if self.__batch != None:
+            yield self.__batch[0]
+            return
+        journal = ChangeJournal()
+        undo = []
+        self.__batch = (journal, undo)
+        try:
+            yield journal
+        except BaseException:
+            self.__undoing = True
+            try:
+                for step in reversed(undo):
+                    if step != None:
+                        step()
+            finally:
+                self.__undoing = False
+                self.__batch = None
+            raise
+        self.__batch = None
+        if len(journal):
+            for listener in self.__listeners:
+                listener(self, "batch", journal)
+
+    # How to undo one change, or None for changes that don't need it
+    # The steps run in reverse order, and a change often comes with others (an intersection
+    # adding a road also tells the road), so every step checks if it still has something to do
+    def __undoStep(self, item, change, details):
+        if item is self:
+            target = details[0]
+            if change == "name":
+                return lambda: self.setNetworkName(target)
+            if change == "addIntersection":
+                return lambda: self.__forgetIntersection(target)
+            if change == "removeIntersection":
+                return lambda: self.addIntersection(target)
+            if change == "addRoad":
+                return lambda: self.removeRoad(target)
+            if change == "removeRoad":
+                return lambda: self.addRoad(target)
+            if change == "addHouse":
+                return lambda: self.removeHouse(target)
+            if change == "removeHouse":
+                return lambda: self.addHouse(target)
+            return None
+        if change == "id":
+            return lambda: item.setID(details[0])
+        if isinstance(item, Road):
+            if change in ("length", "traffic", "name"):
+                setter = {"length": item.setLength, "traffic": item.setTraffic, "name": item.setName}[change]
+                return lambda: setter(details[0])
+            if change == "addIntersection":
+                return lambda: item.removeIntersection(details[0])
+            if change == "removeIntersection":
+                return lambda: details[0] not in item.getIntersections() and item.addIntersection(details[0])
+            return None
+        if isinstance(item, Intersection):
+            target = details[0]
+            if change == "coordinates":
+                return lambda: item.setCoordinates(target)
+            if change == "addRoad":
+                return lambda: target in item.getRoads() and item.removeRoad(target)
+            if change == "removeRoad":
+                return lambda: target not in item.getRoads() and item.addRoad(target)
+            if change == "addHouse":
+                return lambda: item.removeHouse(target)
+            if change == "removeHouse":
+                return lambda: item.addHouse(target)
+        return None
+
+    # To undo addIntersection, unlike removeIntersection this leaves the roads of the
+    # intersection alone and only forgets what the network learned from it
+    def __forgetIntersection(self, intersection):
+        if intersection not in self.__trafficIntersections:
+            return
+        self.__trafficIntersections.remove(intersection)
+        self.__unregister(self.__intersectionsByID, intersection)
+        intersection.removeListener(self.__listener)
+        if self.__spatial != None:
+            self.__spatial.remove(intersection)
+        for road in intersection.getRoads():
+            if road in self.__trafficRoads and \
+                    not any(end in self.__trafficIntersections for end in road.getIntersections()):
+                self.__trafficRoads.remove(road)
+                self.__unregister(self.__roadsByID, road)
+                road.removeListener(self.__listener)
+        for house in intersection.getHouses():
+            if house in self.__trafficHouses:
+                self.__trafficHouses.remove(house)
+                self.__unregister(self.__housesByID, house)
+                house.removeListener(self.__listener)
+
+    # The structural version of the network
+    # Every change to the network, its intersections or its roads increases it
+    def getVersion(self):
+        return self.__version
+
+    # This is called by our intersections and roads when they change
+    def __onChange(self, item, change, *details):
+        # A road added to one of our intersections becomes part of the network
+        if change == "addRoad" and isinstance(item, Intersection) and details[0] not in self.__trafficRoads:
+            self.__register(self.__roadsByID, details[0], "Road")
+            self.__trafficRoads.add(details[0])
+            details[0].addListener(self.__listener)
+            # Undone after the road is taken off the intersection again (the steps run in reverse)
+            if self.__batch != None and not self.__undoing:
+                self.__batch[1].append(lambda road=details[0]: self.removeRoad(road))
+        # When an ID changes we move it in the ID dictionary
+        if change == "id":
+            if isinstance(item, Intersection):
+                index, members, kind = self.__intersectionsByID, self.__trafficIntersections, "Intersection"
+            elif isinstance(item, Road):
+                index, members, kind = self.__roadsByID, self.__trafficRoads, "Road"
+            else:
+                index, members, kind = self.__housesByID, self.__trafficHouses, "House"
+            if item in members:
+                other = index.get(item.getID())
+                if other != None and other is not item:
+                    raise ValueError(f"{kind} ID {item.getID()} is already used in the network {self.__networkName}")
+                if index.get(details[0]) is item:
+                    del index[details[0]]
+                index[item.getID()] = item
+        # The spatial index keeps intersections in cells by their coordinates
+        if change == "coordinates" and self.__spatial != None and item in self.__trafficIntersections:
+            self.__spatial.move(item, details[0])
+        self.__notify(item, change, *details)
+
+    # Setter/getter functions
+    def getNetworkName(self):
+        return self.__networkName
+    def setNetworkName(self, name):
+        oldName = self.__networkName
+        self.__networkName = name
+        self.__notify(self, "name", oldName)
+
+    # To add/remove intersections to the network
+    def addIntersection(self, intersection):
+        isNew = intersection not in self.__trafficIntersections
+        # First we make sure none of the IDs are taken, so we don't add half of it
+        roads = [road for road in intersection.getRoads() if road != None]
+        for index, items, kind in ((self.__intersectionsByID, [intersection], "Intersection"),
+                                   (self.__roadsByID, roads, "Road"),
+                                   (self.__housesByID, intersection.getHouses(), "House")):
+            for item in items:
+                other = index.get(item.getID())
+                if other != None and other is not item:
+                    raise ValueError(f"{kind} ID {item.getID()} is already used in the network {self.__networkName}")
+        # Since we are using sets we don't have to worry about duplicates
+        self.__trafficIntersections.add(intersection)
+        self.__intersectionsByID[intersection.getID()] = intersection
+        intersection.addListener(self.__listener)
+        # We will also add the associated roads
+        for road in roads:
+            self.__trafficRoads.add(road)
+            self.__roadsByID[road.getID()] = road
+            road.addListener(self.__listener)
+        # We also add traffic houses to the system
+        for house in intersection.getHouses():
+            self.__trafficHouses.add(house)
+            self.__housesByID[house.getID()] = house
+            house.addListener(self.__listener)
+        if isNew:
+            if self.__spatial != None:
+                self.__spatial.add(intersection)
+            self.__notify(self, "addIntersection", intersection)
+    def removeIntersection(self, intersection):
+        # Since roads still depend on other intersections we will only remove the intersection
+        # But we will make sure the intersection isn't connected to the road anymore
+        # We will check if the intersection exists to avoid errors
+        # We also remove houses associated with this intersection
+        if intersection in self.__trafficIntersections:
+            self.__trafficIntersections.remove(intersection)
+            self.__unregister(self.__intersectionsByID, intersection)
+            for road in intersection.getRoads():
+                intersection.removeRoad(road)
+            for house in intersection.getHouses():
+                if house in self.__trafficHouses:
+                    self.__trafficHouses.remove(house)
+                    self.__unregister(self.__housesByID, house)
+                    house.removeListener(self.__listener)
+            intersection.removeListener(self.__listener)
+            if self.__spatial != None:
+                self.__spatial.remove(intersection)
+            self.__notify(self, "removeIntersection", intersection)
+        return True
+
+    # To get traffic intersections
+    def getIntersections(self):
+        return self.__trafficIntersections
+
+    # To add/remove roads
+    def addRoad(self, road):
+        # Again we are using sets, we don't have to worry about duplicates
+        if road not in self.__trafficRoads:
+            self.__register(self.__roadsByID, road, "Road")
+            self.__trafficRoads.add(road)
+            road.addListener(self.__listener)
+            self.__notify(self, "addRoad", road)
+    def removeRoad(self, road):
+        # We check if the road exist to avoid errors
+        if road in self.__trafficRoads:
+            self.__trafficRoads.remove(road)
+            self.__unregister(self.__roadsByID, road)
+            # Our intersections still use the road if it is connected to them,
+            # so we keep listening to it in that case
+            if not any(end in self.__trafficIntersections for end in road.getIntersections()):
+                road.removeListener(self.__listener)
+            self.__notify(self, "removeRoad", road)
+        return True
+
+    # To get traffic roads
+    def getRoads(self):
+        return self.__trafficRoads
+
+    # To add/remove and get houses
+    def addHouse(self, house):
+        # We are using a set for houses, so we don't need to worry about duplicates
+        if house not in self.__trafficHouses:
+            self.__register(self.__housesByID, house, "House")
+            self.__trafficHouses.add(house)
+            house.addListener(self.__listener)
+            self.__notify(self, "addHouse", house)
+    def removeHouse(self, house):
+        # First we check if the house is near the intersection or not
+        if house in self.__trafficHouses:
+            self.__trafficHouses.remove(house)
+            self.__unregister(self.__housesByID, house)
+            house.removeListener(self.__listener)
+            self.__notify(self, "removeHouse", house)
+    # To get houses
+    def getHouses(self):
+        return self.__trafficHouses
+
+
+    # To keep the results of dijkstra and packageDistribution in a cache
+    # Repeated queries from the same intersection then become dictionary lookups until the
+    # network changes. The cached dictionaries are shared, so they must not be modified.
+    def enableCache(self, maxBytes=64 * 1024 * 1024):
+        self.__cache = RouteCache(maxBytes)
+        return self.__cache
+    def disableCache(self):
+        self.__cache = None
+    def getCache(self):
+        return self.__cache
+
+    # To measure what dijkstra and packageDistribution do (heap operations, relaxations, time per
+    # phase), every call gives a SearchStats to the recorder and its exporters (see StatsRecorder)
+    # When this is off the searches only check that it is off, a few times per call.
+    def enableStats(self, *exporters):
+        self.__stats = StatsRecorder(*exporters)
+        return self.__stats
+    def disableStats(self):
+        self.__stats = None
+    def getStats(self):
+        return self.__stats
+
+    # Dijkstra algorithm for shortest route to houses
+    # With componentOnly the dictionaries only have the intersections that can be reached
+    # (the component of current), instead of inf for every other intersection in the network
+    def dijkstra(self, current, componentOnly=False):
+        stats = self.__stats
+        if stats != None:
+            start = time.perf_counter()
+            source = current.getID()
+        # If we already answered this since the last change, we reuse the answer
+        if self.__cache != None:
+            key = ("dijkstra", current, self.__version) if not componentOnly else \
+                  ("dijkstra", current, self.__version, "component")
+            cached = self.__cache.get(key)
+            if cached != None:
+                if stats != None:
+                    stats.record(SearchStats("dijkstra", source, cacheHit=True,
+                                             phases={"cache": time.perf_counter() - start}))
+                return cached
+
+        # This dictionary holds the shortest distance from our current location.
+        # The previous dictionary holds the previous intersection to help us get
+        # To the designated intersection in the shortest distance possible.
+        nodes = self.__trafficIntersections if not componentOnly else self.component(current)
+        distances = {node.getID(): float('inf') for node in nodes}
+        previous = {node.getID(): None for node in nodes}
+        houses = {}
+        distances[current.getID()] = 0
+
+        # To keep track of visited nodes/intersections
+        visited = set()
+        # Roads looked at from settled intersections, one addition per intersection (for the stats)
+        relaxations = 0
+
+        # Priority queue for visiting unvisited nodes
+        # Intersections can't be compared, so the counter decides between equal distances
+        order = itertools.count()
+        pq = [(0, next(order), current)]
+        if stats != None:
+            searchStart = time.perf_counter()
+
+        # Now we keep going until the queue is empty, this will make sure we went through every node
+        while pq:
+            # Pop the node with the smallest distance
+            currentLength, unused, current = heapq.heappop(pq)
+
+            # Skip if already visited
+            if current in visited:
+                continue
+
+            # Mark current node as visited
+            visited.add(current)
+
+            # We retrieve the destinations from the current node and their length
+            destinations, roadLengths = current.shortestRoad()
+            relaxations += len(destinations)
+
+            # Update distances and previous for each destination based on current and new distance
+            for destination, length in zip(destinations, roadLengths):
+                # Calculate new distance
+                new_distance = distances[current.getID()] + length
+
+                # If the new distance is shorter, update distances, previous, and houses
+                if new_distance < distances[destination.getID()]:
+                    distances[destination.getID()] = new_distance
+                    previous[destination.getID()] = current.getID()
+                    houses[destination.getID()] = len(destination.getHouses())
+
+
+                    # Push the destination to the priority queue with its updated distance
+                    heapq.heappush(pq, (new_distance, next(order), destination))
+
+
+        if stats != None:
+            sortStart = time.perf_counter()
+        # Sort the dictionaries based on intersection IDs
+        sorted_distances = dict(sorted(distances.items()))
+        sorted_previous = dict(sorted(previous.items()))
+        sorted_houses = dict(sorted(houses.items()))
+
+        result = sorted_distances, sorted_previous, sorted_houses
+        if stats != None:
+            self.__recordSearch(stats, source, next(order), len(visited), relaxations,
+                                {"setup": searchStart - start, "search": sortStart - searchStart,
+                                 "sort": time.perf_counter() - sortStart})
+        if self.__cache != None:
+            self.__cache.put(key, result)
+        return result
+
+
+    # The other counters are worked out after the search, so the search loop doesn't pay for them:
+    # every push took a number from the counter, the queue ends empty so every push was popped,
+    # and a pop was stale unless it settled an intersection
+    def __recordSearch(self, stats, source, pushes, settled, relaxations, phases):
+        stats.record(SearchStats("dijkstra", source, pushes=pushes, pops=pushes, stalePops=pushes - settled,
+                                 relaxations=relaxations, improvements=pushes - 1, settled=settled,
+                                 phases=phases))
+
+    # The connected pieces of the network, biggest first, as lists of intersections
+    # After removeIntersection a network can fall apart, and nothing in one piece can be reached
+    # from another. We keep the pieces until the network changes.
+    def components(self):
+        labels, count, members = self.__componentLabels()
+        return sorted(members, key=len, reverse=True)
+
+    # The intersections in the same piece of the network as this one (it included)
+    def component(self, intersection):
+        labels, count, members = self.__componentLabels()
+        return members[labels[self.snapshot().indexOf(intersection)]]
+
+    def __componentLabels(self):
+        if self.__components == None or self.__components[0] != self.__version:
+            snapshot = self.snapshot()
+            labels, count = connectedComponents(snapshot)
+            members = [[] for component in range(count)]
+            for node, component in enumerate(labels):
+                members[component].append(snapshot.getIntersection(node))
+            self.__components = (self.__version, (labels, count, members))
+        return self.__components[1]
+
+    # To split the network into districts of about districtSize intersections (see NetworkPartition)
+    # Call preprocess on it for fast distances between districts, and planDistribution to plan the
+    # deliveries of every district from its own depot, both run the districts in parallel
+    def partition(self, districtSize=1000, snapshot=None):
+        if snapshot == None:
+            snapshot = self.snapshot()
+        return NetworkPartition(snapshot, districtSize)
+
+    # This gives a frozen, compact copy of the network for fast routing
+    # The snapshot won't see later changes, but we keep it until the network changes
+    def snapshot(self):
+        if self.__snapshot == None or self.__snapshot[0] != self.__version:
+            self.__snapshot = (self.__version, GraphSnapshot.fromIntersections(self.__trafficIntersections))
+        return self.__snapshot[1]
+
+    # To save the network to a binary file that loads in milliseconds (see MappedNetwork)
+    def save(self, path):
+        MappedNetwork.save(self, path)
+
+    # To open a saved network, the file is memory-mapped and nothing is built until it is needed
+    # This returns a MappedNetwork (or None if the file is missing or broken), call toNetwork on
+    # it to get a TrafficNetwork with all the objects back
+    @staticmethod
+    def load(path):
+        return MappedNetwork.open(path)
+
+    # To find a route from one intersection to another
+    # The method can be "dijkstra", "bidirectional" or "astar" (see GraphSnapshot.route)
+    # The network keeps its snapshot until something changes, so repeated routes are cheap.
+    def route(self, source, target, method="dijkstra", landmarks=None, coordinates=None, snapshot=None):
+        if snapshot == None:
+            snapshot = self.snapshot()
+        return snapshot.route(source, target, method, landmarks, coordinates)
+
+    # The spatial index of the intersections that have coordinates (see SpatialIndex)
+    # It is made the first time it is needed, then we keep it up to date as intersections are
+    # added, removed or moved
+    def spatialIndex(self):
+        if self.__spatial == None:
+            self.__spatial = SpatialIndex(self.__trafficIntersections)
+        return self.__spatial
+
+    # The intersection closest to a point, or None if no intersection has coordinates
+    def nearestIntersection(self, x, y):
+        nearest = self.spatialIndex().nearest(x, y)
+        return nearest[0][0] if nearest else None
+
+    # The intersections inside a box, borders included
+    def intersectionsWithin(self, minX, minY, maxX, maxY):
+        return self.spatialIndex().within(minX, minY, maxX, maxY)
+
+    # To find the closest intersection of many points at once, like new orders with coordinates
+    # This returns the intersections and a NumPy array with how far each point is from its intersection
+    def snapPoints(self, points):
+        return self.spatialIndex().snap(points)
+
+    # The intersections we can reach within limit of current, closest first, as (intersection, distance)
+    # This is a generator over a search that stops at the limit, so "everything within 3 km of
+    # the van" only looks at the roads within 3 km instead of running dijkstra on the whole city
+    def isochrone(self, current, limit, snapshot=None):
+        if snapshot == None:
+            snapshot = self.snapshot()
+        return ((snapshot.getIntersection(node), distance)
+                for node, distance in snapshot.isochrone(snapshot.indexOf(current), limit))
+
+    # The k closest intersections with houses, as (intersection, distance), closest first
+    # k=None gives all of them (within the limit), the search stops as soon as we have k
+    def nearestHouses(self, current, k, limit=float('inf'), snapshot=None):
+        if snapshot == None:
+            snapshot = self.snapshot()
+        return ((snapshot.getIntersection(node), distance)
+                for node, distance, houses in snapshot.nearestHouses(snapshot.indexOf(current), k, limit))
+
+    # Up to k different routes between two intersections as Route objects, shortest first
+    # Fallbacks for when a road on the best one is jammed (see GraphSnapshot.kShortestRoutes)
+    def alternativeRoutes(self, source, target, k=3, snapshot=None):
+        if snapshot == None:
+            snapshot = self.snapshot()
+        return [snapshot.toRoute(*found)
+                for found in snapshot.kShortestRoutes(snapshot.indexOf(source), snapshot.indexOf(target), k)]
+
+    # To get the pairwise distances between intersections, by default the ones with houses
+    # If the path points to a matrix saved for the same network and intersections, we reuse it
+    # instead of computing it again. Otherwise it is computed over a pool of processes.
+    def distanceMatrix(self, path=None, intersections=None, processes=None, snapshot=None):
+        if snapshot == None:
+            snapshot = self.snapshot()
+        if intersections == None:
+            intersections = [snapshot.getIDs()[node] for node in range(len(snapshot))
+                             if snapshot.getHouses()[node] > 0]
+        if path != None:
+            ids = [node.getID() if isinstance(node, Intersection) else node for node in intersections]
+            saved = DistanceMatrix.load(path, DistanceMatrix.fingerprint(snapshot, ids))
+            if saved != None:
+                return saved
+        return DistanceMatrix.build(snapshot, intersections, path, processes)
+
+    # To get a contraction hierarchy of the network for very fast distance queries
+    # If the path points to a hierarchy saved for the same network we load it,
+    # otherwise we build it (this can take a while on big networks) and save it there.
+    def contractionHierarchy(self, path=None, snapshot=None):
+        if snapshot == None:
+            snapshot = self.snapshot()
+        if path != None:
+            saved = ContractionHierarchy.load(path, snapshot.fingerprint())
+            if saved != None:
+                return saved
+        hierarchy = ContractionHierarchy.build(snapshot)
+        if path != None:
+            hierarchy.save(path)
+        return hierarchy
+
+    # The traffic model of the network, it turns traffic status and time of day into travel times
+    # We keep one model per network so the speed profiles set on it are kept
+    def trafficModel(self):
+        if self.__trafficModel == None:
+            # The cost model uses NumPy, so it is only loaded once travel times are needed
+            from .costs import TrafficCostModel
+            self.__trafficModel = TrafficCostModel(self)
+        return self.__trafficModel
+
+    # Like dijkstra, but with travel times in seconds instead of lengths
+    # With a departure time (seconds after midnight) the time of day speed profiles are used,
+    # and when timeDependent is True each road uses the speed at the time we reach it
+    def travelTimes(self, current, departure=None, timeDependent=False):
+        return self.trafficModel().dijkstra(current, departure, timeDependent)
+
+    # A simulation of the traffic on the network that writes the statuses of the roads as it
+    # goes, the options are those of TrafficSimulation
+    def trafficSimulation(self, **options):
+        # The simulation uses NumPy, so it is only loaded when it is needed
+        from .simulation import TrafficSimulation
+        return TrafficSimulation(self, **options)
+
+    # To plan a delivery tour from an intersection through every intersection with houses
+    # This returns the intersection IDs in visiting order and the total length. The distances
+    # come from distanceMatrix (pass a path to reuse them between runs).
+    def deliveryTour(self, start, timeBudget=1.0, returnToStart=True, path=None, processes=None):
+        snapshot = self.snapshot()
+        startID = start.getID() if isinstance(start, Intersection) else start
+        stops = [startID] + [snapshot.getIDs()[node] for node in range(len(snapshot))
+                             if snapshot.getHouses()[node] > 0 and snapshot.getIDs()[node] != startID]
+        matrix = self.distanceMatrix(path, stops, processes, snapshot)
+        # Like the cost model, the tour optimizer uses NumPy so we only load it here
+        from .tours import TourOptimizer
+        return TourOptimizer(matrix, startID, returnToStart=returnToStart).optimize(timeBudget)
+
+    # To plan routes for a fleet of vehicles leaving from a depot
+    # Every vehicle carries at most capacity packages (one per house). This returns one
+    # (intersection IDs, length, packages) per vehicle, see FleetPlanner.
+    def planFleet(self, depot, vehicles, capacity, timeBudget=1.0, processes=None, path=None):
+        distances, previous, houses_count = self.dijkstra(depot)
+        depotID = depot.getID()
+        # Only the intersections with houses we can actually reach need a visit
+        demands = {ID: count for ID, count in houses_count.items()
+                   if count > 0 and distances[ID] != float('inf') and ID != depotID}
+        matrix = self.distanceMatrix(path, [depotID] + sorted(demands), processes)
+        from .tours import FleetPlanner
+        return FleetPlanner(matrix, depotID, demands, path).plan(vehicles, capacity, timeBudget, processes)
+
+    # To distribute packages
+    def packageDistribution(self, distances, houses_count):
+        stats = self.__stats
+        if stats != None:
+            start = time.perf_counter()
+        # When these dictionaries came from the cache, the order might be saved too
+        if self.__cache != None:
+            key = self.__cache.distributionKey(distances, houses_count)
+            if key != None:
+                cached = self.__cache.get(key)
+                if cached != None:
+                    if stats != None:
+                        stats.record(SearchStats("packageDistribution", items=len(cached), cacheHit=True,
+                                                 phases={"cache": time.perf_counter() - start}))
+                    return cached
+        if stats != None:
+            combineStart = time.perf_counter()
+
+        # Combine distances and houses count into a single dictionary for each intersection
+        intersections_info = {intersection_id: (distances[intersection_id], houses_count.get(intersection_id, 0)) for
+                              intersection_id in distances}
+
+        if stats != None:
+            sortStart = time.perf_counter()
+        # Sort intersections based on distance and then by the number of houses
+        sorted_intersections = sorted(intersections_info.items(), key=lambda x: (x[1][0], -x[1][1]))
+
+        if stats != None:
+            extractStart = time.perf_counter()
+        # Extract the sorted intersection IDs
+        sorted_intersection_ids = [intersection_id for intersection_id, _ in sorted_intersections]
+        if stats != None:
+            stats.record(SearchStats("packageDistribution", items=len(sorted_intersection_ids),
+                                     phases={"cache": combineStart - start, "combine": sortStart - combineStart,
+                                             "sort": extractStart - sortStart,
+                                             "extract": time.perf_counter() - extractStart}))
+
+        if self.__cache != None and key != None:
+            self.__cache.put(key, sorted_intersection_ids)
+        # Return the sorted intersections
+        return sorted_intersection_ids
+
+    # A simulation of package orders and deliveries from a depot, to try dispatch policies
+    # (see DispatchSimulation for the options)
+    def dispatchSimulation(self, depot, **options):
+        from .dispatch import DispatchSimulation
+        return DispatchSimulation(self, depot, **options)
+
+    # A local HTTP service answering routes from this network for many clients (see RoutingService)
+    # Start it with run() or, inside a running event loop, with await start()
+    def routingService(self, host="127.0.0.1", port=8080, processes=None, maxSearches=None):
+        from .service import RoutingService
+        return RoutingService(self, host, port, processes, maxSearches)
+
+    # The renderer of the network, it keeps the layout between drawings (see NetworkRenderer)
+    def renderer(self):
+        if self.__renderer == None:
+            from .rendering import NetworkRenderer
+            self.__renderer = NetworkRenderer(self)
+        return self.__renderer
+
+    # To draw the network to a PNG or SVG file, this works without a display
+    # The viewport (left, bottom, right, top) zooms in, see NetworkRenderer.render for the options
+    def render(self, path, viewport=None, **options):
+        return self.renderer().render(path, viewport, **options)
+
+    # To initialize the graph
+    # Every time the network changes we need to initialize it for optimal results
+    # If nothing changed since the last time, the graph we have is still right
+    def initializeNetwork(self):
+        if self.__G != None and self.__graphVersion == self.__version:
+            return
+        # We are going to create the graph using networkx and matplotlib
+        # They take a while to import, so we only load them when the network is drawn
+        import networkx as nx
+        self.__graphVersion = self.__version
+        self.__G = nx.Graph()
+        # Now we add the intersections as nodes but will make sure their ID is outputted
+        nodes = []
+        for node in self.__trafficIntersections:
+            nodes.append(node.getID())
+
+        # Now we add them as nodes
+        self.__G.add_nodes_from(nodes)
+
+        # Next we add the edges
+        edges = []
+        for edge in self.__trafficRoads:
+            # Here we add the two intersections connected and the length of the road as a tuple
+            # But we filter out edges that don't connect two nodes
+            # This temp list will hold intersection for this specific road
+            temp = edge.getIntersections()
+            if None not in temp:
+                edges.append((temp[0].getID(), temp[1].getID(), edge.getLength()))
+
+        # Now we add the edges
+        self.__G.add_weighted_edges_from(edges)
+
+    # To show the network
+    # With a path the picture is saved there instead of opening a window (see render)
+    def showNetwork(self, path=None):
+        if path != None:
+            return self.render(path)
+        import networkx as nx
+        import matplotlib.pyplot as plt
+        self.initializeNetwork()
+        # The renderer keeps the positions, so only new intersections need a place
+        pos = self.renderer().layout()
+
+        # Increase the figure size for better visibility
+        plt.figure(figsize=(10, 8))
+
+        # Draw the graph with edge weights
+        nx.draw(self.__G, pos, with_labels=True, node_color='skyblue', node_size=800, font_size=12, font_weight='bold')
+        edge_labels = nx.get_edge_attributes(self.__G, 'weight')
+        nx.draw_networkx_edge_labels(self.__G, pos, edge_labels=edge_labels)
+
+        # Display the graph
+        plt.show()
@@ -0,0 +1,352 @@
+# Connected components and districts of a traffic network
+import heapq
+import multiprocessing
+import os
+from array import array
+
+from .snapshot import GraphSnapshot
+
+
+# To find the connected pieces of a snapshot
+# This gives the component number of every intersection and the number of components.
+# Components are numbered in the order of their first intersection (so in ID order).
+def connectedComponents(snapshot):
+    offsets = snapshot.getOffsets()
+    targets = snapshot.getTargets()
+    labels = array('i', [-1]) * len(snapshot)
+    count = 0
+    for start in range(len(snapshot)):
+        if labels[start] >= 0:
+            continue
+        labels[start] = count
+        queue = [start]
+        for node in queue:
+            for edge in range(offsets[node], offsets[node + 1]):
+                target = targets[edge]
+                if labels[target] < 0:
+                    labels[target] = count
+                    queue.append(target)
+        count += 1
+    return labels, count
+
+
+# Dijkstra that stays inside one district (the intersections whose label is the district)
+# This gives the distances of the district intersections it reached, and stops early once
+# every stop is settled when stops are given
+def districtTree(snapshot, labels, district, source, stops=None):
+    offsets = snapshot.getOffsets()
+    targets = snapshot.getTargets()
+    weights = snapshot.getWeights()
+    inf = float('inf')
+    distances = {source: 0}
+    remaining = set(stops) if stops != None else None
+    pq = [(0, source)]
+    while pq:
+        currentLength, current = heapq.heappop(pq)
+        if currentLength > distances[current]:
+            continue
+        if remaining != None:
+            remaining.discard(current)
+            if not remaining:
+                break
+        for edge in range(offsets[current], offsets[current + 1]):
+            destination = targets[edge]
+            if labels[destination] != district:
+                continue
+            new_distance = currentLength + weights[edge]
+            if new_distance < distances.get(destination, inf):
+                distances[destination] = new_distance
+                heapq.heappush(pq, (new_distance, destination))
+    return distances
+
+
+# One district of a partition, a piece of one component
+# The boundary intersections are the ones with a road to another district.
+class District:
+    def __init__(self, number, component, nodes, boundary, ids):
+        self.__number = number
+        self.__component = component
+        self.__nodes = nodes
+        self.__boundary = boundary
+        self.__ids = ids
+
+    # Getter functions
+    def getNumber(self):
+        return self.__number
+    def getComponent(self):
+        return self.__component
+    # The snapshot indexes of the intersections and of the boundary intersections
+    def getNodes(self):
+        return self.__nodes
+    def getBoundary(self):
+        return self.__boundary
+    def getIntersectionIDs(self):
+        return [self.__ids[node] for node in self.__nodes]
+    def getBoundaryIDs(self):
+        return [self.__ids[node] for node in self.__boundary]
+
+    # The number of intersections in the district
+    def __len__(self):
+        return len(self.__nodes)
+
+    def __repr__(self):
+        return (f"District({self.__number}, component {self.__component}, {len(self.__nodes)} intersections, "
+                f"{len(self.__boundary)} on the boundary)")
+
+
+# This splits a network snapshot into districts of about districtSize intersections
+# Every component is split on its own, so a district never spans two components, and small
+# components are one district each. A component is split in two again and again: we find two
+# intersections far apart (by number of roads), and the intersections closer to the first one
+# go to one half. The halves are sized so every district ends up about as big as the others.
+# preprocess() then works out, for every district in parallel, the distances between its boundary
+# intersections inside the district. A distance query only searches the districts of the source
+# and the target and crosses the other districts through those tables, and intersections in
+# different components are answered without searching at all.
+class NetworkPartition:
+    def __init__(self, snapshot, districtSize=1000):
+        self.__snapshot = snapshot
+        self.__districtSize = districtSize
+        self.__components, self.__componentCount = connectedComponents(snapshot)
+        self.__labels = array('i', [-1]) * len(snapshot)
+        # The BFS of the splits marks what it has seen with a stamp, so nothing needs clearing
+        self.__seen = array('i', [-1]) * len(snapshot)
+        self.__stamp = 0
+        self.__hops = array('i', [0]) * len(snapshot)
+
+        members = [[] for component in range(self.__componentCount)]
+        for node, component in enumerate(self.__components):
+            members[component].append(node)
+        self.__districts = []
+        for component, nodes in enumerate(members):
+            parts = -(-len(nodes) // districtSize)
+            for part in self.__split(nodes, parts):
+                part.sort()
+                for node in part:
+                    self.__labels[node] = len(self.__districts)
+                self.__districts.append((component, part))
+
+        offsets = snapshot.getOffsets()
+        targets = snapshot.getTargets()
+        labels = self.__labels
+        ids = snapshot.getIDs()
+        districts = []
+        for number, (component, nodes) in enumerate(self.__districts):
+            boundary = [node for node in nodes
+                        if any(labels[targets[edge]] != number for edge in range(offsets[node], offsets[node + 1]))]
+            districts.append(District(number, component, nodes, boundary, ids))
+        self.__districts = districts
+        # Filled by preprocess: boundary intersection -> [(other boundary intersection, distance)]
+        self.__shortcuts = None
+
+    # Getter functions
+    def getSnapshot(self):
+        return self.__snapshot
+    def getDistrictSize(self):
+        return self.__districtSize
+    def getDistricts(self):
+        return self.__districts
+    # The district and component number of every intersection, indexed like the snapshot
+    def getLabels(self):
+        return self.__labels
+    def getComponentLabels(self):
+        return self.__components
+    def getComponentCount(self):
+        return self.__componentCount
+    def isPreprocessed(self):
+        return self.__shortcuts != None
+
+    # The district or component of an intersection (or its ID)
+    def districtOf(self, intersection):
+        return self.__districts[self.__labels[self.__snapshot.indexOf(intersection)]]
+    def componentOf(self, intersection):
+        return self.__components[self.__snapshot.indexOf(intersection)]
+
+    # The intersection IDs of every component, biggest first
+    def components(self):
+        members = [[] for component in range(self.__componentCount)]
+        ids = self.__snapshot.getIDs()
+        for node, component in enumerate(self.__components):
+            members[component].append(ids[node])
+        members.sort(key=len, reverse=True)
+        return members
+
+    # To split a list of intersections into parts of about the same size
+    def __split(self, nodes, parts):
+        if parts <= 1 or len(nodes) <= 1:
+            return [nodes]
+        # Two intersections far apart: the furthest from any one, then the furthest from that
+        # (intersections a search didn't reach in this part count as far away)
+        far = len(nodes)
+        first = self.__farthest(nodes, self.__farthest(nodes, nodes[0]))
+        firstHops = {node: self.__hops[node] if self.__seen[node] == self.__stamp else far for node in nodes}
+        self.__farthest(nodes, first)
+        reached = self.__stamp
+        # Closer to the first one and further from the second one go first
+        order = sorted(nodes, key=lambda node: (self.__hops[node] if self.__seen[node] == reached else far)
+                       - firstHops[node])
+        left = parts // 2
+        middle = len(nodes) * left // parts
+        return self.__split(order[:middle], left) + self.__split(order[middle:], parts - left)
+
+    # BFS inside a set of intersections, this gives the last intersection reached and keeps
+    # the number of roads to every intersection in hops (seen is set to this search's stamp)
+    def __farthest(self, nodes, start):
+        # The intersections we may use get the stamp of this search, and we mark the ones
+        # we reached with the next one
+        self.__stamp += 1
+        inside = self.__stamp
+        for node in nodes:
+            self.__seen[node] = inside
+        self.__stamp += 1
+        reached = self.__stamp
+        offsets = self.__snapshot.getOffsets()
+        targets = self.__snapshot.getTargets()
+        seen = self.__seen
+        hops = self.__hops
+        seen[start] = reached
+        hops[start] = 0
+        queue = [start]
+        for node in queue:
+            for edge in range(offsets[node], offsets[node + 1]):
+                target = targets[edge]
+                if seen[target] == inside:
+                    seen[target] = reached
+                    hops[target] = hops[node] + 1
+                    queue.append(target)
+        return queue[-1]
+
+    # To work out the distances between the boundary intersections of every district
+    # The districts are spread over a pool of processes that read the snapshot from shared memory
+    def preprocess(self, processes=None):
+        tasks = [(district.getNumber(), district.getBoundary()) for district in self.__districts
+                 if len(district.getBoundary()) > 1]
+        shortcuts = {}
+        for district, boundary, table in _runDistricts(self.__snapshot, self.__labels, _districtWorkerTable,
+                                                       tasks, processes):
+            count = len(boundary)
+            for row, node in enumerate(boundary):
+                shortcuts[node] = [(boundary[column], table[row * count + column]) for column in range(count)
+                                   if column != row and table[row * count + column] != float('inf')]
+        self.__shortcuts = shortcuts
+        return self
+
+    # The length of the shortest route between two intersections (or IDs), inf if there is none
+    # Without preprocess this is a normal search, inside the component of the source only.
+    # With it we search the districts of the source and target road by road, and go through
+    # the other districts from boundary to boundary with the preprocessed distances.
+    def distance(self, source, target):
+        snapshot = self.__snapshot
+        source = snapshot.indexOf(source)
+        target = snapshot.indexOf(target)
+        if self.__components[source] != self.__components[target]:
+            return float('inf')
+        offsets = snapshot.getOffsets()
+        targets = snapshot.getTargets()
+        weights = snapshot.getWeights()
+        labels = self.__labels
+        shortcuts = self.__shortcuts
+        local = (labels[source], labels[target])
+        inf = float('inf')
+
+        distances = {source: 0}
+        pq = [(0, source)]
+        while pq:
+            currentLength, current = heapq.heappop(pq)
+            if current == target:
+                return currentLength
+            if currentLength > distances[current]:
+                continue
+            district = labels[current]
+            crossing = shortcuts != None and district not in local
+            for edge in range(offsets[current], offsets[current + 1]):
+                destination = targets[edge]
+                # In the other districts we only take the roads that leave the district
+                if crossing and labels[destination] == district:
+                    continue
+                new_distance = currentLength + weights[edge]
+                if new_distance < distances.get(destination, inf):
+                    distances[destination] = new_distance
+                    heapq.heappush(pq, (new_distance, destination))
+            if crossing:
+                for destination, length in shortcuts.get(current, ()):
+                    new_distance = currentLength + length
+                    if new_distance < distances.get(destination, inf):
+                        distances[destination] = new_distance
+                        heapq.heappush(pq, (new_distance, destination))
+        return inf
+
+    # To plan the deliveries of every district from its own depot, the districts in parallel
+    # The depots are {district number: intersection (or ID)}, a district without one starts
+    # from its intersection with the most houses. This gives {district number: intersection IDs}
+    # in the order packageDistribution would give inside the district: closest first, then the
+    # ones with the most houses. Intersections the depot can't reach inside the district go last.
+    def planDistribution(self, depots=None, processes=None):
+        snapshot = self.__snapshot
+        houses = snapshot.getHouses()
+        tasks = []
+        for district in self.__districts:
+            depot = (depots or {}).get(district.getNumber())
+            if depot != None:
+                depot = snapshot.indexOf(depot)
+            else:
+                depot = max(district.getNodes(), key=lambda node: (houses[node], -node))
+            tasks.append((district.getNumber(), depot, district.getNodes()))
+        ids = snapshot.getIDs()
+        return {district: [ids[node] for node in order]
+                for district, order in _runDistricts(snapshot, self.__labels, _districtWorkerPlan, tasks, processes)}
+
+
+# To run one task per district, over a pool of processes when there is more than one district
+def _runDistricts(snapshot, labels, work, tasks, processes):
+    if processes == None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+    if processes <= 1:
+        _districtWorker["snapshot"] = snapshot
+        _districtWorker["labels"] = labels
+        try:
+            return [work(task) for task in tasks]
+        finally:
+            _districtWorker.clear()
+    block, layout = snapshot.share()
+    try:
+        with multiprocessing.Pool(processes, initializer=_districtWorkerStart,
+                                  initargs=(block.name, layout, labels)) as pool:
+            return pool.map(work, tasks, max(1, len(tasks) // (processes * 4)))
+    finally:
+        block.close()
+        block.unlink()
+
+
+# Worker process state for NetworkPartition
+_districtWorker = {}
+
+# This runs once in every worker, it attaches to the shared snapshot
+def _districtWorkerStart(blockName, layout, labels):
+    block, snapshot = GraphSnapshot.attach(blockName, layout)
+    _districtWorker["block"] = block
+    _districtWorker["snapshot"] = snapshot
+    _districtWorker["labels"] = labels
+
+# The boundary table of one district, row by row
+def _districtWorkerTable(task):
+    district, boundary = task
+    snapshot = _districtWorker["snapshot"]
+    labels = _districtWorker["labels"]
+    table = array('d')
+    for node in boundary:
+        distances = districtTree(snapshot, labels, district, node, boundary)
+        table.extend(distances.get(other, float('inf')) for other in boundary)
+    return district, boundary, table
+
+# The delivery order of one district
+def _districtWorkerPlan(task):
+    district, depot, nodes = task
+    snapshot = _districtWorker["snapshot"]
+    houses = snapshot.getHouses()
+    distances = districtTree(snapshot, _districtWorker["labels"], district, depot)
+    inf = float('inf')
+    # Like dijkstra, the depot itself doesn't count its houses
+    order = sorted(nodes, key=lambda node: (distances.get(node, inf), -houses[node] if node != depot else 0))
+    return district, order
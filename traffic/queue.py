@@ -0,0 +1,86 @@
+# The queue of packages waiting to be delivered
+from collections import deque
+
+
+# Packages are handed out first come, first served
+# The packages are in a deque, so pushing and processing don't move the rest of the queue like
+# popping the front of a list does. Cancelling doesn't search the queue either: we count the
+# cancelled packages and skip them when their turn comes (the first one pushed is the one that
+# gets cancelled, like removing it from a list would).
+class Queue:
+    def __init__(self):
+        self.__packages = deque()
+        # Package -> how many of it are waiting, and how many of those were cancelled
+        self.__waiting = {}
+        self.__cancelled = {}
+        self.__size = 0
+
+    # Packages waiting, cancelled ones left out
+    def __len__(self):
+        return self.__size
+
+    # The packages waiting in the order they will be processed
+    def getPackages(self):
+        skipped = dict(self.__cancelled)
+        packages = []
+        for package in self.__packages:
+            if skipped.get(package, 0) > 0:
+                skipped[package] -= 1
+            else:
+                packages.append(package)
+        return packages
+
+    # The packages waiting, in place of the queue attribute of the list based queue
+    # It is a tuple, so changing it raises instead of changing a copy that is thrown away:
+    # changes go through pushPackage, cancelPackage and processPackage
+    @property
+    def queue(self):
+        return tuple(self.getPackages())
+
+    def pushPackage(self, house):
+        self.__packages.append(house)
+        self.__waiting[house] = self.__waiting.get(house, 0) + 1
+        self.__size += 1
+
+    # This returns False when the package isn't waiting
+    def cancelPackage(self, house):
+        if self.__waiting.get(house, 0) <= self.__cancelled.get(house, 0):
+            return False
+        self.__cancelled[house] = self.__cancelled.get(house, 0) + 1
+        self.__size -= 1
+        return True
+
+    # The next package, None when there are none
+    def processPackage(self):
+        package = self.peekPackage()
+        if package is None:
+            print("No packages in the queue.")
+            return None
+        self.__packages.popleft()
+        self.__forget(package)
+        self.__size -= 1
+        return package
+
+    # The next package without taking it out, None when there are none
+    def peekPackage(self):
+        packages = self.__packages
+        while packages:
+            package = packages[0]
+            cancelled = self.__cancelled.get(package, 0)
+            if cancelled == 0:
+                return package
+            # A cancelled package got to the front, it goes now
+            packages.popleft()
+            self.__forget(package)
+            if cancelled == 1:
+                del self.__cancelled[package]
+            else:
+                self.__cancelled[package] = cancelled - 1
+        return None
+
+    def __forget(self, package):
+        count = self.__waiting[package]
+        if count == 1:
+            del self.__waiting[package]
+        else:
+            self.__waiting[package] = count - 1
@@ -0,0 +1,241 @@
+# Drawing traffic networks to files with layouts that are kept between drawings
+import json
+import random
+
+import numpy as np
+
+
+# This draws a traffic network (or a saved MappedNetwork) to a PNG or SVG file, no display needed
+# The position of every intersection is kept in a layout cache, so drawing again after an edit
+# only places the new intersections: each one starts next to its placed neighbours, and on small
+# networks a short spring layout then moves only the new ones.
+# The first layout is a spring layout for small networks. networkx can't do that on big ones
+# without SciPy (and it would take minutes), so there we use pivot MDS: shortest route trees
+# from a few far apart intersections, projected to 2D, which keeps road networks close to their map.
+# With too many intersections in view we draw districts instead (the view is split into a grid
+# of cells and each cell is one circle, sized by its intersections and coloured by its houses),
+# and road lengths are only written on the roads when we are zoomed in close enough to read them.
+class NetworkRenderer:
+    def __init__(self, network, springLimit=500, pivots=24, seed=42):
+        self.__network = network
+        self.__springLimit = springLimit
+        self.__pivots = pivots
+        self.__seed = seed
+        # Intersection ID -> (x, y)
+        self.__positions = {}
+        # The snapshot the layout was made for and the positions in its order
+        self.__snapshot = None
+        self.__xy = None
+
+    # Getter functions
+    def getNetwork(self):
+        return self.__network
+    def getPositions(self):
+        return self.__positions
+
+    # To get the position of every intersection (ID -> (x, y)), only new intersections get placed
+    def layout(self):
+        snapshot = self.__network.snapshot()
+        if snapshot is self.__snapshot:
+            return self.__positions
+        ids = list(snapshot.getIDs())
+        # Intersections that left the network lose their place
+        positions = {ID: self.__positions[ID] for ID in ids if ID in self.__positions}
+        missing = [node for node, ID in enumerate(ids) if ID not in positions]
+        if missing and not positions:
+            if len(ids) <= self.__springLimit:
+                positions = self.__springLayout(snapshot, ids, {}, None)
+            else:
+                positions = self.__pivotLayout(snapshot, ids)
+        elif missing:
+            fixed = list(positions)
+            self.__placeNear(snapshot, ids, positions, missing)
+            if len(ids) <= self.__springLimit:
+                positions = self.__springLayout(snapshot, ids, positions, fixed)
+
+        self.__positions = positions
+        self.__snapshot = snapshot
+        self.__xy = np.array([positions[ID] for ID in ids], dtype=float).reshape(len(ids), 2)
+        return positions
+
+    # To keep a layout between runs
+    def saveLayout(self, path):
+        with open(path, "w") as file:
+            json.dump([[ID, x, y] for ID, (x, y) in self.layout().items()], file)
+    def loadLayout(self, path):
+        with open(path) as file:
+            self.__positions = {ID: (x, y) for ID, x, y in json.load(file)}
+        self.__snapshot = None
+
+    # The roads of the snapshot as two arrays of intersection indexes, every road once
+    @staticmethod
+    def edges(snapshot):
+        offsets = np.asarray(snapshot.getOffsets(), dtype=np.int64)
+        targets = np.asarray(snapshot.getTargets(), dtype=np.int64)
+        sources = np.repeat(np.arange(len(snapshot)), np.diff(offsets))
+        keep = sources < targets
+        return sources[keep], targets[keep], np.flatnonzero(keep)
+
+    # Spring layout with networkx, the fixed intersections keep their place
+    def __springLayout(self, snapshot, ids, positions, fixed):
+        import networkx as nx
+        graph = nx.Graph()
+        graph.add_nodes_from(ids)
+        sources, targets, edges = NetworkRenderer.edges(snapshot)
+        graph.add_edges_from((ids[a], ids[b]) for a, b in zip(sources.tolist(), targets.tolist()))
+        if fixed:
+            layout = nx.spring_layout(graph, pos=positions, fixed=fixed, iterations=20, seed=self.__seed)
+        else:
+            layout = nx.spring_layout(graph, seed=self.__seed)
+        return {ID: (float(x), float(y)) for ID, (x, y) in layout.items()}
+
+    # Pivot MDS: the distances from a few pivots are the coordinates of every intersection in a
+    # small space, and the two main directions of that space give the picture
+    def __pivotLayout(self, snapshot, ids):
+        count = len(ids)
+        pivots = min(self.__pivots, count)
+        distances = np.empty((count, pivots))
+        closest = np.full(count, np.inf)
+        pivot = random.Random(self.__seed).randrange(count)
+        for column in range(pivots):
+            distances[:, column] = snapshot.shortestPathTree(pivot)[0]
+            closest = np.minimum(closest, distances[:, column])
+            # The next pivot is the intersection furthest from all the pivots so far
+            # (intersections we can't reach at all come first, so every piece of the network gets one)
+            pivot = int(np.argmax(closest))
+        finite = np.isfinite(distances)
+        distances[~finite] = distances[finite].max() * 1.5 if finite.any() else 0
+
+        squared = distances ** 2
+        centered = -0.5 * (squared - squared.mean(axis=0) - squared.mean(axis=1)[:, None] + squared.mean())
+        vectors, values, unused = np.linalg.svd(centered, full_matrices=False)
+        xy = np.zeros((count, 2))
+        dimensions = min(2, len(values))
+        xy[:, :dimensions] = vectors[:, :dimensions] * values[:dimensions]
+        # Same range as the spring layout, -1 to 1 around the middle
+        xy -= xy.mean(axis=0)
+        scale = np.abs(xy).max()
+        if scale > 0:
+            xy /= scale
+        return {ID: (float(x), float(y)) for ID, (x, y) in zip(ids, xy)}
+
+    # New intersections start at the middle of their placed neighbours (with a little jitter so
+    # they don't land on each other). Every round places the ones next to something placed.
+    def __placeNear(self, snapshot, ids, positions, missing):
+        generator = random.Random(self.__seed)
+        spread = max((max(abs(x), abs(y)) for x, y in positions.values()), default=1) or 1
+        jitter = 0.02 * spread
+        pending = missing
+        while pending:
+            waiting = []
+            for node in pending:
+                near = [positions[ids[target]] for target, length in snapshot.neighbours(node)
+                        if ids[target] in positions]
+                if near:
+                    positions[ids[node]] = (sum(x for x, y in near) / len(near) + generator.uniform(-jitter, jitter),
+                                            sum(y for x, y in near) / len(near) + generator.uniform(-jitter, jitter))
+                else:
+                    waiting.append(node)
+            if len(waiting) == len(pending):
+                # Nothing placed is connected to these, so they get a random spot
+                for node in waiting:
+                    positions[ids[node]] = (generator.uniform(-spread, spread), generator.uniform(-spread, spread))
+                break
+            pending = waiting
+
+    # To draw the network to a file, the format comes from the file name (.png, .svg, .pdf)
+    # The viewport is (left, bottom, right, top) in layout coordinates, by default everything.
+    # Up to maxNodes intersections in view are drawn one by one, with their IDs up to labelNodes
+    # and the road lengths up to edgeLabelNodes. More than maxNodes are drawn as districts.
+    def render(self, path, viewport=None, size=(10, 8), dpi=100, maxNodes=2000, labelNodes=100,
+               edgeLabelNodes=50, cells=40):
+        # matplotlib only gets loaded when we draw, and we never use pyplot so no display is needed
+        from matplotlib.figure import Figure
+
+        self.layout()
+        snapshot = self.__snapshot
+        xy = self.__xy
+        if viewport == None:
+            if len(xy):
+                (left, bottom), (right, top) = xy.min(axis=0), xy.max(axis=0)
+            else:
+                left, bottom, right, top = -1, -1, 1, 1
+            margin = 0.05 * max(right - left, top - bottom, 1e-9)
+            viewport = (left - margin, bottom - margin, right + margin, top + margin)
+        left, bottom, right, top = viewport
+        visible = (xy[:, 0] >= left) & (xy[:, 0] <= right) & (xy[:, 1] >= bottom) & (xy[:, 1] <= top)
+
+        figure = Figure(figsize=size)
+        axes = figure.add_subplot()
+        axes.set_xlim(left, right)
+        axes.set_ylim(bottom, top)
+        axes.set_axis_off()
+        if int(visible.sum()) > maxNodes:
+            self.__drawDistricts(axes, snapshot, xy, visible, viewport, cells)
+            detail = "districts"
+        else:
+            self.__drawIntersections(axes, snapshot, xy, visible, labelNodes, edgeLabelNodes)
+            detail = "intersections"
+        axes.set_title(f"{self.__network.getNetworkName()} ({int(visible.sum())} intersections in view, "
+                       f"drawn as {detail})")
+        figure.savefig(path, dpi=dpi)
+        return path
+
+    def __drawIntersections(self, axes, snapshot, xy, visible, labelNodes, edgeLabelNodes):
+        from matplotlib.collections import LineCollection
+        sources, targets, edges = NetworkRenderer.edges(snapshot)
+        shown = visible[sources] | visible[targets]
+        sources, targets, edges = sources[shown], targets[shown], edges[shown]
+        axes.add_collection(LineCollection(np.stack([xy[sources], xy[targets]], axis=1),
+                                           colors="gray", linewidths=1, zorder=1))
+
+        nodes = np.flatnonzero(visible)
+        count = len(nodes)
+        # The closer we are, the bigger the intersections
+        markerSize = 800 if count <= labelNodes else max(4, 800 * labelNodes / count)
+        houses = np.asarray(snapshot.getHouses())[nodes]
+        axes.scatter(xy[nodes, 0], xy[nodes, 1], s=markerSize, zorder=2,
+                     c=np.where(houses > 0, "orange", "skyblue"))
+        if count <= labelNodes:
+            ids = snapshot.getIDs()
+            for node in nodes.tolist():
+                axes.text(xy[node, 0], xy[node, 1], str(ids[node]), ha="center", va="center",
+                          fontsize=12, fontweight="bold", zorder=3)
+        if count <= edgeLabelNodes:
+            weights = snapshot.getWeights()
+            for a, b, edge in zip(sources.tolist(), targets.tolist(), edges.tolist()):
+                axes.text((xy[a, 0] + xy[b, 0]) / 2, (xy[a, 1] + xy[b, 1]) / 2, str(weights[edge]),
+                          ha="center", va="center", fontsize=9, zorder=3,
+                          bbox={"boxstyle": "round", "facecolor": "white", "edgecolor": "none"})
+
+    def __drawDistricts(self, axes, snapshot, xy, visible, viewport, cells):
+        from matplotlib.collections import LineCollection
+        left, bottom, right, top = viewport
+        # Every intersection in view goes to the grid cell it is in
+        column = np.clip(((xy[:, 0] - left) / (right - left) * cells).astype(np.int64), 0, cells - 1)
+        row = np.clip(((xy[:, 1] - bottom) / (top - bottom) * cells).astype(np.int64), 0, cells - 1)
+        cell = np.where(visible, row * cells + column, -1)
+        nodes = np.flatnonzero(visible)
+        counts = np.bincount(cell[nodes], minlength=cells * cells)
+        used = counts > 0
+        centres = np.zeros((cells * cells, 2))
+        centres[:, 0] = np.bincount(cell[nodes], weights=xy[nodes, 0], minlength=cells * cells)
+        centres[:, 1] = np.bincount(cell[nodes], weights=xy[nodes, 1], minlength=cells * cells)
+        centres[used] /= counts[used, None]
+        houses = np.bincount(cell[nodes], weights=np.asarray(snapshot.getHouses(), dtype=float)[nodes],
+                             minlength=cells * cells)
+
+        # Roads between two districts are drawn once per pair, thicker when there are more of them
+        sources, targets, edges = NetworkRenderer.edges(snapshot)
+        a, b = cell[sources], cell[targets]
+        between = (a >= 0) & (b >= 0) & (a != b)
+        pairs, roads = np.unique(np.minimum(a, b)[between] * (cells * cells) + np.maximum(a, b)[between],
+                                 return_counts=True)
+        first, second = pairs // (cells * cells), pairs % (cells * cells)
+        axes.add_collection(LineCollection(np.stack([centres[first], centres[second]], axis=1), colors="gray",
+                                           linewidths=0.5 + np.log1p(roads), zorder=1))
+
+        sizes = counts[used] / counts.max() * 300
+        colours = axes.scatter(centres[used, 0], centres[used, 1], s=sizes, c=houses[used] / counts[used],
+                               cmap="YlOrRd", edgecolors="black", linewidths=0.5, zorder=2)
+        axes.figure.colorbar(colours, ax=axes, label="houses per intersection", shrink=0.6)
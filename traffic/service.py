@@ -0,0 +1,382 @@
+# A local routing service, many driver clients asking one network for routes over HTTP
+# Run it with: python -m traffic.service --load city.trnw (or --city grid 10000) --port 8080
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+from .snapshot import GraphSnapshot
+
+
+# The reason phrases of the statuses we answer with
+_reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+# Raised when there are already as many searches running as we allow
+class ServiceBusy(Exception):
+    pass
+
+
+# This serves the routes of a traffic network (or a saved MappedNetwork) over plain HTTP/1.1
+# GET /route?source=A&target=B    the shortest route, {"length", "intersections"}
+# GET /dijkstra?source=A          the same dictionaries as TrafficNetwork.dijkstra
+# GET /distribution?source=A      the order of TrafficNetwork.packageDistribution
+# GET /stats                      the counters of the service
+# The event loop only parses requests and writes answers, the searches run on a pool of
+# processes that read the network snapshot from shared memory (see GraphSnapshot.share).
+# - Every kind of request is answered from the shortest path tree of its source. Requests that
+#   need the tree of a source while it is being searched wait for that search instead of starting
+#   their own, so a hundred drivers leaving the same depot cost one search, whatever they ask for.
+# - At most maxSearches searches are queued or running. Past that new searches are answered
+#   with 503 and a Retry-After header straight away, instead of piling up in memory while
+#   every answer gets slower. Every connection is answered in order and we wait for slow
+#   readers to take their answers before reading their next request.
+# When the network changes the next search makes a new snapshot and a new pool, the old pool
+# finishes its searches in the background. A pool that lost a worker is replaced by a new one
+# on the same snapshot and the job that broke it runs once more.
+class RoutingService:
+    def __init__(self, network, host="127.0.0.1", port=8080, processes=None, maxSearches=None):
+        self.__network = network
+        self.__host = host
+        self.__port = port
+        self.__processes = processes if processes != None else (os.cpu_count() or 1)
+        self.__maxSearches = maxSearches if maxSearches != None else 4 * self.__processes
+        self.__server = None
+        # The pool and its shared memory are made for one snapshot
+        self.__snapshot = None
+        self.__pool = None
+        self.__block = None
+        self.__layout = None
+        self.__generation = 0
+        self.__retiring = set()
+        # (kind, source, generation) -> the running search ("tree") or the answer made from it
+        self.__searches = {}
+        self.__requests = 0
+        self.__searchCount = 0
+        self.__coalesced = 0
+        self.__rejected = 0
+
+    # Getter functions
+    def getNetwork(self):
+        return self.__network
+    def getHost(self):
+        return self.__host
+    # The port we listen on, with port 0 this is the one the system picked
+    def getPort(self):
+        return self.__port
+    def getMaxSearches(self):
+        return self.__maxSearches
+    # Requests answered, searches run, requests that joined a running search and requests
+    # turned away because too many searches were running
+    def getRequests(self):
+        return self.__requests
+    def getSearches(self):
+        return self.__searchCount
+    def getCoalesced(self):
+        return self.__coalesced
+    def getRejected(self):
+        return self.__rejected
+    def getRunning(self):
+        return len(self.__searches)
+
+    # To start listening, this returns the port
+    async def start(self):
+        self.__update()
+        self.__server = await asyncio.start_server(self.__handle, self.__host, self.__port)
+        self.__port = self.__server.sockets[0].getsockname()[1]
+        return self.__port
+
+    # To stop listening and shut the pool down
+    async def close(self):
+        if self.__server != None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+        await asyncio.gather(*self.__retiring)
+        if self.__pool != None:
+            await asyncio.get_running_loop().run_in_executor(None, RoutingService.__retire,
+                                                             self.__pool, self.__block)
+            self.__pool = None
+            self.__block = None
+            self.__snapshot = None
+
+    # To serve until the task is cancelled
+    async def serveForever(self):
+        await self.start()
+        try:
+            await self.__server.serve_forever()
+        finally:
+            await self.close()
+
+    # To serve until Ctrl+C or until the process is asked to stop (SIGTERM)
+    def run(self):
+        try:
+            asyncio.run(self.__serveUntilStopped())
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+
+    async def __serveUntilStopped(self):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, AttributeError):
+            # Windows has no SIGTERM handlers in asyncio
+            pass
+        await self.serveForever()
+
+    # A new snapshot needs a new pool, the workers can't see changes to the old shared memory
+    def __update(self):
+        snapshot = self.__network.snapshot()
+        if snapshot is self.__snapshot:
+            return
+        oldPool, oldBlock = self.__pool, self.__block
+        self.__block, self.__layout = snapshot.share()
+        self.__snapshot = snapshot
+        self.__startPool()
+        self.__generation += 1
+        if oldPool != None:
+            self.__retireLater(oldPool, oldBlock)
+
+    # A pool of workers attached to the shared memory of the snapshot
+    # Forked workers would keep a copy of every connection that is open when they start, and a
+    # connection we close would stay open for the client. So the workers come from a fork server
+    # (or are spawned where there is none), which doesn't hand them our sockets.
+    def __startPool(self):
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.__pool = ProcessPoolExecutor(self.__processes, mp_context=context, initializer=_serviceWorkerStart,
+                                          initargs=(self.__block.name, self.__layout,
+                                                    list(self.__snapshot.getIDs())))
+
+    def __retireLater(self, pool, block):
+        task = asyncio.ensure_future(asyncio.get_running_loop().run_in_executor(
+            None, RoutingService.__retire, pool, block))
+        self.__retiring.add(task)
+        task.add_done_callback(self.__retiring.discard)
+
+    # The shared memory can only go once the workers of the pool are done with it
+    # A broken pool is retired without it (block is None), its replacement still uses it
+    @staticmethod
+    def __retire(pool, block):
+        pool.shutdown(wait=True)
+        if block != None:
+            block.close()
+            block.unlink()
+
+    # To run a job on the pool of the snapshot the request was for
+    # If a worker died the pool is broken for good, so we replace it (once, whichever job notices
+    # first) and run the job once more. Jobs for an older snapshot can't go to the new pool.
+    async def __run(self, pool, generation, function, *arguments):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, function, *arguments)
+        except BrokenProcessPool:
+            if generation != self.__generation:
+                raise
+            if self.__pool is pool:
+                self.__startPool()
+                self.__retireLater(pool, None)
+            return await loop.run_in_executor(self.__pool, function, *arguments)
+
+    # To start a job, or wait for the same job if it is already running
+    # A job that is part of one we already let in (admitted) doesn't count against maxSearches
+    async def __shared(self, key, start, admitted=False):
+        future = self.__searches.get(key)
+        if future != None:
+            self.__coalesced += 1
+        else:
+            if len(self.__searches) >= self.__maxSearches and not admitted:
+                self.__rejected += 1
+                raise ServiceBusy()
+            future = asyncio.ensure_future(start())
+            self.__searches[key] = future
+            if key[0] == "tree":
+                self.__searchCount += 1
+            future.add_done_callback(lambda done: self.__searches.pop(key, None))
+        # A client that goes away must not cancel the job for everyone else waiting on it
+        return await asyncio.shield(future)
+
+    # The shortest path tree of a source ("tree"), or the JSON answer of the other kinds made
+    # from it. The JSON is made on the pool too, so the event loop doesn't build big answers.
+    async def __search(self, kind, source):
+        pool, generation = self.__pool, self.__generation
+
+        def tree(admitted):
+            return self.__shared(("tree", source, generation),
+                                 lambda: self.__run(pool, generation, _serviceWorkerSearch, source), admitted)
+
+        async def answer():
+            distances, previous = await tree(True)
+            return await self.__run(pool, generation, _serviceWorkerAnswer, kind, source, distances, previous)
+
+        if kind == "tree":
+            return await tree(False)
+        return await self.__shared((kind, source, generation), answer)
+
+    # To answer one request, this gives the status, the body and any extra headers
+    async def __respond(self, method, target):
+        if method != "GET":
+            return 405, {"error": "only GET is supported"}, ()
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if url.path == "/stats":
+            return 200, {"requests": self.__requests, "searches": self.__searchCount,
+                         "coalesced": self.__coalesced, "rejected": self.__rejected,
+                         "running": len(self.__searches), "maxSearches": self.__maxSearches}, ()
+        kinds = {"/route": "tree", "/dijkstra": "dijkstra", "/distribution": "distribution"}
+        if url.path not in kinds:
+            return 404, {"error": f"unknown path {url.path}"}, ()
+        names = ("source", "target") if url.path == "/route" else ("source",)
+        missing = [name for name in names if name not in query]
+        if missing:
+            return 400, {"error": f"missing {', '.join(missing)}"}, ()
+
+        self.__update()
+        snapshot = self.__snapshot
+        try:
+            nodes = [snapshot.indexOf(query[name]) for name in names]
+        except KeyError as error:
+            return 404, {"error": f"unknown intersection {error.args[0]}"}, ()
+        try:
+            result = await self.__search(kinds[url.path], nodes[0])
+        except ServiceBusy:
+            return 503, {"error": "too many searches running, try again"}, (("Retry-After", "1"),)
+        if url.path != "/route":
+            # The workers already made the JSON
+            return 200, result, ()
+
+        distances, previous = result
+        target = nodes[1]
+        if distances[target] == float('inf'):
+            return 200, {"source": query["source"], "target": query["target"], "length": None,
+                         "intersections": []}, ()
+        path = [target]
+        while path[-1] != nodes[0]:
+            path.append(previous[path[-1]])
+        ids = snapshot.getIDs()
+        length = distances[target]
+        # The tree comes back as doubles, whole number road lengths give whole number routes
+        if snapshot.getWeightType() == 'q':
+            length = int(length)
+        return 200, {"source": query["source"], "target": query["target"], "length": length,
+                     "intersections": [ids[node] for node in reversed(path)]}, ()
+
+    # One client connection, requests are answered in order until the client closes it
+    async def __handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    keepAlive = True
+                    while True:
+                        header = await reader.readline()
+                        if header in (b"\r\n", b"\n", b""):
+                            break
+                        name, unused, value = header.decode("latin-1").partition(":")
+                        if name.strip().lower() == "connection":
+                            keepAlive = value.strip().lower() != "close"
+                except (ValueError, asyncio.LimitOverrunError):
+                    # A line longer than the limit of the stream, we can't tell where the
+                    # request ends so we answer and close the connection
+                    line = None
+                    keepAlive = False
+                parts = line.decode("latin-1").split() if line != None else None
+                if parts == None:
+                    status, body, headers = 400, {"error": "request line or header too long"}, ()
+                elif len(parts) != 3:
+                    status, body, headers = 400, {"error": "bad request line"}, ()
+                    keepAlive = False
+                else:
+                    method, target, version = parts
+                    if version == "HTTP/1.0":
+                        keepAlive = False
+                    try:
+                        status, body, headers = await self.__respond(method, target)
+                    except Exception as error:
+                        # Like a worker that died, the connection and the service go on
+                        status, body, headers = 500, {"error": repr(error)}, ()
+                self.__requests += 1
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+                head = [f"HTTP/1.1 {status} {_reasons[status]}", "Content-Type: application/json",
+                        f"Content-Length: {len(body)}", "Connection: " + ("keep-alive" if keepAlive else "close")]
+                head.extend(f"{name}: {value}" for name, value in headers)
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+                await writer.drain()
+                if not keepAlive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+# Worker process state for RoutingService
+_serviceWorker = {}
+
+# This runs once in every worker, it attaches to the shared snapshot
+def _serviceWorkerStart(blockName, layout, ids):
+    block, snapshot = GraphSnapshot.attach(blockName, layout, ids)
+    _serviceWorker["block"] = block
+    _serviceWorker["snapshot"] = snapshot
+
+# This runs one search in a worker, the whole shortest path tree comes back as compact arrays
+# so routes to other targets and the other kinds of answers from the same source can share it
+def _serviceWorkerSearch(source):
+    distances, previous = _serviceWorker["snapshot"].shortestPathTree(source)
+    return array('d', distances), array('q', previous)
+
+# This turns a shortest path tree into the JSON of a "dijkstra" or "distribution" answer
+def _serviceWorkerAnswer(kind, source, distances, previous):
+    snapshot = _serviceWorker["snapshot"]
+    ids = snapshot.getIDs()
+    if kind == "dijkstra":
+        sorted_distances, sorted_previous, sorted_houses = snapshot.toDictionaries(distances, previous)
+        # JSON has no infinity, intersections we can't reach get null
+        sorted_distances = {ID: (None if distance == float('inf') else distance)
+                            for ID, distance in sorted_distances.items()}
+        return json.dumps({"source": ids[source], "distances": sorted_distances, "previous": sorted_previous,
+                           "houses": sorted_houses}).encode()
+    # The same order as packageDistribution: closest first, then the most houses, then the ID
+    # (only intersections reached from the source count their houses, like in dijkstra)
+    houses = snapshot.getHouses()
+    order = sorted(range(len(ids)), key=lambda node: (distances[node], -houses[node] if previous[node] >= 0 else 0))
+    return json.dumps({"source": ids[source], "order": [ids[node] for node in order]}).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve routes of a traffic network over HTTP")
+    parser.add_argument("--load", help="a network saved with TrafficNetwork.save")
+    parser.add_argument("--city", nargs=2, metavar=("KIND", "INTERSECTIONS"),
+                        help="a synthetic city instead (grid, radial or geometric)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--max-searches", type=int)
+    arguments = parser.parse_args()
+
+    if arguments.load:
+        from .network import TrafficNetwork
+        network = TrafficNetwork.load(arguments.load)
+        if network == None:
+            parser.error(f"can't open {arguments.load}")
+    elif arguments.city:
+        from .generators import syntheticCity
+        network = syntheticCity(arguments.city[0], int(arguments.city[1]))
+    else:
+        parser.error("give a network with --load or --city")
+    service = RoutingService(network, arguments.host, arguments.port, arguments.processes, arguments.max_searches)
+    print(f"Serving {len(network.snapshot())} intersections on http://{arguments.host}:{arguments.port}")
+    service.run()
+
+
+if __name__ == "__main__":
+    main()
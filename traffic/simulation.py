@@ -0,0 +1,414 @@
+# Simulating the traffic of a day on a network in time steps, with NumPy
+import random
+
+import numpy as np
+
+
+# This moves vehicles along their routes in time steps and turns how crowded every road is into
+# its traffic status, so travel times (see TrafficCostModel) follow the demand.
+# Everything per road is a NumPy array in the order of the cost model (flow, capacity, density,
+# speeds...) and so is everything per group of vehicles on the road, so a step over a city is a
+# few dozen array operations instead of a loop over vehicles.
+# - A trip is a number of vehicles going from one intersection to another at a departure time.
+#   They take the fastest route for the travel times at their departure, with the routes kept
+#   for rerouteInterval seconds, so the statuses we write change the routes of later trips.
+# - Speeds follow the density on the road (Greenshields): the free speed of the cost model (with
+#   its time of day profile) when the road is empty, going down to nothing at jam density.
+# - Each road lets at most its capacity leave per step, and vehicles only get onto a road that
+#   has room left, the others wait at the end of the road they are on (queues spill back).
+#   Groups that have waited gridlockTime seconds get on anyway, so rings of full roads that all
+#   wait for each other don't stop the city for good.
+# - Every statusInterval seconds the average density of every road becomes its traffic status
+#   and the changed ones are written to the roads in one batch. Roads with statuses we don't set
+#   (like "Closed") are left alone.
+# The layout of the network can't change while a simulation runs, statuses and lengths can.
+class TrafficSimulation:
+    # The statuses we write and the density up to which each one is used, as a share of the
+    # critical density (half the jam density, where a road carries the most vehicles)
+    LEVELS = (("Light", 0.25), ("Normal", 0.6), ("Moderate", 0.9), ("Heavy", 1.3), ("Congested", float('inf')))
+    # The slowest a crowded road gets, as a share of its free speed
+    MIN_SPEED = 0.05
+    # How many roads a vehicle can go through in one step
+    MAX_HOPS = 16
+
+    # step, statusInterval, rerouteInterval and gridlockTime are in seconds, start is the time of day to start at
+    # laneCapacity is in vehicles per hour and lane, jamDensity in vehicles per meter and lane
+    def __init__(self, network, step=60, statusInterval=900, rerouteInterval=3600, lanes=1,
+                 laneCapacity=1800, jamDensity=0.15, start=0, gridlockTime=300):
+        self.__network = network
+        self.__model = network.trafficModel()
+        self.__snapshot = self.__model.getSnapshot()
+        self.__step = step
+        self.__statusInterval = statusInterval
+        self.__rerouteInterval = rerouteInterval
+        self.__gridlockTime = gridlockTime
+        self.__time = start
+
+        roads = len(self.__snapshot.getRoads())
+        self.__lengths = np.maximum(self.__model.getLengths(), 1.0)
+        self.__lanes = np.broadcast_to(np.asarray(lanes, dtype=float), roads).copy()
+        self.__capacities = self.__lanes * laneCapacity / 3600
+        self.__storage = np.maximum(self.__lengths * self.__lanes * jamDensity, 1.0)
+
+        # The roads of every route one after the other, a group of vehicles keeps where its route
+        # starts and ends in here. Routes are kept per (origin, destination) until rerouting.
+        self.__routeRoads = np.zeros(1024, dtype=np.int32)
+        self.__routeSize = 0
+        self.__routes = {}
+        self.__trees = {}
+        self.__routedAt = None
+        # The roads and the source intersection of every edge, to find the roads of a tree
+        snapshot = self.__snapshot
+        offsets = np.asarray(snapshot.getOffsets(), dtype=np.int64)
+        self.__edgeSources = np.repeat(np.arange(len(snapshot), dtype=np.int64), np.diff(offsets))
+        self.__edgeTargets = np.asarray(snapshot.getTargets(), dtype=np.int64)
+        self.__edgeRoads = np.asarray(snapshot.getEdgeRoads(), dtype=np.int64)
+
+        # Trips that haven't left yet, sorted by departure when we need them
+        self.__trips = [np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)]
+        self.__tripsSorted = True
+
+        # The groups of vehicles on the roads: road, position in the route, end of the route,
+        # meters driven on the road, vehicles, departure time and seconds waited at the end of the road
+        self.__road = np.zeros(0, dtype=np.int64)
+        self.__cursor = np.zeros(0, dtype=np.int64)
+        self.__end = np.zeros(0, dtype=np.int64)
+        self.__progress = np.zeros(0)
+        self.__count = np.zeros(0)
+        self.__depart = np.zeros(0)
+        self.__waited = np.zeros(0)
+        self.__occupancy = np.zeros(roads)
+
+        # What happened so far
+        self.__flows = np.zeros(roads)
+        self.__exits = np.zeros(roads)
+        self.__densitySum = np.zeros(roads)
+        self.__densitySteps = 0
+        self.__lastStatus = start
+        self.__arrived = 0.0
+        self.__arrivedTrips = 0
+        self.__travelTime = 0.0
+        self.__unroutable = 0
+        self.__statusWrites = 0
+
+        names = [name for name, limit in TrafficSimulation.LEVELS]
+        self.__levelNames = np.array(names)
+        self.__levelLimits = np.array([limit for name, limit in TrafficSimulation.LEVELS[:-1]])
+        self.__levelCodes = np.array([self.__model.statusCode(name) for name in names])
+
+    # Getter functions
+    def getNetwork(self):
+        return self.__network
+    def getTime(self):
+        return self.__time
+    def getStep(self):
+        return self.__step
+    def getCapacities(self):
+        return self.__capacities
+    def getLanes(self):
+        return self.__lanes
+    # Vehicles on every road right now
+    def getOccupancy(self):
+        return self.__occupancy
+    # Vehicles per meter and lane on every road right now
+    def getDensities(self):
+        return self.__occupancy / (self.__lengths * self.__lanes)
+    # Vehicles per hour that left every road in the last status interval
+    def getFlows(self):
+        return self.__flows
+    # Meters per second on every road right now
+    def getSpeeds(self):
+        return self.__speeds(self.__occupancy)
+    # Vehicles and trips that got where they were going, the average trip time in seconds
+    def getArrived(self):
+        return self.__arrived
+    def getArrivedTrips(self):
+        return self.__arrivedTrips
+    def getAverageTravelTime(self):
+        return self.__travelTime / self.__arrived if self.__arrived else 0.0
+    # Vehicles on the roads and trips still to leave
+    def getActive(self):
+        return float(self.__count.sum())
+    def getPending(self):
+        return len(self.__trips[0])
+    # Trips that had no route to their destination
+    def getUnroutable(self):
+        return self.__unroutable
+    # How many times statuses were written to the roads
+    def getStatusWrites(self):
+        return self.__statusWrites
+
+    # To change the capacity (vehicles per hour) of roads, Road objects or road positions
+    def setCapacities(self, roads, capacities):
+        indexes = self.__indexes(roads)
+        self.__capacities[indexes] = np.asarray(capacities, dtype=float) / 3600
+
+    def __indexes(self, roads):
+        if isinstance(roads, np.ndarray):
+            return roads
+        return np.array([road if isinstance(road, (int, np.integer)) else self.__model.indexOf(road)
+                         for road in roads], dtype=np.intp)
+
+    # To add trips, origins and destinations are intersections or their IDs
+    # departures are in seconds like the simulation time, vehicles is how many make each trip
+    def addTrips(self, origins, destinations, departures, vehicles=1):
+        snapshot = self.__snapshot
+        origins = np.array([snapshot.indexOf(origin) for origin in origins], dtype=np.int64)
+        destinations = np.array([snapshot.indexOf(destination) for destination in destinations], dtype=np.int64)
+        departures = np.broadcast_to(np.asarray(departures, dtype=float), len(origins))
+        vehicles = np.broadcast_to(np.asarray(vehicles, dtype=float), len(origins))
+        self.__trips = [np.concatenate([old, new]) for old, new in
+                        zip(self.__trips, (origins, destinations, departures, vehicles))]
+        self.__tripsSorted = False
+
+    # To add a day of random trips between a few zones (intersections where trips start and end)
+    # Most trips leave around the morning and evening peaks, the rest during the day
+    def addRandomDemand(self, trips, zones=50, seed=0, peaks=((8 * 3600, 3600), (17.5 * 3600, 3600)), vehicles=1):
+        generator = random.Random(seed)
+        ids = self.__snapshot.getIDs()
+        chosen = generator.sample(range(len(ids)), min(zones, len(ids)))
+        rng = np.random.default_rng(seed)
+        origins = rng.choice(chosen, trips)
+        destinations = rng.choice(chosen, trips)
+        kind = rng.integers(0, len(peaks) + 1, trips)
+        departures = rng.uniform(6 * 3600, 22 * 3600, trips)
+        for number, (centre, spread) in enumerate(peaks):
+            picked = kind == number
+            departures[picked] = rng.normal(centre, spread, int(picked.sum()))
+        departures = np.clip(departures, 0, 86400 - 1) + self.__time - self.__time % 86400
+        self.addTrips([ids[node] for node in origins.tolist()], [ids[node] for node in destinations.tolist()],
+                      departures, vehicles)
+
+    # To run the simulation for some seconds
+    def run(self, seconds):
+        end = self.__time + seconds
+        while self.__time < end:
+            self.step()
+
+    # One time step
+    def step(self):
+        if self.__model.getSnapshot() is not self.__snapshot:
+            raise ValueError("The layout of the network changed during the simulation")
+        dt = self.__step
+        self.__release(self.__time + dt)
+        self.__move(dt)
+        self.__time += dt
+        self.__densitySum += self.__occupancy
+        self.__densitySteps += 1
+        if self.__time - self.__lastStatus >= self.__statusInterval:
+            self.writeStatuses()
+
+    # Free speed with the time of day profile, slower as the road fills up
+    def __speeds(self, occupancy):
+        model = self.__model
+        free = model.getSpeeds() * model.getProfiles()[:, model.bucket(self.__time)]
+        ratio = np.clip(1 - occupancy / self.__storage, TrafficSimulation.MIN_SPEED, 1)
+        return np.maximum(free * ratio, 0.1)
+
+    # The trips leaving before a time become groups of vehicles at the start of their route
+    def __release(self, until):
+        origins, destinations, departures, vehicles = self.__trips
+        if not len(origins):
+            return
+        if not self.__tripsSorted:
+            order = np.argsort(departures, kind="stable")
+            self.__trips = [array[order] for array in self.__trips]
+            origins, destinations, departures, vehicles = self.__trips
+            self.__tripsSorted = True
+        due = int(np.searchsorted(departures, until, side="left"))
+        if due == 0:
+            return
+        self.__trips = [array[due:] for array in self.__trips]
+
+        starts = np.empty(due, dtype=np.int64)
+        ends = np.empty(due, dtype=np.int64)
+        for trip, (origin, destination) in enumerate(zip(origins[:due].tolist(), destinations[:due].tolist())):
+            starts[trip], ends[trip] = self.__route(origin, destination)
+        routed = starts < ends
+        self.__unroutable += int((~routed & (origins[:due] != destinations[:due])).sum())
+
+        starts, ends = starts[routed], ends[routed]
+        count = vehicles[:due][routed]
+        roads = self.__routeRoads[starts].astype(np.int64)
+        self.__road = np.concatenate([self.__road, roads])
+        self.__cursor = np.concatenate([self.__cursor, starts])
+        self.__end = np.concatenate([self.__end, ends])
+        self.__progress = np.concatenate([self.__progress, np.zeros(len(starts))])
+        self.__count = np.concatenate([self.__count, count])
+        self.__depart = np.concatenate([self.__depart, departures[:due][routed]])
+        self.__waited = np.concatenate([self.__waited, np.zeros(len(starts))])
+        self.__occupancy += np.bincount(roads, count, len(self.__occupancy))
+
+    # Where the roads of the route from origin to destination start and end in the route array
+    # Both are the same when there is no route
+    def __route(self, origin, destination):
+        if origin == destination:
+            return 0, 0
+        if self.__routedAt == None or self.__time - self.__routedAt >= self.__rerouteInterval:
+            self.__routes = {}
+            self.__trees = {}
+            self.__routedAt = self.__time
+        key = (origin, destination)
+        found = self.__routes.get(key)
+        if found != None:
+            return found
+        parentNodes, parentRoads = self.__tree(origin)
+        roads = []
+        node = destination
+        while node != origin and node >= 0:
+            roads.append(parentRoads[node])
+            node = parentNodes[node]
+        if node != origin:
+            found = (0, 0)
+        else:
+            roads.reverse()
+            start = self.__routeSize
+            end = start + len(roads)
+            if end > len(self.__routeRoads):
+                self.__routeRoads = np.resize(self.__routeRoads, max(2 * len(self.__routeRoads), end))
+            self.__routeRoads[start:end] = roads
+            self.__routeSize = end
+            found = (start, end)
+        self.__routes[key] = found
+        return found
+
+    # The fastest routes from an origin for the travel times now, as the previous intersection
+    # and the road to it for every intersection (-1 where there is none)
+    def __tree(self, origin):
+        tree = self.__trees.get(origin)
+        if tree == None:
+            costs = self.__model.edgeCosts(self.__time)
+            distances, previous = self.__snapshot.shortestPathTree(origin, costs.tolist())
+            distances = np.asarray(distances)
+            previous = np.asarray(previous, dtype=np.int64)
+            # The edge into every intersection is the one from its previous intersection that
+            # gives its distance
+            sources, targets = self.__edgeSources, self.__edgeTargets
+            onTree = (previous[targets] == sources) & \
+                     np.isclose(distances[sources] + costs, distances[targets], rtol=1e-12, atol=1e-9)
+            roads = np.full(len(previous), -1, dtype=np.int64)
+            roads[targets[onTree]] = self.__edgeRoads[onTree]
+            tree = (previous.tolist(), roads.tolist())
+            self.__trees[origin] = tree
+        return tree
+
+    # Moving every group of vehicles for dt seconds
+    def __move(self, dt):
+        if not len(self.__road):
+            return
+        lengths = self.__lengths
+        occupancy = self.__occupancy
+        roadCount = len(occupancy)
+        speeds = self.__speeds(occupancy)
+        # How many vehicles can still leave every road in this step
+        budget = self.__capacities * dt
+        road, cursor, end = self.__road, self.__cursor, self.__end
+        progress, count, waited = self.__progress, self.__count, self.__waited
+        timeLeft = np.full(len(road), float(dt))
+        arrivedAt = np.full(len(road), np.nan)
+
+        moving = np.arange(len(road))
+        for hop in range(TrafficSimulation.MAX_HOPS):
+            if not len(moving):
+                break
+            here = road[moving]
+            speed = speeds[here]
+            toEnd = lengths[here] - progress[moving]
+            reach = speed * timeLeft[moving] >= toEnd
+            # The ones that don't reach the end of their road this step are done
+            stays = moving[~reach]
+            progress[stays] += speeds[road[stays]] * timeLeft[stays]
+            timeLeft[stays] = 0
+            moving = moving[reach]
+            if not len(moving):
+                break
+            here = road[moving]
+            timeLeft[moving] -= toEnd[reach] / speeds[here]
+            progress[moving] = lengths[here]
+
+            # Who leaves first: the ones that got to the end earliest, as long as the road lets them
+            allowed = TrafficSimulation.__fits(here, -timeLeft[moving], count[moving], budget[here])
+            finishing = allowed & (cursor[moving] + 1 >= end[moving])
+            done = moving[finishing]
+            arrivedAt[done] = dt - timeLeft[done]
+            budget -= np.bincount(road[done], count[done], roadCount)
+            occupancy -= np.bincount(road[done], count[done], roadCount)
+            self.__exits += np.bincount(road[done], count[done], roadCount)
+            timeLeft[done] = 0
+
+            # The others go on to the next road of their route if it has room
+            going = moving[allowed & ~finishing]
+            nextRoads = self.__routeRoads[cursor[going] + 1].astype(np.int64)
+            room = np.maximum(self.__storage[nextRoads] - occupancy[nextRoads], 0)
+            admitted = TrafficSimulation.__fits(nextRoads, -timeLeft[going], count[going], room) | \
+                       (waited[going] >= self.__gridlockTime)
+            entering = going[admitted]
+            nextRoads = nextRoads[admitted]
+            leaving = np.bincount(road[entering], count[entering], roadCount)
+            budget -= leaving
+            occupancy -= leaving
+            self.__exits += leaving
+            occupancy += np.bincount(nextRoads, count[entering], roadCount)
+            road[entering] = nextRoads
+            cursor[entering] += 1
+            progress[entering] = 0
+            waited[entering] = 0
+            # The ones that can't leave wait at the end of their road
+            waiting = np.setdiff1d(moving, np.concatenate([done, entering]), assume_unique=True)
+            waited[waiting] += timeLeft[waiting]
+            timeLeft[waiting] = 0
+            moving = entering[timeLeft[entering] > 0]
+
+        # The groups that arrived leave the arrays
+        arrived = ~np.isnan(arrivedAt)
+        if arrived.any():
+            times = self.__time + arrivedAt[arrived] - self.__depart[arrived]
+            self.__arrived += float(count[arrived].sum())
+            self.__arrivedTrips += int(arrived.sum())
+            self.__travelTime += float((times * count[arrived]).sum())
+            kept = ~arrived
+            self.__road, self.__cursor, self.__end = road[kept], cursor[kept], end[kept]
+            self.__progress, self.__count, self.__depart = progress[kept], count[kept], self.__depart[kept]
+            self.__waited = waited[kept]
+        # Rounding can leave tiny negative occupancies
+        np.maximum(occupancy, 0, out=occupancy)
+
+    # Which items get in the room of their group, the ones with the smallest order first
+    # An item gets in when there is room left when its turn comes, even if only part of it fits,
+    # or a group bigger than the room would wait for good. Groups are road positions, the room
+    # and the counts are in vehicles.
+    @staticmethod
+    def __fits(groups, order, counts, room):
+        if not len(groups):
+            return np.zeros(0, dtype=bool)
+        sort = np.lexsort((order, groups))
+        sortedGroups = groups[sort]
+        total = np.cumsum(counts[sort])
+        first = np.flatnonzero(np.r_[True, sortedGroups[1:] != sortedGroups[:-1]])
+        before = np.r_[0.0, total][first]
+        used = total - np.repeat(before, np.diff(np.r_[first, len(sort)]))
+        fits = np.empty(len(groups), dtype=bool)
+        fits[sort] = used - counts[sort] < room[sort] - 1e-9
+        return fits
+
+    # To turn the average density since the last time into statuses and write the changed ones
+    # to the roads, this returns how many roads changed
+    def writeStatuses(self):
+        steps = max(self.__densitySteps, 1)
+        interval = max(self.__time - self.__lastStatus, self.__step)
+        self.__flows = self.__exits * 3600 / interval
+        density = self.__densitySum / steps / self.__storage
+        level = np.searchsorted(self.__levelLimits, density * 2, side="right")
+        self.__exits = np.zeros(len(self.__exits))
+        self.__densitySum = np.zeros(len(self.__densitySum))
+        self.__densitySteps = 0
+        self.__lastStatus = self.__time
+
+        codes = self.__model.getStatusCodes()
+        changed = np.isin(codes, self.__levelCodes) & (codes != self.__levelCodes[level])
+        indexes = np.flatnonzero(changed)
+        if len(indexes):
+            with self.__network.batch():
+                self.__model.applyStatuses(indexes, self.__levelNames[level[indexes]])
+            self.__statusWrites += 1
+        return len(indexes)
@@ -0,0 +1,732 @@
+# A frozen, compact copy of a traffic network and the routes found on it
+import hashlib
+import heapq
+import itertools
+import math
+# Compact typed buffers for the graph snapshot
+from array import array
+from bisect import bisect_right
+from multiprocessing import shared_memory
+
+from .model import Intersection, Road
+from .tables import StringTable
+
+
+# This class is a frozen, compact copy of a traffic network used for fast routing.
+# Every intersection gets an integer index (in ID order, so results come out already sorted)
+# and the roads are stored in CSR form: the neighbours of intersection i are
+# targets[offsets[i]:offsets[i + 1]] and the matching road lengths are in weights.
+# Changing the network afterwards does not change the snapshot, so take a new one after edits.
+class GraphSnapshot:
+    # The buffers can be arrays, lists or memoryviews, they only need to support indexing
+    # edgeRoads holds the road index for every edge and houses holds the number of houses
+    # at every intersection. The intersection/road objects are optional.
+    # The fingerprint can be given when it is already known (like in a saved network file)
+    def __init__(self, ids, offsets, targets, weights, edgeRoads, houses, intersections=None, roads=None,
+                 fingerprint=None):
+        self.__ids = ids
+        self.__offsets = offsets
+        self.__targets = targets
+        self.__weights = weights
+        self.__edgeRoads = edgeRoads
+        self.__houses = houses
+        self.__intersections = intersections
+        self.__roads = roads
+        self.__fingerprint = fingerprint
+        # These are filled the first time someone looks up an intersection
+        self.__index = None
+        self.__position = None
+
+    # Getter functions
+    def getIDs(self):
+        return self.__ids
+    def getOffsets(self):
+        return self.__offsets
+    def getTargets(self):
+        return self.__targets
+    def getWeights(self):
+        return self.__weights
+    # The array typecode of the weights ('q' for whole numbers, 'd' otherwise)
+    def getWeightType(self):
+        if isinstance(self.__weights, array):
+            return self.__weights.typecode
+        if isinstance(self.__weights, memoryview):
+            return self.__weights.format
+        return 'd'
+    def getEdgeRoads(self):
+        return self.__edgeRoads
+    def getHouses(self):
+        return self.__houses
+    def getIntersections(self):
+        return self.__intersections
+    def getRoads(self):
+        return self.__roads
+
+    # The number of intersections in the snapshot
+    def __len__(self):
+        return len(self.__offsets) - 1
+
+    # To get the index of an intersection, we accept either the intersection itself or its ID
+    def indexOf(self, intersection):
+        if self.__index is None:
+            # The IDs of a saved network are sorted, so we search them instead of decoding them all
+            if isinstance(self.__ids, StringTable):
+                self.__index = self.__ids
+            else:
+                self.__index = {ID: i for i, ID in enumerate(self.__ids)}
+            if self.__intersections is not None:
+                self.__position = {node: i for i, node in enumerate(self.__intersections)}
+        if self.__position is not None and intersection in self.__position:
+            return self.__position[intersection]
+        if isinstance(intersection, Intersection):
+            intersection = intersection.getID()
+        if self.__index is self.__ids:
+            return self.__ids.index(intersection)
+        return self.__index[intersection]
+
+    # To get the intersection object back from an index
+    def getIntersection(self, index):
+        if self.__intersections is None:
+            return None
+        return self.__intersections[index]
+
+    # To get the neighbours of an intersection with the length of each road
+    def neighbours(self, index):
+        start, end = self.__offsets[index], self.__offsets[index + 1]
+        return zip(self.__targets[start:end], self.__weights[start:end])
+
+    # Dijkstra algorithm over the snapshot
+    # This returns two lists indexed by intersection index, the distance from the source
+    # and the previous intersection index on the shortest route (-1 if there is none)
+    # Other edge costs (like travel times) can be given instead of the road lengths
+    def shortestPathTree(self, source, weights=None):
+        # Local names are much faster than attribute lookups inside the loop
+        offsets = self.__offsets
+        targets = self.__targets
+        if weights is None:
+            weights = self.__weights
+        heappop = heapq.heappop
+        heappush = heapq.heappush
+
+        distances = [float('inf')] * len(self)
+        previous = [-1] * len(self)
+        distances[source] = 0
+        pq = [(0, source)]
+
+        while pq:
+            currentLength, current = heappop(pq)
+            # A node can be in the queue more than once, we skip the old entries
+            if currentLength > distances[current]:
+                continue
+            for edge in range(offsets[current], offsets[current + 1]):
+                destination = targets[edge]
+                new_distance = currentLength + weights[edge]
+                if new_distance < distances[destination]:
+                    distances[destination] = new_distance
+                    previous[destination] = current
+                    heappush(pq, (new_distance, destination))
+
+        return distances, previous
+
+    # Dijkstra from one source that stops once every target is settled
+    # This returns the distances to the targets in the same order as the targets
+    def distancesTo(self, source, targets):
+        offsets = self.__offsets
+        edgeTargets = self.__targets
+        weights = self.__weights
+        heappop = heapq.heappop
+        heappush = heapq.heappush
+
+        distances = [float('inf')] * len(self)
+        distances[source] = 0
+        remaining = set(targets)
+        pq = [(0, source)]
+
+        while pq and remaining:
+            currentLength, current = heappop(pq)
+            if currentLength > distances[current]:
+                continue
+            remaining.discard(current)
+            for edge in range(offsets[current], offsets[current + 1]):
+                destination = edgeTargets[edge]
+                new_distance = currentLength + weights[edge]
+                if new_distance < distances[destination]:
+                    distances[destination] = new_distance
+                    heappush(pq, (new_distance, destination))
+
+        return [distances[target] for target in targets]
+
+    # Dijkstra from one source that stops at a distance limit
+    # This is a generator of (index, distance) for every intersection within the limit, closest
+    # first, so the caller can stop as soon as it has enough. Only the part of the network we
+    # reach is touched: the distances are a dictionary instead of a list as long as the network,
+    # and roads that lead past the limit are never queued.
+    def isochrone(self, source, limit=float('inf'), weights=None):
+        offsets = self.__offsets
+        targets = self.__targets
+        if weights is None:
+            weights = self.__weights
+        heappop = heapq.heappop
+        heappush = heapq.heappush
+        inf = float('inf')
+
+        distances = {source: 0}
+        pq = [(0, source)]
+
+        while pq:
+            currentLength, current = heappop(pq)
+            if currentLength > distances[current]:
+                continue
+            yield current, currentLength
+            for edge in range(offsets[current], offsets[current + 1]):
+                destination = targets[edge]
+                new_distance = currentLength + weights[edge]
+                if new_distance <= limit and new_distance < distances.get(destination, inf):
+                    distances[destination] = new_distance
+                    heappush(pq, (new_distance, destination))
+
+    # The k closest intersections with houses, as (index, distance, houses), closest first
+    # Like isochrone this is a generator that only searches as far as it has to
+    def nearestHouses(self, source, k=None, limit=float('inf'), weights=None):
+        if k == 0:
+            return
+        houses = self.__houses
+        found = 0
+        for node, distance in self.isochrone(source, limit, weights):
+            if houses[node] > 0:
+                yield node, distance, houses[node]
+                found += 1
+                if found == k:
+                    return
+
+    # A short hash of the road layout, used to check if saved results still match the network
+    def fingerprint(self):
+        if self.__fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(repr(list(self.__ids)).encode())
+            for buffer in (self.__offsets, self.__targets, self.__weights):
+                digest.update(memoryview(buffer).cast('B'))
+            self.__fingerprint = digest.digest()
+        return self.__fingerprint
+
+    # To hand the graph to worker processes without pickling it
+    # The offsets, targets, weights and houses are copied one after the other into a block of shared
+    # memory, and every worker rebuilds the snapshot on top of it with attach. This returns the
+    # block and its layout. The caller closes and unlinks the block once the workers are done.
+    def share(self):
+        houses = self.__houses if self.__houses is not None else [0] * len(self)
+        buffers = [array('q', self.__offsets), array('i', self.__targets),
+                   array(self.getWeightType(), self.__weights), array('i', houses)]
+        layout = []
+        size = 0
+        for buffer in buffers:
+            layout.append((size, buffer.typecode, len(buffer)))
+            size += len(buffer) * buffer.itemsize
+            size += (-size) % 8
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for (start, typecode, length), buffer in zip(layout, buffers):
+            block.buf[start:start + len(buffer) * buffer.itemsize] = memoryview(buffer).cast('B')
+        return block, layout
+
+    # To open a shared snapshot in a worker process, this returns the block and the snapshot
+    # The worker keeps the block open as long as it uses the snapshot
+    @staticmethod
+    def attach(blockName, layout, ids=None):
+        # The pool shares the parent's resource tracker, so the parent alone unlinks the block
+        block = shared_memory.SharedMemory(name=blockName)
+        offsets, targets, weights, houses = [block.buf[start:start + length * array(typecode).itemsize].cast(typecode)
+                                             for start, typecode, length in layout]
+        return block, GraphSnapshot(ids, offsets, targets, weights, None, houses)
+
+    # To find which intersection an edge starts from
+    # Since the offsets are sorted, a binary search on them gives us the answer
+    def edgeSource(self, edge):
+        return bisect_right(self.__offsets, edge) - 1
+
+    # This walks the previous edges back from a node to the start of the search
+    # and returns the intersections and edges on the way (starting from the node)
+    def __walkBack(self, previous, node):
+        nodes = [node]
+        edges = []
+        while previous[node] != -1:
+            edges.append(previous[node])
+            node = self.edgeSource(previous[node])
+            nodes.append(node)
+        return nodes, edges
+
+    # Point-to-point shortest route, we stop as soon as the target is settled
+    # When a heuristic is given this becomes A*, the heuristic has to be a lower bound
+    # of the distance left to the target or the route might not be the shortest.
+    # This returns the length, the intersections and the edges of the route, or None if
+    # the target can't be reached.
+    # We use dictionaries here so we only pay for the part of the network we explore
+    def shortestRoute(self, source, target, heuristic=None):
+        offsets = self.__offsets
+        targets = self.__targets
+        weights = self.__weights
+        heappop = heapq.heappop
+        heappush = heapq.heappush
+        inf = float('inf')
+
+        distances = {source: 0}
+        previous = {source: -1}
+        visited = set()
+        pq = [(heuristic(source) if heuristic else 0, source)]
+
+        while pq:
+            priority, current = heappop(pq)
+            if current in visited:
+                continue
+            if current == target:
+                nodes, edges = self.__walkBack(previous, target)
+                nodes.reverse()
+                edges.reverse()
+                return distances[target], nodes, edges
+            visited.add(current)
+
+            currentLength = distances[current]
+            for edge in range(offsets[current], offsets[current + 1]):
+                destination = targets[edge]
+                new_distance = currentLength + weights[edge]
+                if new_distance < distances.get(destination, inf):
+                    distances[destination] = new_distance
+                    previous[destination] = edge
+                    if heuristic:
+                        heappush(pq, (new_distance + heuristic(destination), destination))
+                    else:
+                        heappush(pq, (new_distance, destination))
+        return None
+
+    # Bidirectional Dijkstra, we search from both ends at the same time and stop once
+    # the two searches can't find anything shorter than the best meeting point.
+    # Roads go both ways, so the backward search uses the same adjacency.
+    def bidirectionalRoute(self, source, target):
+        if source == target:
+            return 0, [source], []
+        offsets = self.__offsets
+        targets = self.__targets
+        weights = self.__weights
+        heappop = heapq.heappop
+        heappush = heapq.heappush
+        inf = float('inf')
+
+        # Index 0 is the forward search from the source and index 1 the backward one from the target
+        distances = ({source: 0}, {target: 0})
+        previous = ({source: -1}, {target: -1})
+        visited = (set(), set())
+        pqs = ([(0, source)], [(0, target)])
+        best = inf
+        meeting = -1
+
+        while pqs[0] and pqs[1]:
+            # Nothing left in the queues can beat the best route we found
+            if pqs[0][0][0] + pqs[1][0][0] >= best:
+                break
+            # We always grow the smaller search
+            side = 0 if len(pqs[0]) <= len(pqs[1]) else 1
+            pq = pqs[side]
+            distance = distances[side]
+            otherDistance = distances[1 - side]
+
+            currentLength, current = heappop(pq)
+            if current in visited[side]:
+                continue
+            visited[side].add(current)
+
+            for edge in range(offsets[current], offsets[current + 1]):
+                destination = targets[edge]
+                new_distance = currentLength + weights[edge]
+                if new_distance < distance.get(destination, inf):
+                    distance[destination] = new_distance
+                    previous[side][destination] = edge
+                    heappush(pq, (new_distance, destination))
+                # Check if the two searches meet here
+                if destination in otherDistance and new_distance + otherDistance[destination] < best:
+                    best = new_distance + otherDistance[destination]
+                    meeting = destination
+                    # The meeting edge might not be the one saved in previous, so we save it
+                    meetingEdge = (side, current, edge)
+
+        if meeting == -1:
+            return None
+
+        # We rebuild the route through the meeting edge
+        side, current, edge = meetingEdge
+        nodes, edges = self.__walkBack(previous[side], current)
+        otherNodes, otherEdges = self.__walkBack(previous[1 - side], meeting)
+        nodes.reverse()
+        edges.reverse()
+        nodes = nodes + otherNodes
+        edges = edges + [edge] + otherEdges
+        if side == 1:
+            nodes.reverse()
+            edges.reverse()
+        return best, nodes, edges
+
+    # The k shortest loopless routes from source to target, shortest first
+    # This returns a list of (length, intersections, edges) like shortestRoute, fewer than k if
+    # there aren't that many routes.
+    # Yen's algorithm: every next route leaves one of the routes we have at some intersection
+    # (the spur) and takes the shortest way from there to the target that avoids the route up to
+    # the spur and the roads that the routes found so far took from the spur after the same start.
+    # All the spur searches share one shortest path tree towards the target instead of running a
+    # full Dijkstra each:
+    # - taking roads away only makes routes longer, so the distances of the tree are a lower
+    #   bound for every spur search, which makes them A* searches that head for the target
+    # - once a spur search reaches an intersection whose way to the target in the tree is still
+    #   open, that way is the rest of the route and the search stops there
+    # The tree goes out to stretch times the shortest distance, further intersections get that
+    # radius as their bound (still a lower bound, just a looser one).
+    # A route found from a spur only needs spurs from that spur on (Lawler), the intersections
+    # before it were already tried with the same start.
+    def kShortestRoutes(self, source, target, k, stretch=1.25):
+        if k <= 0:
+            return []
+        if source == target:
+            return [(0, [source], [])]
+        tree = self.__treeToTarget(source, target, stretch)
+        if tree == None:
+            return []
+        weights = self.__weights
+
+        first = self.__spurRoute(source, target, tree, set(), set())
+        routes = [(first[0], first[1], first[2], 0)]
+        # Routes we found but haven't taken yet, the counter breaks ties between equal lengths
+        candidates = []
+        seen = {tuple(first[2])}
+        counter = itertools.count()
+        while len(routes) < k:
+            length, nodes, edges, deviation = routes[-1]
+            rootLength = 0
+            for spur in range(deviation):
+                rootLength += weights[edges[spur]]
+            for spur in range(deviation, len(nodes) - 1):
+                root = edges[:spur]
+                # The roads the routes with the same start took from the spur
+                blockedEdges = {other[2][spur] for other in routes
+                                if len(other[2]) > spur and other[2][:spur] == root}
+                blockedNodes = set(nodes[:spur])
+                found = self.__spurRoute(nodes[spur], target, tree, blockedNodes, blockedEdges)
+                if found != None:
+                    newEdges = root + found[2]
+                    key = tuple(newEdges)
+                    if key not in seen:
+                        seen.add(key)
+                        heapq.heappush(candidates, (rootLength + found[0], next(counter),
+                                                    nodes[:spur] + found[1], newEdges, spur))
+                rootLength += weights[edges[spur]]
+            if not candidates:
+                break
+            length, unused, nodes, edges, deviation = heapq.heappop(candidates)
+            routes.append((length, nodes, edges, deviation))
+        return [(length, nodes, edges) for length, nodes, edges, deviation in routes]
+
+    # The shortest path tree towards the target for kShortestRoutes, a Dijkstra from the target
+    # (roads go both ways) that stops at stretch times the distance of the source.
+    # This gives the distances of the intersections it settled, the radius it got to (every other
+    # intersection is at least that far, inf if it reached everything) and for every settled
+    # intersection the next one towards the target, with room to keep the edges to them once
+    # they are needed. None if the source can't reach the target.
+    def __treeToTarget(self, source, target, stretch):
+        offsets = self.__offsets
+        targets = self.__targets
+        weights = self.__weights
+        heappop = heapq.heappop
+        heappush = heapq.heappush
+        inf = float('inf')
+
+        distances = {target: 0}
+        parents = {target: -1}
+        settled = {}
+        pq = [(0, target)]
+        limit = inf
+        while pq:
+            currentLength, current = pq[0]
+            if currentLength > limit:
+                break
+            heappop(pq)
+            if current in settled:
+                continue
+            settled[current] = currentLength
+            if current == source:
+                limit = currentLength * stretch
+            for edge in range(offsets[current], offsets[current + 1]):
+                destination = targets[edge]
+                new_distance = currentLength + weights[edge]
+                if new_distance < distances.get(destination, inf):
+                    distances[destination] = new_distance
+                    parents[destination] = current
+                    heappush(pq, (new_distance, destination))
+        if source not in settled:
+            return None
+        return settled, (pq[0][0] if pq else inf), parents, {}
+
+    # The edge from a node to the next node towards the target in the tree of kShortestRoutes
+    # Roads go both ways, so we take the shortest edge between the two (the one the tree used)
+    def __edgeTo(self, node, nextNode):
+        targets = self.__targets
+        weights = self.__weights
+        best = -1
+        for edge in range(self.__offsets[node], self.__offsets[node + 1]):
+            if targets[edge] == nextNode and (best == -1 or weights[edge] < weights[best]):
+                best = edge
+        return best
+
+    # One spur search of kShortestRoutes, A* that can't go through the blocked intersections and edges
+    def __spurRoute(self, spur, target, tree, blockedNodes, blockedEdges):
+        settled, radius, parents, towards = tree
+        offsets = self.__offsets
+        targets = self.__targets
+        weights = self.__weights
+        heappop = heapq.heappop
+        heappush = heapq.heappush
+        inf = float('inf')
+
+        # Whether the way from a settled intersection to the target in the tree is still open
+        # An open way from an intersection also starts an open way from the ones that lead to it
+        # A way back through the spur would be a loop (and the spur's own way can be blocked)
+        open_ = {target: True, spur: False}
+        def isOpen(node):
+            walked = []
+            while node not in open_:
+                if node in blockedNodes or node not in settled:
+                    open_[node] = False
+                    break
+                walked.append(node)
+                node = parents[node]
+            result = open_[node]
+            for other in walked:
+                open_[other] = result
+            return result
+
+        distances = {spur: 0}
+        previous = {spur: -1}
+        visited = set()
+        pq = [(settled.get(spur, radius), spur)]
+        while pq:
+            priority, current = heappop(pq)
+            if current in visited:
+                continue
+            if isOpen(current):
+                nodes, edges = self.__walkBack(previous, current)
+                nodes.reverse()
+                edges.reverse()
+                length = distances[current]
+                while current != target:
+                    nextNode = parents[current]
+                    edge = towards.get(current)
+                    if edge == None:
+                        edge = towards[current] = self.__edgeTo(current, nextNode)
+                    length += weights[edge]
+                    edges.append(edge)
+                    nodes.append(nextNode)
+                    current = nextNode
+                return length, nodes, edges
+            visited.add(current)
+
+            currentLength = distances[current]
+            for edge in range(offsets[current], offsets[current + 1]):
+                destination = targets[edge]
+                if destination in blockedNodes or edge in blockedEdges:
+                    continue
+                remaining = settled.get(destination, radius)
+                if remaining == inf:
+                    continue
+                new_distance = currentLength + weights[edge]
+                if new_distance < distances.get(destination, inf):
+                    distances[destination] = new_distance
+                    previous[destination] = edge
+                    heappush(pq, (new_distance + remaining, destination))
+        return None
+
+    # To precompute landmark distances for A*
+    # We pick landmarks that are far from each other so they give good bounds
+    def landmarks(self, count=4):
+        chosen = []
+        distances = []
+        closest = [float('inf')] * len(self)
+        candidate = 0
+        # We start from the intersection furthest away from intersection 0
+        if len(self) > 0:
+            first, unused = self.shortestPathTree(0)
+            candidate = max(range(len(self)), key=lambda node: (first[node] != float('inf'), first[node]))
+        for i in range(min(count, len(self))):
+            chosen.append(candidate)
+            landmarkDistances, unused = self.shortestPathTree(candidate)
+            distances.append(array('d', landmarkDistances))
+            closest = [min(a, b) for a, b in zip(closest, landmarkDistances)]
+            candidate = max(range(len(self)), key=closest.__getitem__)
+        return Landmarks(chosen, distances)
+
+    # Route between two intersections (or IDs)
+    # The method can be "dijkstra", "bidirectional" or "astar". A* needs landmarks from
+    # landmarks() or a dictionary of coordinates {ID: (x, y)}, in which case the straight
+    # line distance must never be longer than the road distance.
+    def route(self, source, target, method="dijkstra", landmarks=None, coordinates=None):
+        source = self.indexOf(source)
+        target = self.indexOf(target)
+        if method == "dijkstra":
+            result = self.shortestRoute(source, target)
+        elif method == "bidirectional":
+            result = self.bidirectionalRoute(source, target)
+        elif method == "astar":
+            if landmarks != None:
+                heuristic = landmarks.heuristic(target)
+            elif coordinates != None:
+                ids = self.__ids
+                targetX, targetY = coordinates[ids[target]]
+                heuristic = lambda node: math.hypot(coordinates[ids[node]][0] - targetX,
+                                                    coordinates[ids[node]][1] - targetY)
+            else:
+                raise ValueError("A* needs landmarks or coordinates")
+            result = self.shortestRoute(source, target, heuristic)
+        else:
+            raise ValueError(f"Unknown routing method: {method}")
+
+        if result == None:
+            return None
+        length, nodes, edges = result
+        return self.toRoute(length, nodes, edges)
+
+    # To turn intersection and edge indexes into a Route
+    # If the snapshot has no objects we use the IDs and road indexes instead
+    def toRoute(self, length, nodes, edges):
+        if self.__intersections != None:
+            intersections = [self.__intersections[node] for node in nodes]
+        else:
+            intersections = [self.__ids[node] for node in nodes]
+        if self.__roads != None:
+            roads = [self.__roads[self.__edgeRoads[edge]] for edge in edges]
+        else:
+            roads = [self.__edgeRoads[edge] for edge in edges]
+        return Route(intersections, roads, length)
+
+    # This gives the same results as TrafficNetwork.dijkstra
+    # (distances, previous and houses dictionaries sorted by intersection ID)
+    def dijkstra(self, current, weights=None):
+        distances, previous = self.shortestPathTree(self.indexOf(current), weights)
+        return self.toDictionaries(distances, previous)
+
+    # To turn the lists from shortestPathTree into the dictionaries dijkstra returns
+    def toDictionaries(self, distances, previous):
+        ids = self.__ids
+        houses = self.__houses
+
+        # Since the indexes follow the ID order, the dictionaries are already sorted
+        sorted_distances = dict(zip(ids, distances))
+        sorted_previous = {ids[node]: (ids[before] if before >= 0 else None) for node, before in enumerate(previous)}
+        # Like dijkstra, we only count houses for intersections we reached from the source
+        sorted_houses = {ids[node]: houses[node] for node, before in enumerate(previous) if before >= 0}
+
+        return sorted_distances, sorted_previous, sorted_houses
+
+    # This builds a snapshot from a set of intersections
+    # Roads leading to intersections outside the set are left out
+    @staticmethod
+    def fromIntersections(trafficIntersections):
+        intersections = sorted(trafficIntersections, key=lambda node: node.getID())
+        position = {node: i for i, node in enumerate(intersections)}
+        roads = []
+        roadPosition = {}
+
+        offsets = array('q', [0])
+        targets = array('i')
+        weights = []
+        edgeRoads = array('i')
+        houses = array('i')
+
+        for node in intersections:
+            houses.append(len(node.getHouses()))
+            for road in node.getRoads():
+                if road == None:
+                    continue
+                if road not in roadPosition:
+                    roadPosition[road] = len(roads)
+                    roads.append(road)
+                length = road.getLength()
+                for destination in road.getIntersections():
+                    if destination != node and destination != None and destination in position:
+                        targets.append(position[destination])
+                        weights.append(length)
+                        edgeRoads.append(roadPosition[road])
+            offsets.append(len(targets))
+
+        # Whole number lengths stay whole numbers so the distances match dijkstra
+        if all(type(length) is int for length in weights):
+            weights = array('q', weights)
+        else:
+            weights = array('d', weights)
+
+        return GraphSnapshot([node.getID() for node in intersections], offsets, targets, weights,
+                             edgeRoads, houses, intersections, roads)
+
+
+# Landmark distances used as lower bounds for A*
+# For any landmark L, |d(L, target) - d(L, node)| can't be longer than the real distance
+# from node to target (roads go both ways), so the largest of these is a safe heuristic.
+class Landmarks:
+    def __init__(self, landmarks, distances):
+        self.__landmarks = landmarks
+        self.__distances = distances
+
+    # Getter functions
+    def getLandmarks(self):
+        return self.__landmarks
+    def getDistances(self):
+        return self.__distances
+
+    # The lower bound on the distance between two intersection indexes
+    def lowerBound(self, node, target):
+        return self.heuristic(target)(node)
+
+    # This returns a heuristic function for A* towards a target
+    def heuristic(self, target):
+        inf = float('inf')
+        pairs = [(distances, distances[target]) for distances in self.__distances]
+
+        def bound(node):
+            best = 0
+            for distances, targetDistance in pairs:
+                nodeDistance = distances[node]
+                # If only one of them is reachable from the landmark, they are not connected
+                if nodeDistance == inf or targetDistance == inf:
+                    if nodeDistance != targetDistance:
+                        return inf
+                    continue
+                difference = abs(targetDistance - nodeDistance)
+                if difference > best:
+                    best = difference
+            return best
+        return bound
+
+
+# A route between two intersections
+# It holds the intersections and roads in the driving order and the total length
+class Route:
+    def __init__(self, intersections, roads, length):
+        self.__intersections = intersections
+        self.__roads = roads
+        self.__length = length
+
+    # Getter functions
+    def getIntersections(self):
+        return self.__intersections
+    def getRoads(self):
+        return self.__roads
+    def getLength(self):
+        return self.__length
+
+    # To get the IDs of the intersections on the route
+    def getIntersectionIDs(self):
+        return [node.getID() if isinstance(node, Intersection) else node for node in self.__intersections]
+
+    # To display the route
+    def displayRoute(self):
+        print(f"Route length: {self.getLength()}")
+        print(f"Intersections: {' -> '.join(self.getIntersectionIDs())}")
+        print("Roads: ")
+        for road in self.getRoads():
+            if isinstance(road, Road):
+                print(f"Road name: {road.getName()}")
+            else:
+                print(f"Road index: {road}")
@@ -0,0 +1,243 @@
+# Finding intersections by their coordinates (see Intersection.getCoordinates)
+import math
+
+
+# A grid of square cells over the intersections that have coordinates
+# Every cell keeps the intersections in it, so finding the nearest one only looks at the cells
+# around a point, ring by ring, until no cell further out can hold anything closer: the cells we
+# haven't looked at are four strips of the grid (left, right, below and above the rings) and we
+# stop once the point is closer to what it found than to any of the strips. A point outside the
+# grid starts from the cell closest to it.
+# The network keeps its index up to date (see TrafficNetwork.spatialIndex), NumPy is only
+# needed to snap many points at once.
+class SpatialIndex:
+    def __init__(self, intersections=(), cellSize=None):
+        placed = [intersection for intersection in intersections if intersection.getCoordinates() != None]
+        self.__cellSize = cellSize if cellSize != None else \
+            SpatialIndex.cellSizeFor([intersection.getCoordinates() for intersection in placed])
+        # (column, row) -> the intersections in that cell
+        self.__cells = {}
+        self.__count = 0
+        # The cells the intersections are in are between these, they only grow
+        self.__bounds = None
+        # The arrays snap uses, made again after anything changes
+        self.__arrays = None
+        for intersection in placed:
+            self.add(intersection)
+
+    # A cell size that gives about one intersection per cell
+    @staticmethod
+    def cellSizeFor(points):
+        if not points:
+            return 1.0
+        xs = [x for x, y in points]
+        ys = [y for x, y in points]
+        width, height = max(xs) - min(xs), max(ys) - min(ys)
+        side = max(width, height)
+        if side == 0:
+            return 1.0
+        # Points on a line would give no area, then the side is split between them
+        return math.sqrt(max(width * height, side * side / len(points)) / len(points))
+
+    # Getter functions
+    def getCellSize(self):
+        return self.__cellSize
+    def __len__(self):
+        return self.__count
+
+    def __cell(self, x, y):
+        return math.floor(x / self.__cellSize), math.floor(y / self.__cellSize)
+
+    # To add/remove an intersection, the ones without coordinates are left out
+    def add(self, intersection):
+        coordinates = intersection.getCoordinates()
+        if coordinates == None:
+            return
+        cell = self.__cell(*coordinates)
+        members = self.__cells.setdefault(cell, [])
+        if intersection in members:
+            return
+        members.append(intersection)
+        self.__count += 1
+        self.__arrays = None
+        if self.__bounds == None:
+            self.__bounds = (cell[0], cell[1], cell[0], cell[1])
+        else:
+            minColumn, minRow, maxColumn, maxRow = self.__bounds
+            self.__bounds = (min(minColumn, cell[0]), min(minRow, cell[1]),
+                             max(maxColumn, cell[0]), max(maxRow, cell[1]))
+    # The coordinates it was added with can be given, for an intersection that has moved since
+    def remove(self, intersection, coordinates=None):
+        if coordinates == None:
+            coordinates = intersection.getCoordinates()
+        if coordinates == None:
+            return
+        cell = self.__cell(*coordinates)
+        members = self.__cells.get(cell)
+        if members == None or intersection not in members:
+            return
+        members.remove(intersection)
+        if not members:
+            del self.__cells[cell]
+        self.__count -= 1
+        self.__arrays = None
+    # For an intersection that got new coordinates
+    def move(self, intersection, oldCoordinates):
+        self.remove(intersection, oldCoordinates)
+        self.add(intersection)
+
+    # The k closest intersections to a point, as (intersection, distance), closest first
+    # Intersections further than maxDistance are left out
+    def nearest(self, x, y, k=1, maxDistance=float('inf')):
+        if self.__count == 0 or k <= 0:
+            return []
+        minColumn, minRow, maxColumn, maxRow = self.__bounds
+        size = self.__cellSize
+        column, row = self.__cell(x, y)
+        column = min(max(column, minColumn), maxColumn)
+        row = min(max(row, minRow), maxRow)
+        last = max(column - minColumn, maxColumn - column, row - minRow, maxRow - row)
+
+        found = []
+        for ring in range(last + 1):
+            # Anything in the cells past the rings so far is at least this far away
+            if ring > 0:
+                reach = SpatialIndex.__reach(x, y, column, row, ring - 1, minColumn, minRow, maxColumn, maxRow, size)
+                if reach > maxDistance or len(found) >= k and found[k - 1][0] <= reach:
+                    break
+            for cell in SpatialIndex.__ring(column, row, ring):
+                for intersection in self.__cells.get(cell, ()):
+                    otherX, otherY = intersection.getCoordinates()
+                    distance = math.hypot(otherX - x, otherY - y)
+                    if distance <= maxDistance:
+                        found.append((distance, intersection.getID(), intersection))
+            found.sort(key=lambda item: item[:2])
+            del found[k:]
+        return [(intersection, distance) for distance, ID, intersection in found]
+
+    # How far a point is from the cells of the grid outside the rings around a cell
+    @staticmethod
+    def __reach(x, y, column, row, ring, minColumn, minRow, maxColumn, maxRow, size):
+        strips = ((minColumn, column - ring - 1, minRow, maxRow), (column + ring + 1, maxColumn, minRow, maxRow),
+                  (minColumn, maxColumn, minRow, row - ring - 1), (minColumn, maxColumn, row + ring + 1, maxRow))
+        reach = float('inf')
+        for firstColumn, lastColumn, firstRow, lastRow in strips:
+            if firstColumn <= lastColumn and firstRow <= lastRow:
+                dx = max(firstColumn * size - x, 0, x - (lastColumn + 1) * size)
+                dy = max(firstRow * size - y, 0, y - (lastRow + 1) * size)
+                reach = min(reach, math.hypot(dx, dy))
+        return reach
+
+    # The cells at a ring around a cell (the cell itself for ring 0)
+    @staticmethod
+    def __ring(column, row, ring):
+        if ring == 0:
+            yield column, row
+            return
+        for offset in range(-ring, ring + 1):
+            yield column + offset, row - ring
+            yield column + offset, row + ring
+        for offset in range(-ring + 1, ring):
+            yield column - ring, row + offset
+            yield column + ring, row + offset
+
+    # The intersections inside a box, borders included
+    def within(self, minX, minY, maxX, maxY):
+        if self.__count == 0:
+            return []
+        minColumn, minRow, maxColumn, maxRow = self.__bounds
+        firstColumn, firstRow = self.__cell(minX, minY)
+        lastColumn, lastRow = self.__cell(maxX, maxY)
+        firstColumn, firstRow = max(firstColumn, minColumn), max(firstRow, minRow)
+        lastColumn, lastRow = min(lastColumn, maxColumn), min(lastRow, maxRow)
+        found = []
+        # A big box over a small network is quicker to check cell by cell
+        if (lastColumn - firstColumn + 1) * (lastRow - firstRow + 1) > len(self.__cells):
+            cells = (members for (column, row), members in self.__cells.items()
+                     if firstColumn <= column <= lastColumn and firstRow <= row <= lastRow)
+        else:
+            cells = (self.__cells.get((column, row), ()) for column in range(firstColumn, lastColumn + 1)
+                     for row in range(firstRow, lastRow + 1))
+        for members in cells:
+            for intersection in members:
+                x, y = intersection.getCoordinates()
+                if minX <= x <= maxX and minY <= y <= maxY:
+                    found.append(intersection)
+        return found
+
+    # To snap many points to their nearest intersection at once, like the coordinates of
+    # thousands of new houses. points is anything NumPy can turn into an (n, 2) array.
+    # This returns the intersections (None when the index is empty) and a NumPy array of distances.
+    # The points are done together with NumPy: they go through the cells around them ring by ring,
+    # one candidate per cell at a time, and a point stops once its nearest intersection is closer
+    # than anything further out could be.
+    def snap(self, points):
+        import numpy as np
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        count = len(points)
+        if self.__count == 0:
+            return [None] * count, np.full(count, np.inf)
+        items, xy, order, starts, origin, size, columns, rows = self.__snapArrays()
+
+        # The cell of every point, or the closest cell for points outside the grid
+        gridMin = origin * size
+        local = points - gridMin
+        cell = np.clip(np.floor(local / size).astype(np.int64), 0, [columns - 1, rows - 1])
+
+        best = np.full(count, np.inf)
+        bestItem = np.full(count, -1, dtype=np.int64)
+        pending = np.arange(count)
+        ring = 0
+        while len(pending):
+            # Points whose nearest intersection is closer than anything past the last ring are done
+            if ring > 0:
+                first = cell[pending] - (ring - 1)
+                last = cell[pending] + ring
+                x, y = local[pending].T
+                reach = np.full(len(pending), np.inf)
+                # The strips left, right, below and above the rings as cells [start, stop)
+                for startX, stopX, startY, stopY in ((0, first[:, 0], 0, rows), (last[:, 0], columns, 0, rows),
+                                                     (0, columns, 0, first[:, 1]), (0, columns, last[:, 1], rows)):
+                    dx = np.maximum(np.maximum(startX * size - x, x - stopX * size), 0)
+                    dy = np.maximum(np.maximum(startY * size - y, y - stopY * size), 0)
+                    empty = (np.asarray(startX) >= stopX) | (np.asarray(startY) >= stopY)
+                    reach = np.minimum(reach, np.where(empty, np.inf, np.hypot(dx, dy)))
+                done = best[pending] <= reach
+                pending = pending[~done]
+                if not len(pending):
+                    break
+            for dx, dy in SpatialIndex.__ring(0, 0, ring):
+                column = cell[pending, 0] + dx
+                row = cell[pending, 1] + dy
+                valid = (column >= 0) & (column < columns) & (row >= 0) & (row < rows)
+                if not valid.any():
+                    continue
+                target = np.where(valid, row * columns + column, 0)
+                begin = np.where(valid, starts[target], 0)
+                end = np.where(valid, starts[target + 1], 0)
+                for step in range(int((end - begin).max(initial=0))):
+                    has = begin + step < end
+                    candidate = order[np.minimum(begin + step, len(order) - 1)]
+                    distance = np.hypot(*(xy[candidate] - points[pending]).T)
+                    better = has & (distance < best[pending])
+                    best[pending[better]] = distance[better]
+                    bestItem[pending[better]] = candidate[better]
+            ring += 1
+        return [items[index] for index in bestItem.tolist()], best
+
+    # The intersections as arrays sorted by cell, with where every cell starts in them
+    # The cells here are their own, sized for the intersections there are now
+    def __snapArrays(self):
+        if self.__arrays == None:
+            import numpy as np
+            items = [intersection for members in self.__cells.values() for intersection in members]
+            xy = np.array([intersection.getCoordinates() for intersection in items], dtype=float)
+            size = SpatialIndex.cellSizeFor(xy.tolist())
+            origin = np.floor(xy.min(axis=0) / size)
+            cells = np.floor(xy / size).astype(np.int64) - origin.astype(np.int64)
+            columns, rows = (cells.max(axis=0) + 1).tolist()
+            key = cells[:, 1] * columns + cells[:, 0]
+            order = np.argsort(key, kind="stable")
+            starts = np.searchsorted(key[order], np.arange(columns * rows + 1))
+            self.__arrays = (items, xy, order, starts, origin, size, columns, rows)
+        return self.__arrays
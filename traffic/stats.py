@@ -0,0 +1,138 @@
+# Measurements of the searches a traffic network runs (see TrafficNetwork.enableStats)
+import json
+import time
+
+
+# What one call of dijkstra or packageDistribution did
+# - pushes/pops: heap operations, stalePops: pops of intersections that were already settled
+# - relaxations: roads looked at from settled intersections, improvements: the ones that gave a
+#   shorter distance, settled: intersections whose distance became final
+# - phases: seconds spent in every part of the call, in the order they ran
+# A result that came from the route cache has cacheHit set and only a "cache" phase.
+class SearchStats:
+    def __init__(self, method, source=None, pushes=0, pops=0, stalePops=0, relaxations=0, improvements=0,
+                 settled=0, items=0, phases=None, cacheHit=False):
+        self.__method = method
+        self.__source = source
+        self.__pushes = pushes
+        self.__pops = pops
+        self.__stalePops = stalePops
+        self.__relaxations = relaxations
+        self.__improvements = improvements
+        self.__settled = settled
+        self.__items = items
+        self.__phases = phases if phases != None else {}
+        self.__cacheHit = cacheHit
+        self.__time = time.time()
+
+    # Getter functions
+    def getMethod(self):
+        return self.__method
+    def getSource(self):
+        return self.__source
+    def getPushes(self):
+        return self.__pushes
+    def getPops(self):
+        return self.__pops
+    def getStalePops(self):
+        return self.__stalePops
+    def getRelaxations(self):
+        return self.__relaxations
+    def getImprovements(self):
+        return self.__improvements
+    def getSettled(self):
+        return self.__settled
+    # How many intersections packageDistribution sorted
+    def getItems(self):
+        return self.__items
+    def getPhases(self):
+        return self.__phases
+    def isCacheHit(self):
+        return self.__cacheHit
+    # When the call finished, in seconds since the epoch
+    def getTime(self):
+        return self.__time
+    def getTotalTime(self):
+        return sum(self.__phases.values())
+
+    # Everything in one dictionary, for exporters
+    def toDict(self):
+        return {"method": self.__method, "source": self.__source, "time": self.__time,
+                "pushes": self.__pushes, "pops": self.__pops, "stalePops": self.__stalePops,
+                "relaxations": self.__relaxations, "improvements": self.__improvements,
+                "settled": self.__settled, "items": self.__items, "cacheHit": self.__cacheHit,
+                "phases": dict(self.__phases), "totalTime": self.getTotalTime()}
+
+    def __repr__(self):
+        phases = ", ".join(f"{name} {seconds * 1000:.2f} ms" for name, seconds in self.__phases.items())
+        if self.__cacheHit:
+            return f"SearchStats({self.__method} {self.__source}: cache hit, {phases})"
+        if self.__pushes == 0:
+            return f"SearchStats({self.__method}: {self.__items} intersections, {phases})"
+        return (f"SearchStats({self.__method} {self.__source}: {self.__pushes} pushes, {self.__pops} pops, "
+                f"{self.__stalePops} stale, {self.__relaxations} relaxations, {self.__settled} settled, {phases})")
+
+
+# This collects the stats of a network and passes every one on to the exporters
+# An exporter is anything that can be called as exporter(stats), like JSONLinesExporter or a
+# function that sends them to a monitoring system. We keep the last stats and totals per method.
+class StatsRecorder:
+    # The counters that are added up in the totals
+    COUNTERS = ("pushes", "pops", "stalePops", "relaxations", "improvements", "settled", "items")
+
+    def __init__(self, *exporters):
+        self.__exporters = tuple(exporters)
+        self.__last = None
+        self.__totals = {}
+
+    # To add/remove exporters
+    def addExporter(self, exporter):
+        if exporter not in self.__exporters:
+            self.__exporters = self.__exporters + (exporter,)
+    def removeExporter(self, exporter):
+        self.__exporters = tuple(other for other in self.__exporters if other != exporter)
+    def getExporters(self):
+        return self.__exporters
+
+    # The stats of the last call
+    def getLast(self):
+        return self.__last
+
+    # Totals per method: calls, cache hits, the counters and the seconds per phase
+    def getTotals(self):
+        return self.__totals
+
+    def reset(self):
+        self.__last = None
+        self.__totals = {}
+
+    # The network calls this after every search
+    def record(self, stats):
+        self.__last = stats
+        totals = self.__totals.get(stats.getMethod())
+        if totals == None:
+            totals = {"calls": 0, "cacheHits": 0, "phases": {}}
+            totals.update((counter, 0) for counter in StatsRecorder.COUNTERS)
+            self.__totals[stats.getMethod()] = totals
+        totals["calls"] += 1
+        totals["cacheHits"] += stats.isCacheHit()
+        values = stats.toDict()
+        for counter in StatsRecorder.COUNTERS:
+            totals[counter] += values[counter]
+        for phase, seconds in stats.getPhases().items():
+            totals["phases"][phase] = totals["phases"].get(phase, 0) + seconds
+        for exporter in self.__exporters:
+            exporter(stats)
+
+
+# An exporter that appends every stats as one line of JSON to a file
+class JSONLinesExporter:
+    def __init__(self, path):
+        self.__path = path
+
+    def getPath(self):
+        return self.__path
+
+    def __call__(self, stats):
+        with open(self.__path, "a") as file:
+            file.write(json.dumps(stats.toDict()) + "\n")
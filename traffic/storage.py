@@ -0,0 +1,283 @@
+# The binary network file and the memory-mapped network that reads it
+import mmap
+import os
+import struct
+from array import array
+
+from .model import House, Intersection, Road
+from .snapshot import GraphSnapshot
+from .tables import StringTable
+
+
+# A traffic network saved as one binary file (see TrafficNetwork.save and TrafficNetwork.load)
+# The file is memory-mapped, so opening it only reads the header. Routing works right away on the
+# snapshot, which uses the arrays in the file directly, and processes opening the same file share
+# its pages. The intersection, road and house objects are only made when toNetwork is called.
+# File layout: header, the network name, then these sections, each 8 byte aligned:
+# - intersection IDs (a StringTable, sorted like in GraphSnapshot)
+# - the snapshot: offsets, targets, weights, edge roads and number of houses per intersection
+# - road IDs, names, lengths, traffic (an index into the table of statuses) and both ends
+#   (intersection indexes, -1 when the end isn't connected)
+# - the traffic statuses
+# - house IDs and the index of the intersection of each house
+# - the coordinates of the intersections as x, y pairs (NaN when there are none), since version 2
+class MappedNetwork:
+    MAGIC = b"TRNW"
+    VERSION = 2
+    # magic, version, intersections, roads, edges, houses, statuses, weight typecode,
+    # road length typecode, fingerprint, length of the name
+    HEADER = struct.Struct("<4sIQQQQQcc16sQ")
+
+    def __init__(self, name, sections, fingerprint, memory, file):
+        self.__name = name
+        self.__sections = sections
+        self.__fingerprint = fingerprint
+        self.__memory = memory
+        self.__file = file
+        self.__snapshot = None
+
+    # Getter functions
+    def getNetworkName(self):
+        return self.__name
+    def getFingerprint(self):
+        return self.__fingerprint
+    def getIntersectionIDs(self):
+        return self.__sections["intersectionIDs"]
+    def getRoadIDs(self):
+        return self.__sections["roadIDs"]
+    def getRoadNames(self):
+        return self.__sections["roadNames"]
+    def getRoadLengths(self):
+        return self.__sections["roadLengths"]
+    def getRoadEnds(self):
+        return self.__sections["roadEnds"]
+    def getHouseIDs(self):
+        return self.__sections["houseIDs"]
+    # The x, y pairs of the intersections (NaN for the ones without), None for files from before version 2
+    def getCoordinates(self):
+        return self.__sections.get("coordinates")
+    def getHouseLocations(self):
+        return self.__sections["houseLocations"]
+    # The traffic status of a road, by its index
+    def getTraffic(self, road):
+        return self.__sections["statuses"][self.__sections["roadTraffic"][road]]
+
+    # The number of intersections in the network
+    def __len__(self):
+        return len(self.__sections["intersectionIDs"])
+
+    # The snapshot of the saved network, its arrays stay in the file
+    def snapshot(self):
+        if self.__snapshot == None:
+            sections = self.__sections
+            self.__snapshot = GraphSnapshot(sections["intersectionIDs"], sections["offsets"], sections["targets"],
+                                            sections["weights"], sections["edgeRoads"], sections["houses"],
+                                            fingerprint=self.__fingerprint)
+        return self.__snapshot
+
+    # Same as TrafficNetwork.dijkstra and TrafficNetwork.route, but on the saved network
+    def dijkstra(self, current):
+        return self.snapshot().dijkstra(current)
+    def route(self, source, target, method="dijkstra", landmarks=None, coordinates=None):
+        return self.snapshot().route(source, target, method, landmarks, coordinates)
+
+    # Same as TrafficNetwork.alternativeRoutes, the routes have IDs instead of objects
+    def alternativeRoutes(self, source, target, k=3):
+        snapshot = self.snapshot()
+        return [snapshot.toRoute(*found)
+                for found in snapshot.kShortestRoutes(snapshot.indexOf(source), snapshot.indexOf(target), k)]
+
+    # Same as TrafficNetwork.isochrone and TrafficNetwork.nearestHouses, with IDs instead of objects
+    def isochrone(self, current, limit):
+        snapshot = self.snapshot()
+        ids = snapshot.getIDs()
+        return ((ids[node], distance) for node, distance in snapshot.isochrone(snapshot.indexOf(current), limit))
+    def nearestHouses(self, current, k, limit=float('inf')):
+        snapshot = self.snapshot()
+        ids = snapshot.getIDs()
+        return ((ids[node], distance, houses)
+                for node, distance, houses in snapshot.nearestHouses(snapshot.indexOf(current), k, limit))
+
+    # To make the intersection, road and house objects and a TrafficNetwork with them
+    # Every call makes a new network, changing it doesn't change the file
+    def toNetwork(self):
+        # The network module saves networks with this one, so we import it here instead of at the top
+        from .network import TrafficNetwork
+        sections = self.__sections
+        statuses = list(sections["statuses"])
+        traffic = sections["roadTraffic"]
+        roadEnds = sections["roadEnds"]
+        roads = [Road(ID, name, length, statuses[traffic[road]]) for road, (ID, name, length)
+                 in enumerate(zip(sections["roadIDs"], sections["roadNames"], sections["roadLengths"]))]
+
+        # Every intersection gets its roads in one go, like in NetworkLoader
+        intersectionRoads = [[] for node in range(len(self))]
+        for road, trafficRoad in enumerate(roads):
+            for end in (roadEnds[2 * road], roadEnds[2 * road + 1]):
+                if end >= 0:
+                    intersectionRoads[end].append(trafficRoad)
+        coordinates = sections.get("coordinates")
+        intersections = []
+        for node, (ID, nodeRoads) in enumerate(zip(sections["intersectionIDs"], intersectionRoads)):
+            point = None
+            if coordinates != None and coordinates[2 * node] == coordinates[2 * node]:
+                point = (coordinates[2 * node], coordinates[2 * node + 1])
+            # The file doesn't keep the maximum, so busy intersections get room for their roads
+            intersection = Intersection.fromRoads(ID, nodeRoads, max(Intersection.MAX_ROADS, len(nodeRoads)), point)
+            for road in nodeRoads:
+                road.attachIntersection(intersection)
+            intersections.append(intersection)
+
+        houses = [House(ID, intersections[location])
+                  for ID, location in zip(sections["houseIDs"], sections["houseLocations"])]
+        return TrafficNetwork.fromParts(self.__name, intersections, roads, houses)
+
+    # To release the memory map and the file
+    def close(self):
+        self.__snapshot = None
+        MappedNetwork.__release(self.__sections)
+        self.__memory.close()
+        self.__file.close()
+
+    # The memory map can only be closed once every view of it is released
+    @staticmethod
+    def __release(sections):
+        for section in sections.values():
+            if isinstance(section, StringTable):
+                section.getOffsets().release()
+                section.getData().release()
+            else:
+                section.release()
+
+    # To write a network to a file
+    @staticmethod
+    def save(network, path):
+        snapshot = network.snapshot()
+        roads = snapshot.getRoads()
+        position = {node: i for i, node in enumerate(snapshot.getIntersections())}
+        statuses = {}
+        roadTraffic = array('i', (statuses.setdefault(road.getTraffic(), len(statuses)) for road in roads))
+        roadEnds = array('i')
+        for road in roads:
+            for end in road.getIntersections():
+                roadEnds.append(position.get(end, -1))
+        # The houses are saved with the intersection they are at
+        houseIDs = []
+        houseLocations = array('i')
+        for node, intersection in enumerate(snapshot.getIntersections()):
+            for house in intersection.getHouses():
+                houseIDs.append(house.getID())
+                houseLocations.append(node)
+        nan = float('nan')
+        coordinates = array('d')
+        for intersection in snapshot.getIntersections():
+            coordinates.extend(intersection.getCoordinates() or (nan, nan))
+        lengths = [road.getLength() for road in roads]
+        lengthType = 'q' if all(type(length) is int for length in lengths) else 'd'
+
+        sections = [*StringTable.encode(snapshot.getIDs()),
+                    snapshot.getOffsets(), snapshot.getTargets(), snapshot.getWeights(), snapshot.getEdgeRoads(),
+                    snapshot.getHouses(),
+                    *StringTable.encode(road.getID() for road in roads),
+                    *StringTable.encode(road.getName() for road in roads),
+                    array(lengthType, lengths), roadTraffic, roadEnds,
+                    *StringTable.encode(statuses),
+                    *StringTable.encode(houseIDs), houseLocations, coordinates]
+        # We write a temporary file next to the old one and only put it in its place once it is
+        # complete, so a save that crashes leaves the old file as it was
+        nameBytes = network.getNetworkName().encode()
+        saving = f"{path}.{os.getpid()}.saving"
+        try:
+            with open(saving, "wb") as file:
+                file.write(MappedNetwork.HEADER.pack(MappedNetwork.MAGIC, MappedNetwork.VERSION, len(snapshot),
+                                                     len(roads), len(snapshot.getTargets()), len(houseIDs),
+                                                     len(statuses), snapshot.getWeightType().encode(),
+                                                     lengthType.encode(), snapshot.fingerprint(), len(nameBytes)))
+                file.write(nameBytes)
+                for section in sections:
+                    file.write(b"\0" * ((-file.tell()) % 8))
+                    file.write(memoryview(section).cast('B'))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(saving, path)
+        except BaseException:
+            if os.path.exists(saving):
+                os.remove(saving)
+            raise
+
+    # To open a saved network, this returns None if the file is missing or broken
+    @staticmethod
+    def open(path):
+        if not os.path.exists(path):
+            return None
+        file = open(path, "rb")
+        try:
+            memory = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            file.close()
+            return None
+        try:
+            magic, version, count, roads, edges, houses, statuses, weightType, lengthType, fingerprint, nameLength = \
+                MappedNetwork.HEADER.unpack_from(memory, 0)
+        except struct.error:
+            magic = None
+        if magic != MappedNetwork.MAGIC or not 1 <= version <= MappedNetwork.VERSION:
+            memory.close()
+            file.close()
+            return None
+        start = MappedNetwork.HEADER.size
+        try:
+            if start + nameLength > len(memory):
+                raise ValueError("The network file is cut short")
+            name = bytes(memory[start:start + nameLength]).decode()
+            weightType, lengthType = weightType.decode(), lengthType.decode()
+        except ValueError:
+            memory.close()
+            file.close()
+            return None
+
+        # The sections in the order they were written, a table is its offsets and then its data
+        layout = [("intersectionIDs", None, count),
+                  ("offsets", 'q', count + 1), ("targets", 'i', edges), ("weights", weightType, edges),
+                  ("edgeRoads", 'i', edges), ("houses", 'i', count),
+                  ("roadIDs", None, roads), ("roadNames", None, roads), ("roadLengths", lengthType, roads),
+                  ("roadTraffic", 'i', roads), ("roadEnds", 'i', 2 * roads),
+                  ("statuses", None, statuses),
+                  ("houseIDs", None, houses), ("houseLocations", 'i', houses)]
+        if version >= 2:
+            layout.append(("coordinates", 'd', 2 * count))
+        view = memoryview(memory)
+        sections = {}
+        position = start + nameLength
+
+        def read(typecode, length):
+            nonlocal position
+            position += (-position) % 8
+            size = length * array(typecode).itemsize
+            if position + size > len(memory):
+                raise ValueError("The network file is cut short")
+            section = view[position:position + size].cast(typecode)
+            position += size
+            return section
+
+        try:
+            for key, typecode, length in layout:
+                if typecode == None:
+                    offsets = read('q', length + 1)
+                    try:
+                        data = read('B', max(offsets[length] - 1, 0))
+                    except ValueError:
+                        # The offsets aren't in the sections yet, so they are released here
+                        offsets.release()
+                        raise
+                    sections[key] = StringTable(offsets, data)
+                else:
+                    sections[key] = read(typecode, length)
+        except ValueError:
+            MappedNetwork.__release(sections)
+            view.release()
+            memory.close()
+            file.close()
+            return None
+        view.release()
+        return MappedNetwork(name, sections, fingerprint, memory, file)
@@ -0,0 +1,56 @@
+# Compact string tables for the binary file formats
+import json
+from array import array
+from bisect import bisect_left
+
+
+# A read-only list of IDs or names kept as one block of UTF-8 JSON values separated by commas and
+# the offset where each value starts (the last offset is one past the end, like after a comma).
+# In a memory-mapped file only the values someone reads get decoded, and going through the whole
+# table decodes it as one JSON list.
+class StringTable:
+    def __init__(self, offsets, data):
+        self.__offsets = offsets
+        self.__data = data
+
+    # Getter functions
+    def getOffsets(self):
+        return self.__offsets
+    def getData(self):
+        return self.__data
+
+    def __len__(self):
+        return len(self.__offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("StringTable index out of range")
+        return json.loads(str(self.__data[self.__offsets[index]:self.__offsets[index + 1] - 1], "utf-8"))
+
+    def __iter__(self):
+        if len(self) > 0:
+            yield from json.loads(b"[" + bytes(self.__data) + b"]")
+
+    # To find the position of a value in a sorted table with a binary search
+    # This raises KeyError like a dictionary when the value isn't there
+    def index(self, value):
+        position = bisect_left(self, value)
+        if position == len(self) or self[position] != value:
+            raise KeyError(value)
+        return position
+
+    # To turn a list of values into the offsets and data of a table
+    @staticmethod
+    def encode(values):
+        offsets = array('q', [0])
+        data = bytearray()
+        for value in values:
+            data += json.dumps(value, ensure_ascii=False).encode()
+            data += b","
+            offsets.append(len(data))
+        # There is no comma after the last value
+        return offsets, data[:-1]
@@ -0,0 +1,314 @@
+# Delivery tours for one vehicle and route plans for a fleet
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from .model import Intersection
+from .matrix import DistanceMatrix
+
+
+# This plans a delivery tour over the intersections of a distance matrix
+# We build the tour with nearest neighbour (always drive to the closest stop left), then improve
+# it with local search until nothing improves or the time budget runs out:
+# - 2-opt: reverse a piece of the tour when that makes two roads shorter
+# - Or-opt: move a run of 1 to 3 stops to a better place in the tour
+# Only the closest few stops of every stop are tried, which keeps every pass close to linear.
+# Roads go both ways, so the matrix is symmetric. Stops we can't reach are left out of the tour.
+class TourOptimizer:
+    def __init__(self, matrix, start, stops=None, returnToStart=True, neighbours=8):
+        ids = matrix.getIDs()
+        table = np.frombuffer(matrix.getTable(), dtype=float).reshape(len(ids), len(ids))
+        start = matrix.indexOf(start)
+        # The stops can be intersections or IDs, by default we visit the whole matrix
+        if stops == None:
+            stops = range(len(ids))
+        else:
+            stops = [matrix.indexOf(stop) for stop in stops]
+        nodes = [start] + [stop for stop in stops if stop != start]
+        # Stops we can't reach from the start are left out
+        nodes = [node for node in nodes if table[start, node] != float('inf')]
+
+        self.__ids = [ids[node] for node in nodes]
+        self.__returnToStart = returnToStart
+        # We work on a small copy with just our stops, position 0 is the start
+        self.__distances = np.ascontiguousarray(table[np.ix_(nodes, nodes)])
+        self.__table = memoryview(self.__distances.reshape(-1))
+        count = len(nodes)
+        self.__count = count
+        if count > 1:
+            size = min(neighbours, count - 1)
+            # The closest stops of every stop, the stop itself is always first so we skip it
+            closest = np.argpartition(self.__distances, size, axis=1)[:, :size + 1]
+            rows = np.take_along_axis(self.__distances, closest, axis=1)
+            order = np.argsort(rows, axis=1, kind="stable")
+            closest = np.take_along_axis(closest, order, axis=1)
+            self.__neighbours = [[other for other in row if other != node][:size]
+                                 for node, row in enumerate(closest.tolist())]
+        else:
+            self.__neighbours = [[]]
+
+    # The IDs of the stops in the tour (the start first)
+    def getIDs(self):
+        return self.__ids
+
+    # The length of a tour given as positions in getIDs()
+    def tourLength(self, tour):
+        table = self.__table
+        count = self.__count
+        length = sum(table[a * count + b] for a, b in zip(tour, tour[1:]))
+        if self.__returnToStart and len(tour) > 1:
+            length += table[tour[-1] * count + tour[0]]
+        return length
+
+    # To plan the tour, this returns the IDs in visiting order and the total length
+    def optimize(self, timeBudget=1.0):
+        deadline = time.perf_counter() + timeBudget
+        tour = self.__nearestNeighbour()
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = self.__twoOpt(tour, deadline)
+            improved = self.__orOpt(tour, deadline) or improved
+        return [self.__ids[node] for node in tour], self.tourLength(tour)
+
+    # Always drive to the closest stop we haven't visited
+    def __nearestNeighbour(self):
+        distances = self.__distances
+        visited = np.zeros(self.__count, dtype=bool)
+        tour = [0]
+        visited[0] = True
+        for step in range(self.__count - 1):
+            row = np.where(visited, np.inf, distances[tour[-1]])
+            following = int(row.argmin())
+            tour.append(following)
+            visited[following] = True
+        return tour
+
+    # The distance between two stops, -1 is the end of an open tour which costs nothing
+    def __distance(self, a, b):
+        if a < 0 or b < 0:
+            return 0
+        return self.__table[a * self.__count + b]
+
+    # The stop after a position, going back to the start when the tour is closed
+    def __after(self, tour, position):
+        if position + 1 < len(tour):
+            return tour[position + 1]
+        return tour[0] if self.__returnToStart else -1
+
+    # 2-opt with neighbour lists and don't-look bits
+    # Reversing tour[low + 1 .. high] swaps the roads (low, low + 1) and (high, high + 1)
+    # for (low, high) and (low + 1, high + 1).
+    def __twoOpt(self, tour, deadline):
+        distance = self.__distance
+        position = [0] * self.__count
+        for i, node in enumerate(tour):
+            position[node] = i
+        # Stops whose neighbourhood didn't change since we last looked are skipped
+        active = list(tour)
+        waiting = set(active)
+        anyImprovement = False
+
+        while active and time.perf_counter() < deadline:
+            node = active.pop()
+            waiting.discard(node)
+            i = position[node]
+            following = self.__after(tour, i)
+            for other in self.__neighbours[node]:
+                # Only closer stops can make the new road (node, other) pay off
+                if distance(node, other) >= distance(node, following):
+                    break
+                j = position[other]
+                low, high = (i, j) if i < j else (j, i)
+                if high - low < 2:
+                    continue
+                a, b = tour[low], tour[low + 1]
+                c, d = tour[high], self.__after(tour, high)
+                delta = distance(a, c) + distance(b, d) - distance(a, b) - distance(c, d)
+                if delta < -1e-9:
+                    tour[low + 1:high + 1] = tour[low + 1:high + 1][::-1]
+                    for k in range(low + 1, high + 1):
+                        position[tour[k]] = k
+                    for changed in (a, b, c, d):
+                        if changed >= 0 and changed not in waiting:
+                            waiting.add(changed)
+                            active.append(changed)
+                    anyImprovement = True
+                    break
+        return anyImprovement
+
+    # Or-opt, we try to move runs of 1 to 3 stops next to one of the closest stops of its ends
+    def __orOpt(self, tour, deadline):
+        distance = self.__distance
+        anyImprovement = False
+        position = [0] * self.__count
+        for size in (1, 2, 3):
+            for k, node in enumerate(tour):
+                position[node] = k
+            i = 1
+            while i + size <= len(tour) and time.perf_counter() < deadline:
+                segment = tour[i:i + size]
+                before = tour[i - 1]
+                after = self.__after(tour, i + size - 1)
+                removed = distance(before, segment[0]) + distance(segment[-1], after) - distance(before, after)
+                # The tour without the run, positions after it move back by its size
+                rest = tour[:i] + tour[i + size:]
+                end = rest[0] if self.__returnToStart else -1
+
+                best = -1e-9
+                bestMove = None
+                for runEnd in (segment[0], segment[-1]):
+                    for other in self.__neighbours[runEnd]:
+                        if other in segment:
+                            continue
+                        k = position[other] - (size if position[other] >= i + size else 0)
+                        # We try the run on both sides of the neighbour, in both directions
+                        for place in (k, k + 1):
+                            if place == 0:
+                                continue
+                            left = rest[place - 1]
+                            right = rest[place] if place < len(rest) else end
+                            for run in (segment, segment[::-1]):
+                                added = distance(left, run[0]) + distance(run[-1], right) - distance(left, right)
+                                if added - removed < best:
+                                    best = added - removed
+                                    bestMove = (place, run)
+                if bestMove != None:
+                    place, run = bestMove
+                    tour[:] = rest[:place] + run + rest[place:]
+                    for k, node in enumerate(tour):
+                        position[node] = k
+                    anyImprovement = True
+                else:
+                    i += 1
+        return anyImprovement
+
+
+# This splits the delivery intersections over a fleet of vehicles with a capacity limit
+# Every house is one package, so the demand of an intersection is its number of houses.
+# We start with one vehicle per intersection and merge routes by Clarke-Wright savings
+# (how much shorter it is to drive a to b directly instead of going back to the depot in
+# between), only looking at pairs of close intersections. Then every route is improved
+# independently with TourOptimizer on a pool of processes.
+class FleetPlanner:
+    def __init__(self, matrix, depot, demands, path=None):
+        self.__matrix = matrix
+        self.__path = path
+        self.__depot = depot.getID() if isinstance(depot, Intersection) else depot
+        # Intersection ID -> number of packages
+        self.__demands = demands
+
+    # To plan the routes, this returns one (intersection IDs, length, packages) per vehicle
+    # The intersection IDs start at the depot, and vehicles end back at the depot.
+    def plan(self, vehicles, capacity, timeBudget=1.0, processes=None, neighbours=30):
+        for stop, demand in self.__demands.items():
+            if demand > capacity:
+                raise ValueError(f"Intersection {stop} has {demand} packages, more than a vehicle can carry")
+        routes = self.__savings(capacity, neighbours)
+        routes = self.__fitFleet(routes, vehicles, capacity)
+
+        # Now we improve every route on its own
+        jobs = [(self.__depot, route, timeBudget) for route in routes]
+        if processes == None:
+            processes = os.cpu_count() or 1
+        processes = min(processes, len(jobs))
+        if processes <= 1:
+            results = [TourOptimizer(self.__matrix, depot, stops).optimize(budget) for depot, stops, budget in jobs]
+        else:
+            # The workers open the matrix file themselves, so they share its pages instead of copying it
+            temporary = None
+            path = self.__path
+            if path == None:
+                temporary = tempfile.TemporaryDirectory()
+                path = os.path.join(temporary.name, "matrix.bin")
+                self.__matrix.save(path)
+            try:
+                with multiprocessing.Pool(processes, initializer=_fleetWorkerStart, initargs=(path,)) as pool:
+                    results = pool.map(_fleetWorkerRoute, jobs)
+            finally:
+                if temporary != None:
+                    temporary.cleanup()
+
+        return [(order, length, sum(self.__demands[stop] for stop in order[1:]))
+                for order, length in results]
+
+    # Clarke-Wright savings with the capacity limit
+    def __savings(self, capacity, neighbours):
+        matrix = self.__matrix
+        stops = [stop for stop in self.__demands if stop != self.__depot and self.__demands[stop] > 0]
+        if not stops:
+            return []
+        depot = matrix.indexOf(self.__depot)
+        indexes = np.array([matrix.indexOf(stop) for stop in stops], dtype=np.intp)
+        table = np.frombuffer(matrix.getTable(), dtype=float).reshape(len(matrix), len(matrix))
+        local = table[np.ix_(indexes, indexes)]
+        fromDepot = table[depot, indexes]
+        # Intersections we can't reach can't be delivered
+        reachable = np.isfinite(fromDepot)
+
+        # We only look at the closest intersections of every intersection
+        size = min(neighbours, len(stops) - 1)
+        pairs = []
+        if size > 0:
+            closest = np.argpartition(local, size, axis=1)[:, :size + 1]
+            rows = np.repeat(np.arange(len(stops)), size + 1)
+            columns = closest.reshape(-1)
+            keep = (rows < columns) & reachable[rows] & reachable[columns]
+            rows, columns = rows[keep], columns[keep]
+            savings = fromDepot[rows] + fromDepot[columns] - local[rows, columns]
+            order = np.argsort(-savings, kind="stable")
+            pairs = zip(rows[order].tolist(), columns[order].tolist(), savings[order].tolist())
+
+        demands = [self.__demands[stop] for stop in stops]
+        routes = {i: [i] for i in range(len(stops)) if reachable[i]}
+        routeOf = list(range(len(stops)))
+        loads = {i: demands[i] for i in routes}
+        for a, b, saving in pairs:
+            if saving <= 0:
+                break
+            routeA, routeB = routeOf[a], routeOf[b]
+            if routeA == routeB or loads[routeA] + loads[routeB] > capacity:
+                continue
+            first, second = routes[routeA], routes[routeB]
+            # We can only join two routes at their ends
+            if a not in (first[0], first[-1]) or b not in (second[0], second[-1]):
+                continue
+            if first[-1] != a:
+                first.reverse()
+            if second[0] != b:
+                second.reverse()
+            first.extend(second)
+            for stop in second:
+                routeOf[stop] = routeA
+            loads[routeA] += loads.pop(routeB)
+            del routes[routeB]
+        return [[stops[stop] for stop in route] for route in routes.values()]
+
+    # If we have more routes than vehicles, we put the smallest routes into others that have room
+    def __fitFleet(self, routes, vehicles, capacity):
+        routes = sorted(routes, key=lambda route: sum(self.__demands[stop] for stop in route), reverse=True)
+        while len(routes) > vehicles:
+            smallest = routes.pop()
+            load = sum(self.__demands[stop] for stop in smallest)
+            for route in routes:
+                if sum(self.__demands[stop] for stop in route) + load <= capacity:
+                    route.extend(smallest)
+                    break
+            else:
+                raise ValueError(f"{vehicles} vehicles with capacity {capacity} can't carry every package")
+        return routes
+
+
+# Worker process state for FleetPlanner.plan
+_fleetWorker = {}
+
+# This runs once in every worker and opens the shared distance matrix
+def _fleetWorkerStart(path):
+    _fleetWorker["matrix"] = DistanceMatrix.load(path)
+
+# This improves one vehicle route in a worker
+def _fleetWorkerRoute(job):
+    depot, stops, timeBudget = job
+    return TourOptimizer(_fleetWorker["matrix"], depot, stops).optimize(timeBudget)